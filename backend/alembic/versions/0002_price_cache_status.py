@@ -0,0 +1,37 @@
+"""Negative entries in price_cache
+
+Adds price_cache.status: "ok" for a cached price, "not_listed" for an item
+no provider could price (price NULL). Existing rows are all real prices
+and get "ok" from the server default.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:12:41.503127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases that ran the app first got the column from create_all
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('price_cache')}
+    if 'status' in columns:
+        return
+
+    with op.batch_alter_table('price_cache', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=20), server_default='ok', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('price_cache', schema=None) as batch_op:
+        batch_op.drop_column('status')
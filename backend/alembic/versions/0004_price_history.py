@@ -0,0 +1,62 @@
+"""Price history
+
+Integer item keys, append-only raw price points and their hourly/daily
+rollups.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 09:21:37.604219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    # Databases that ran the app first got the table from create_all
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if not _has_table('price_items'):
+        op.create_table('price_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('item_name', sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('item_name')
+        )
+    if not _has_table('price_points'):
+        op.create_table('price_points',
+        sa.Column('item_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('ts', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('price_cents', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('item_id', 'ts'),
+        sqlite_with_rowid=False
+        )
+    if not _has_table('price_rollups'):
+        op.create_table('price_rollups',
+        sa.Column('item_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('resolution', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('ts', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('min_cents', sa.Integer(), nullable=False),
+        sa.Column('max_cents', sa.Integer(), nullable=False),
+        sa.Column('sum_cents', sa.BigInteger(), nullable=False),
+        sa.Column('samples', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('item_id', 'resolution', 'ts'),
+        sqlite_with_rowid=False
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('price_rollups')
+    op.drop_table('price_points')
+    op.drop_table('price_items')
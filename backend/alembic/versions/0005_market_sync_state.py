@@ -0,0 +1,44 @@
+"""Market sync state
+
+Per-user high-water mark of the incremental Steam Market history import.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 09:22:58.271940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    # Databases that ran the app first got the table from create_all
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if _has_table('market_sync_state'):
+        return
+
+    op.create_table('market_sync_state',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('last_row_id', sa.String(length=100), nullable=True),
+    sa.Column('last_timestamp', sa.DateTime(), nullable=True),
+    sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('market_sync_state')
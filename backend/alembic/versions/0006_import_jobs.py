@@ -0,0 +1,64 @@
+"""Import jobs
+
+Background Steam Market imports: request, high-water mark and progress.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 09:24:10.935512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    # Databases that ran the app first got the table from create_all
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if _has_table('import_jobs'):
+        return
+
+    op.create_table('import_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('count', sa.Integer(), nullable=True),
+    sa.Column('full_sync', sa.Boolean(), nullable=False),
+    sa.Column('known_row_id', sa.String(length=100), nullable=True),
+    sa.Column('known_timestamp', sa.DateTime(), nullable=True),
+    sa.Column('newest_row_id', sa.String(length=100), nullable=True),
+    sa.Column('newest_timestamp', sa.DateTime(), nullable=True),
+    sa.Column('next_start', sa.Integer(), nullable=False),
+    sa.Column('total_count', sa.Integer(), nullable=True),
+    sa.Column('pages_fetched', sa.Integer(), nullable=False),
+    sa.Column('rows_parsed', sa.Integer(), nullable=False),
+    sa.Column('imported', sa.Integer(), nullable=False),
+    sa.Column('skipped', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_import_jobs_user_id'), ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_import_jobs_user_id'))
+
+    op.drop_table('import_jobs')
@@ -0,0 +1,69 @@
+"""Market page archive
+
+Compressed raw market history pages (stored once per content hash), each
+user's references to them, and import_jobs.archive.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 09:25:44.380671
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    # Databases that ran the app first got the table from create_all
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if not _has_table('market_page_blobs'):
+        op.create_table('market_page_blobs',
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('encoding', sa.String(length=10), nullable=False),
+        sa.Column('raw_size', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('content_hash')
+        )
+    if not _has_table('market_page_archive'):
+        op.create_table('market_page_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.String(length=32), nullable=True),
+        sa.Column('start', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('fetched_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['content_hash'], ['market_page_blobs.content_hash'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'content_hash')
+        )
+        with op.batch_alter_table('market_page_archive', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_market_page_archive_user_id'), ['user_id'], unique=False)
+
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('import_jobs')}
+    if 'archive' not in columns:
+        with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('archive', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.drop_column('archive')
+
+    with op.batch_alter_table('market_page_archive', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_market_page_archive_user_id'))
+
+    op.drop_table('market_page_archive')
+    op.drop_table('market_page_blobs')
@@ -0,0 +1,71 @@
+"""Per-item P&L summary
+
+Materialized per-user, per-item P&L and FIFO state, plus the per-item,
+time-ordered trades index its rebuilds scan. Rows are built lazily on a
+user's first P&L read or trade write, or up front with
+rebuild_pnl_summary.py --all.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 09:27:19.052388
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    # Databases that ran the app first got the table from create_all
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if not _has_table('item_pnl_summary'):
+        op.create_table('item_pnl_summary',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('item_name', sa.String(length=255), nullable=False),
+        sa.Column('buy_count', sa.Integer(), nullable=False),
+        sa.Column('sell_count', sa.Integer(), nullable=False),
+        sa.Column('total_bought', sa.Float(), nullable=False),
+        sa.Column('total_sold', sa.Float(), nullable=False),
+        sa.Column('total_fees', sa.Float(), nullable=False),
+        sa.Column('matched_count', sa.Integer(), nullable=False),
+        sa.Column('realized_pnl', sa.Float(), nullable=False),
+        sa.Column('realized_net_pnl', sa.Float(), nullable=False),
+        sa.Column('profitable', sa.Integer(), nullable=False),
+        sa.Column('losing', sa.Integer(), nullable=False),
+        sa.Column('holding_seconds', sa.Float(), nullable=False),
+        sa.Column('unmatched_sells', sa.Integer(), nullable=False),
+        sa.Column('open_count', sa.Integer(), nullable=False),
+        sa.Column('open_cost', sa.Float(), nullable=False),
+        sa.Column('open_lots', sa.Text(), nullable=False),
+        sa.Column('last_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'item_name')
+        )
+        with op.batch_alter_table('item_pnl_summary', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_item_pnl_summary_user_id'), ['user_id'], unique=False)
+
+    op.create_index(
+        'ix_trades_user_item_time', 'trades', ['user_id', 'item_name', 'timestamp', 'id'], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trades_user_item_time', table_name='trades')
+    with op.batch_alter_table('item_pnl_summary', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_item_pnl_summary_user_id'))
+
+    op.drop_table('item_pnl_summary')
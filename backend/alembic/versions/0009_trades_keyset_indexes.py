@@ -0,0 +1,35 @@
+"""Composite indexes on trades for keyset pagination
+
+ix_trades_user_time_id and ix_trades_user_type_time_id let a user's
+transaction listing (optionally filtered by trade_type) seek straight to a
+(timestamp, id) cursor. Created with IF NOT EXISTS, since databases created
+by create_all after these indexes were added already have them.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 17:55:12.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_trades_user_time_id', 'trades', ['user_id', 'timestamp', 'id'], if_not_exists=True)
+    op.create_index(
+        'ix_trades_user_type_time_id', 'trades', ['user_id', 'trade_type', 'timestamp', 'id'], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trades_user_type_time_id', table_name='trades')
+    op.drop_index('ix_trades_user_time_id', table_name='trades')
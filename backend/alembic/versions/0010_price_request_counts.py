@@ -0,0 +1,42 @@
+"""Price request counts
+
+Lookups per item summed over all workers; the background price refresher
+orders its targets by them.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 10:04:37.512806
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    # Databases that ran the app first got the table from create_all
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if _has_table('price_request_counts'):
+        return
+
+    op.create_table('price_request_counts',
+    sa.Column('item_name', sa.String(length=255), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('item_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('price_request_counts')
@@ -0,0 +1,95 @@
+"""
+Admin endpoints - outbound HTTP limiter state and maintenance jobs
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.services.http_client import http_clients
+from app.services.price_dump import DumpFormatError, DumpParser, PriceDumpLoader
+from app.services.portfolio import value_portfolios
+from app.services.price_history import price_history
+from app.services.rate_limiter import outbound_limiter
+from typing import Optional
+
+router = APIRouter()
+
+
+@router.get("/outbound")
+async def get_outbound_state():
+    """
+    Per-host rate limiter, Retry-After back-off and circuit breaker state
+    """
+    return {
+        "limiter": outbound_limiter.stats(),
+        "pools": http_clients.stats()
+    }
+
+
+@router.post("/outbound/reset")
+async def reset_outbound_state(
+    host: Optional[str] = Query(None, description="Host to reset (all if omitted)")
+):
+    """
+    Reset limiter state, closing any open circuit
+    """
+    outbound_limiter.reset(host)
+    return outbound_limiter.stats()
+
+
+@router.post("/price-history/retention")
+async def run_price_history_retention(db: Session = Depends(get_db)):
+    """
+    Roll old raw price points into hourly/daily buckets now
+    """
+    return price_history.run_retention(db)
+
+
+@router.get("/portfolios")
+async def get_all_portfolios(db: Session = Depends(get_db)):
+    """
+    Value every user's open positions in one pass (totals only, by user)
+
+    Users whose P&L summary hasn't been built yet are missing; run
+    rebuild_pnl_summary.py --all first.
+    """
+    valuation = value_portfolios(db)
+    return {"users": len(valuation), "portfolios": valuation.totals()}
+
+
+@router.post("/price-dump")
+async def load_price_dump(
+    request: Request,
+    format: str = Query("json", description="json, ndjson or csv"),
+    source: str = Query("dump:upload", description="Provenance stored in price_cache.source"),
+    price_unit: str = Query("dollars", description="dollars or cents"),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk-load a full-market price dump sent as the raw request body
+
+    The body is parsed as it streams in and upserted into price_cache in
+    chunked transactions, so large dumps are never held in memory:
+
+        curl -X POST --data-binary @prices.json \\
+            "http://localhost:8000/api/admin/price-dump?format=json&source=dump:2024-01-01"
+    """
+    if format not in ("json", "ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be json, ndjson or csv")
+    if price_unit not in ("dollars", "cents"):
+        raise HTTPException(status_code=400, detail="price_unit must be dollars or cents")
+
+    parser = DumpParser(format)
+    loader = PriceDumpLoader(db, source, price_unit=price_unit)
+
+    try:
+        async for data in request.stream():
+            loader.add(parser.feed(data))
+        loader.add(parser.close())
+        loader.flush()
+    except DumpFormatError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{e} (loaded {loader.loaded} rows before the error)"
+        )
+
+    return loader.report(parser.skipped)
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Trade
-from app.services.steam_market import SteamMarketService
+from app.config import settings
+from app.database import SessionLocal, get_db
+from app.models import ImportJob
+from app.services.import_jobs import FINISHED_STATUSES, RESUMABLE_STATUSES, import_jobs, job_to_dict
 from app.utils.user_helpers import get_user_int_id
 from pydantic import BaseModel
 from typing import Optional
+from urllib.parse import quote
+import asyncio
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,10 +19,41 @@ router = APIRouter()
 
 class ImportRequest(BaseModel):
     cookies: str
-    count: Optional[int] = 500
+    count: Optional[int] = None  # None imports the full history
+    full_sync: bool = False  # ignore the high-water mark and re-scan from the newest row
+    archive: Optional[bool] = None  # keep raw pages for offline reprocessing (default: settings)
 
 
-@router.post("/steam-market")
+class ResumeRequest(BaseModel):
+    cookies: str
+
+
+def _validate_cookies(cookies: str):
+    if not cookies or len(cookies) < 20:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid cookies. Please provide complete cookie string from browser."
+        )
+
+
+def _get_job_or_404(job_id: str, user_id: int, db: Session) -> ImportJob:
+    # Someone else's job is reported like a missing one
+    job = import_jobs.get(db, job_id)
+    if not job or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
+def _job_response(job: ImportJob, user_id: str) -> dict:
+    query = f"?user_id={quote(user_id)}"
+    return {
+        **job_to_dict(job),
+        "status_url": f"/api/import/jobs/{job.id}{query}",
+        "events_url": f"/api/import/jobs/{job.id}/events{query}"
+    }
+
+
+@router.post("/steam-market", status_code=202)
 async def import_steam_market_history(
     request: ImportRequest,
     user_id: str = Query(..., description="User Unique ID"),
@@ -26,6 +62,11 @@ async def import_steam_market_history(
     """
     Import Steam Market transaction history using browser cookies
     
+    Starts a background import job and returns its id right away. Follow
+    progress with `GET /api/import/jobs/{job_id}` or the Server-Sent Events
+    stream at `/api/import/jobs/{job_id}/events`. If the user already has an
+    import running, that job is returned instead of starting another.
+    
     **How to get cookies:**
     1. Open Steam Market in your browser
     2. Press F12 to open DevTools
@@ -39,99 +80,130 @@ async def import_steam_market_history(
     - steamLoginSecure
     - steamCountry (optional but recommended)
     """
-    steam_market = SteamMarketService()
-    
     # Resolve user ID
     int_user_id = get_user_int_id(user_id, db)
     
-    logger.info(f"Starting market history import for user {int_user_id}")
-    
     # Validate cookies
-    if not request.cookies or len(request.cookies) < 20:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid cookies. Please provide complete cookie string from browser."
-        )
+    _validate_cookies(request.cookies)
     
-    # Fetch market history
-    result = await steam_market.fetch_market_history(
-        cookies=request.cookies,
-        count=request.count
-    )
+    job = import_jobs.active_job(db, int_user_id)
+    if job is None:
+        job = import_jobs.create(db, int_user_id, request.count, request.full_sync, request.archive)
+        import_jobs.start(db, job, request.cookies)
+        logger.info(f"Started market history import job {job.id} for user {int_user_id}")
     
-    if not result["success"]:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Failed to fetch market history: {result.get('error', 'Unknown error')}"
-        )
+    return _job_response(job, user_id)
+
+
+@router.get("/jobs")
+async def list_import_jobs(
+    user_id: str = Query(..., description="User Unique ID"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    The user's most recent import jobs, newest first
+    """
+    int_user_id = get_user_int_id(user_id, db)
     
-    transactions = result.get("transactions", [])
-    
-    if not transactions:
-        return {
-            "status": "success",
-            "message": "No transactions found in Steam Market history",
-            "imported": 0,
-            "skipped": 0,
-            "total": 0
-        }
-    
-    # Import transactions into database
-    imported = 0
-    skipped = 0
-    
-    for tx in transactions:
-        try:
-            # Generate unique trade ID
-            trade_id = f"{int_user_id}_market_{tx['item_name']}_{int(tx['timestamp'].timestamp())}"
-            
-            # Check if already exists
-            existing = db.query(Trade).filter(Trade.trade_id == trade_id).first()
-            if existing:
-                skipped += 1
-                continue
-            
-            # Calculate net amount
-            price = tx.get("price", 0)
-            fee = price * 0.05  # Steam Market takes 5% fee (auto-calculated)
-            
-            if tx["trade_type"] == "BUY":
-                net_amount = -(price + fee)
-            else:
-                net_amount = price - fee
-            
-            # Create transaction with steam_market source
-            new_trade = Trade(
-                user_id=int_user_id,
-                trade_id=trade_id,
-                trade_type=tx["trade_type"],
-                item_name=tx["item_name"],
-                price=price,
-                fee=fee,  # Auto-calculated 5% Steam fee
-                net_amount=net_amount,
-                source="steam_market",  # Mark as Steam Market transaction
-                timestamp=tx["timestamp"]
-            )
+    jobs = db.query(ImportJob).filter(
+        ImportJob.user_id == int_user_id
+    ).order_by(ImportJob.created_at.desc()).limit(limit).all()
+    
+    return [_job_response(import_jobs.get(db, job.id), user_id) for job in jobs]
+
+
+@router.get("/jobs/{job_id}")
+async def get_import_job(
+    job_id: str,
+    user_id: str = Query(..., description="User Unique ID"),
+    db: Session = Depends(get_db)
+):
+    """
+    Current state and progress of one of the user's import jobs
+    """
+    int_user_id = get_user_int_id(user_id, db)
+    return _job_response(_get_job_or_404(job_id, int_user_id, db), user_id)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_import_job(
+    job_id: str,
+    request: Request,
+    user_id: str = Query(..., description="User Unique ID")
+):
+    """
+    Server-Sent Events stream of the progress of one of the user's import jobs
+    
+    Emits a `progress` event whenever the job's state changes and a final
+    `done` event once it has completed, failed or been interrupted.
+    """
+    db = SessionLocal()
+    try:
+        _get_job_or_404(job_id, get_user_int_id(user_id, db), db)
+    finally:
+        db.close()
+    
+    async def events():
+        last = None
+        idle = 0.0
+        
+        while not await request.is_disconnected():
+            db = SessionLocal()
+            try:
+                job = import_jobs.get(db, job_id)
+                payload = job_to_dict(job)
+            finally:
+                db.close()
             
-            db.add(new_trade)
-            imported += 1
+            if payload != last:
+                last = payload
+                idle = 0.0
+                event = "done" if payload["status"] in FINISHED_STATUSES else "progress"
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+                if event == "done":
+                    return
+            elif idle >= 15:
+                # Keep proxies from closing a quiet stream
+                idle = 0.0
+                yield ": keep-alive\n\n"
             
-        except Exception as e:
-            logger.error(f"Error importing transaction: {e}")
-            continue
+            await asyncio.sleep(settings.import_job_poll_interval)
+            idle += settings.import_job_poll_interval
     
-    # Commit all at once
-    db.commit()
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/jobs/{job_id}/resume", status_code=202)
+async def resume_import_job(
+    job_id: str,
+    request: ResumeRequest,
+    user_id: str = Query(..., description="User Unique ID"),
+    db: Session = Depends(get_db)
+):
+    """
+    Resume one of the user's failed or interrupted imports from the last completed page
     
-    logger.info(f"Import complete: {imported} imported, {skipped} skipped")
+    Cookies aren't stored, so they have to be sent again.
+    """
+    job = _get_job_or_404(job_id, get_user_int_id(user_id, db), db)
     
-    return {
-        "status": "success",
-        "message": f"Successfully imported {imported} transactions from Steam Market",
-        "imported": imported,
-        "skipped": skipped,
-        "total": len(transactions)
-    }
+    if job.status not in RESUMABLE_STATUSES:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Import job is {job.status}; only failed or interrupted jobs can be resumed"
+        )
+    
+    _validate_cookies(request.cookies)
+    
+    import_jobs.start(db, job, request.cookies)
+    logger.info(f"Resuming import job {job.id} from offset {job.next_start}")
+    
+    return _job_response(job, user_id)
 
 
 @router.get("/cookie-guide")
@@ -0,0 +1,31 @@
+"""
+Portfolio endpoints - current value of open positions
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.services.pnl_summary import ensure_user
+from app.services.portfolio import value_portfolios
+from app.utils.user_helpers import get_user_int_id
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/")
+async def get_portfolio(
+    user_id: str = Query(..., description="User Unique ID"),
+    db: Session = Depends(get_db)
+):
+    """
+    Market value, cost basis and unrealized P&L of a user's open positions
+
+    Open lots are valued at the latest cached price of their item. Each
+    position carries its weight in the portfolio's market value; positions
+    without a cached price have price, market_value and unrealized_pnl null
+    and are counted in unpriced_items.
+    """
+    int_user_id = get_user_int_id(user_id, db)
+    ensure_user(db, int_user_id)
+    return value_portfolios(db, [int_user_id]).user(int_user_id)
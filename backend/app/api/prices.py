@@ -1,13 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.services.price import PriceService
+from app.services.price import PriceService, price_service
+from app.services.price_refresher import price_refresher
+from app.services.price_history import price_history
+from pydantic import BaseModel
+from datetime import datetime, timedelta
+from typing import List, Optional
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+class BulkPriceRequest(BaseModel):
+    item_names: List[str]
+
+
 # Removed /update endpoint - inventory system deprecated
 
 @router.get("/item/{item_name}")
@@ -72,17 +83,19 @@ async def get_item_price(
         item_name: Market hash name of the item
         
     Returns:
-        Current price from CSFloat or Steam Market
+        Current price from CSFloat or Steam Market. If the cached price is
+        past its TTL but within the stale grace window it is returned at once
+        with is_stale=true and refreshed in the background.
     """
-    price_service = PriceService()
+    info = await price_service.get_item_price_info(item_name, db)
     
-    price = await price_service.get_item_price(item_name, db)
-    
-    if price:
+    if info["price"]:
         return {
             "item_name": item_name,
-            "price": price,
-            "currency": "USD"
+            "price": info["price"],
+            "currency": "USD",
+            "is_stale": info["is_stale"],
+            "age_seconds": info["age_seconds"]
         }
     else:
         return {
@@ -90,3 +103,78 @@ async def get_item_price(
             "price": None,
             "error": "Price not found"
         }
+
+
+@router.post("/bulk")
+async def get_bulk_prices(
+    request: BulkPriceRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Get prices for many items at once
+    
+    Streams newline-delimited JSON, one line per item as soon as its price
+    is known. Cached prices come back immediately; the rest follow as the
+    providers answer.
+    """
+    async def stream():
+        async for item_name, price in price_service.iter_prices(request.item_names, db):
+            yield json.dumps({
+                "item_name": item_name,
+                "price": price,
+                "currency": "USD"
+            }) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.get("/cache/stats")
+async def get_price_cache_stats():
+    """
+    In-memory price cache counters (hits, misses, evictions, memory use)
+    """
+    return price_service.cache_stats()
+
+
+@router.get("/refresher/status")
+async def get_refresher_status(db: Session = Depends(get_db)):
+    """
+    Background price refresher state (leader lease, pause flag, counters)
+    """
+    return price_refresher.status(db)
+
+
+@router.post("/refresher/pause")
+async def pause_refresher(db: Session = Depends(get_db)):
+    """Pause background price refreshing on every worker"""
+    price_refresher.set_paused(db, True)
+    return price_refresher.status(db)
+
+
+@router.post("/refresher/resume")
+async def resume_refresher(db: Session = Depends(get_db)):
+    """Resume background price refreshing"""
+    price_refresher.set_paused(db, False)
+    return price_refresher.status(db)
+
+
+@router.get("/history")
+async def get_price_history(
+    item_names: List[str] = Query(..., description="Item names (repeat the parameter for several)"),
+    start: Optional[datetime] = Query(None, description="Range start (UTC), default 30 days ago"),
+    end: Optional[datetime] = Query(None, description="Range end (UTC), default now"),
+    resolution: str = Query("auto", description="raw, hour, day or auto"),
+    db: Session = Depends(get_db)
+):
+    """
+    Price time series for many items in one call
+    
+    Each point is [epoch_seconds, avg_price, min_price, max_price].
+    """
+    if resolution not in ("auto", "raw", "hour", "day"):
+        raise HTTPException(status_code=400, detail="resolution must be raw, hour, day or auto")
+    
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=30)
+    
+    return price_history.query_series(db, item_names, start, end, resolution)
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import desc, func, tuple_
 from app.database import get_db
 from app.models import Trade, User
+from app.services.bulk_transactions import BulkTransactionWriter, manual_net_amount, manual_trade_id
+from app.services.pnl import compute_pnl, items_summary
+from app.services.pnl_series import INTERVALS, bucket_count, pnl_series
+from app.services.pnl_summary import rebuild_items, record_trades
+from app.utils.pagination import decode_cursor, encode_cursor
 from app.utils.user_helpers import get_user_int_id
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional, List
+from pydantic import BaseModel, ValidationError
+from app.config import settings
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, Optional, List, Tuple
+import json
 import logging
+import math
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -23,6 +31,22 @@ class TransactionCreate(BaseModel):
     notes: Optional[str] = None
 
 
+def _check_amounts(transaction: TransactionCreate):
+    """
+    Reject prices and fees that can't be stored or summed
+
+    Pydantic accepts "nan" and "inf" for float fields; such a value would
+    poison every P&L total it is added to.
+
+    Raises:
+        ValueError: Naming the offending field
+    """
+    for field in ("price", "fee"):
+        value = getattr(transaction, field)
+        if value is not None and not (math.isfinite(value) and value >= 0):
+            raise ValueError(f"{field} must be a finite number >= 0")
+
+
 class TransactionResponse(BaseModel):
     id: int
     item_name: str
@@ -60,19 +84,20 @@ async def create_transaction(
     # Validate trade type
     if transaction.trade_type not in ["BUY", "SELL"]:
         raise HTTPException(status_code=400, detail="trade_type must be 'BUY' or 'SELL'")
+    try:
+        _check_amounts(transaction)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Calculate net amount
     # Fee only applies to Steam Market transactions (will be set during import)
-    if transaction.trade_type == "BUY":
-        net_amount = -(transaction.price + (transaction.fee or 0))  # Negative for buys
-    else:
-        net_amount = transaction.price - (transaction.fee or 0)  # Positive for sells
+    net_amount = manual_net_amount(transaction.trade_type, transaction.price, transaction.fee)
     
     # Resolve user ID
     int_user_id = get_user_int_id(user_id, db)
     
     # Generate unique trade ID
-    trade_id = f"{int_user_id}_{transaction.item_name}_{int(transaction.timestamp.timestamp())}"
+    trade_id = manual_trade_id(int_user_id, transaction.item_name, transaction.timestamp)
     
     # Create transaction (manual source, no auto-fee)
     new_trade = Trade(
@@ -88,6 +113,17 @@ async def create_transaction(
     )
     
     db.add(new_trade)
+    db.flush()
+    db.refresh(new_trade)  # timestamp as stored, for the summary
+
+    # Same transaction as the trade itself
+    record_trades(db, int_user_id, [{
+        "item_name": new_trade.item_name,
+        "trade_type": new_trade.trade_type,
+        "price": new_trade.price,
+        "fee": new_trade.fee,
+        "timestamp": new_trade.timestamp
+    }])
     db.commit()
     db.refresh(new_trade)
     
@@ -96,24 +132,155 @@ async def create_transaction(
     return new_trade
 
 
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def _json_array_rows(request: Request) -> AsyncIterator[Tuple[int, object]]:
+    """Items of a JSON array body"""
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body is not valid JSON")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of transactions")
+
+    for index, row in enumerate(payload):
+        yield index, row
+
+
+async def _ndjson_rows(request: Request) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Lines of an NDJSON body, parsed as they arrive
+
+    Blank lines are skipped; a line that isn't JSON is yielded as a
+    ValueError so only that row fails.
+    """
+    index = 0
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield index, _parse_line(line)
+                index += 1
+    if buffer.strip():
+        yield index, _parse_line(buffer)
+
+
+def _parse_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
+
+
+def _validate_row(row) -> TransactionCreate:
+    """
+    Validate one bulk row like the single create endpoint does
+
+    Raises:
+        ValueError: With a message for the row's result
+    """
+    if isinstance(row, ValueError):
+        raise row
+    try:
+        transaction = TransactionCreate.model_validate(row)
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in e.errors()
+        ))
+    if transaction.trade_type not in ["BUY", "SELL"]:
+        raise ValueError("trade_type must be 'BUY' or 'SELL'")
+    _check_amounts(transaction)
+    return transaction
+
+
+@router.post("/bulk")
+async def create_transactions_bulk(
+    request: Request,
+    user_id: str = Query(..., description="User Unique ID"),
+    db: Session = Depends(get_db)
+):
+    """
+    Create many transactions in one request
+
+    The body is either a JSON array of transactions (as accepted by
+    POST /) or, with Content-Type application/x-ndjson, one transaction
+    per line, read as it streams in. Rows are validated as they are read
+    and written a chunk at a time with a bulk insert; a bad row (or a
+    failed chunk) doesn't stop the rest.
+
+    Returns:
+        created/duplicates/errors counts and one result per row, in order:
+        {index, status: created|duplicate|error, id?, trade_id?, error?}
+    """
+    int_user_id = get_user_int_id(user_id, db)
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    rows = _ndjson_rows(request) if content_type in NDJSON_CONTENT_TYPES else _json_array_rows(request)
+
+    writer = BulkTransactionWriter(db, int_user_id)
+    max_rows = settings.bulk_transactions_max_rows
+
+    async for index, row in rows:
+        if index >= max_rows:
+            writer.error(index, f"Batch is limited to {max_rows} rows")
+            continue
+        try:
+            transaction = _validate_row(row)
+        except ValueError as e:
+            writer.error(index, str(e))
+            continue
+        writer.add(index, transaction.model_dump())
+
+    report = writer.finish()
+    logger.info(
+        f"Bulk create for user {user_id}: {report['created']} created, "
+        f"{report['duplicates']} duplicates, {report['errors']} errors"
+    )
+    return report
+
+
 @router.get("/", response_model=List[TransactionResponse])
 async def get_transactions(
+    response: Response,
     user_id: str = Query(..., description="User Unique ID"),
     limit: int = Query(100, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     trade_type: Optional[str] = Query(None, description="Filter by BUY or SELL"),
     db: Session = Depends(get_db)
 ):
     """
-    Get all transactions for a user
+    Get all transactions for a user, newest first
+
+    Pages can be requested by `offset` or, at constant cost however deep,
+    by `cursor`: when a page is full, the X-Next-Cursor response header
+    holds the cursor of the next one.
     """
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+
     int_user_id = get_user_int_id(user_id, db)
     query = db.query(Trade).filter(Trade.user_id == int_user_id)
     
     if trade_type:
         query = query.filter(Trade.trade_type == trade_type)
+
+    if cursor:
+        try:
+            after_timestamp, after_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Row-value comparison: one range seek in ix_trades_user_time_id (or
+        # the trade_type variant); SQLite won't seek on the equivalent OR
+        query = query.filter(tuple_(Trade.timestamp, Trade.id) < (after_timestamp, after_id))
     
-    transactions = query.order_by(desc(Trade.timestamp)).offset(offset).limit(limit).all()
+    transactions = query.order_by(desc(Trade.timestamp), desc(Trade.id)).offset(offset).limit(limit).all()
+
+    if len(transactions) == limit:
+        last = transactions[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.timestamp, last.id)
     
     return transactions
 
@@ -125,78 +292,54 @@ async def get_pnl(
 ):
     """
     Calculate P&L statistics for user
+
+    Totals are aggregated in the database; only the prices needed for FIFO
+    matching are streamed.
     """
     int_user_id = get_user_int_id(user_id, db)
-    # Get all transactions
-    transactions = db.query(Trade).filter(Trade.user_id == int_user_id).all()
-    
-    if not transactions:
-        return PnLStats(
-            total_bought=0,
-            total_sold=0,
-            total_profit=0,
-            total_fees=0,
-            net_profit=0,
-            transaction_count=0,
-            profitable_trades=0,
-            losing_trades=0
+    return PnLStats(**compute_pnl(db, int_user_id))
+
+
+@router.get("/pnl/series")
+async def get_pnl_series(
+    request: Request,
+    response: Response,
+    user_id: str = Query(..., description="User Unique ID"),
+    interval: str = Query("day", description="day, week or month"),
+    start: Optional[date] = Query(None, description="First day (default: a year before end)"),
+    end: Optional[date] = Query(None, description="Last day, inclusive (default: today, UTC)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Realized P&L, fees and buy/sell volume per day, week or month
+
+    Every bucket between start and end is returned, empty ones included;
+    the first and last only count trades inside the range.
+    Responses carry an ETag that changes only when the user's trades do;
+    send it back as If-None-Match to get a 304.
+    """
+    if interval not in INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of: {', '.join(INTERVALS)}")
+
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=settings.pnl_series_default_days)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if bucket_count(start, end, interval) > settings.pnl_series_max_buckets:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range has more than {settings.pnl_series_max_buckets} {interval} buckets; use a longer interval"
         )
-    
-    total_bought = 0
-    total_sold = 0
-    total_fees = 0
-    
-    # Calculate totals
-    for trade in transactions:
-        total_fees += trade.fee or 0
-        
-        if trade.trade_type == "BUY":
-            total_bought += trade.price
-        else:
-            total_sold += trade.price
-    
-    # Calculate per-item P&L
-    item_pnl = {}
-    for trade in transactions:
-        item = trade.item_name
-        if item not in item_pnl:
-            item_pnl[item] = {"buys": [], "sells": []}
-        
-        if trade.trade_type == "BUY":
-            item_pnl[item]["buys"].append(trade.price)
-        else:
-            item_pnl[item]["sells"].append(trade.price)
-    
-    # Calculate profitable vs losing trades
-    profitable = 0
-    losing = 0
-    
-    for item, data in item_pnl.items():
-        buys = data["buys"]
-        sells = data["sells"]
-        
-        # Match sells with buys (FIFO)
-        for sell_price in sells:
-            if buys:
-                buy_price = buys.pop(0)
-                if sell_price > buy_price:
-                    profitable += 1
-                elif sell_price < buy_price:
-                    losing += 1
-    
-    total_profit = total_sold - total_bought
-    net_profit = total_profit - total_fees
-    
-    return PnLStats(
-        total_bought=total_bought,
-        total_sold=total_sold,
-        total_profit=total_profit,
-        total_fees=total_fees,
-        net_profit=net_profit,
-        transaction_count=len(transactions),
-        profitable_trades=profitable,
-        losing_trades=losing
-    )
+
+    int_user_id = get_user_int_id(user_id, db)
+    etag = pnl_series.etag(db, int_user_id, interval, start, end)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return pnl_series.get(db, int_user_id, interval, start, end, etag)
 
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
@@ -237,6 +380,8 @@ async def delete_transaction(
         raise HTTPException(status_code=404, detail="Transaction not found")
     
     db.delete(transaction)
+    db.flush()
+    rebuild_items(db, user_id, [transaction.item_name])
     db.commit()
     
     return {"message": "Transaction deleted successfully"}
@@ -249,42 +394,8 @@ async def get_items_summary(
 ):
     """
     Get P&L summary per item
+
+    Besides the buy/sell totals, each item carries its FIFO-matched realized
+    P&L, average holding time and open lots.
     """
-    transactions = db.query(Trade).filter(Trade.user_id == user_id).all()
-    
-    item_summary = {}
-    
-    for trade in transactions:
-        item = trade.item_name
-        if item not in item_summary:
-            item_summary[item] = {
-                "item_name": item,
-                "total_bought": 0,
-                "total_sold": 0,
-                "buy_count": 0,
-                "sell_count": 0,
-                "pnl": 0,
-                "avg_buy_price": 0,
-                "avg_sell_price": 0
-            }
-        
-        if trade.trade_type == "BUY":
-            item_summary[item]["total_bought"] += trade.price
-            item_summary[item]["buy_count"] += 1
-        else:
-            item_summary[item]["total_sold"] += trade.price
-            item_summary[item]["sell_count"] += 1
-    
-    # Calculate averages and P&L
-    for item, data in item_summary.items():
-        if data["buy_count"] > 0:
-            data["avg_buy_price"] = data["total_bought"] / data["buy_count"]
-        if data["sell_count"] > 0:
-            data["avg_sell_price"] = data["total_sold"] / data["sell_count"]
-        
-        data["pnl"] = data["total_sold"] - data["total_bought"]
-    
-    # Sort by P&L descending
-    sorted_items = sorted(item_summary.values(), key=lambda x: x["pnl"], reverse=True)
-    
-    return sorted_items
+    return items_summary(db, user_id)
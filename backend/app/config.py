@@ -25,10 +25,71 @@ class Settings(BaseSettings):
     # Rate Limiting
     max_requests_per_minute: int = 60
     rate_limit_enabled: bool = True
+    csfloat_requests_per_minute: int = 60
+    steam_market_requests_per_minute: int = 20  # all of steamcommunity.com
+    rate_limit_burst: int = 5  # tokens a host may spend back-to-back
+    rate_limit_max_wait: float = 5.0  # fail fast if Retry-After asks for longer
+    rate_limit_default_backoff: float = 30.0  # 429/503 without Retry-After
+    circuit_breaker_failure_threshold: int = 5  # consecutive failures to open
+    circuit_breaker_cooldown: float = 60.0  # seconds before a trial request
+    price_fetch_concurrency: int = 5  # max in-flight lookups per provider
+    price_hedge_enabled: bool = True  # race Steam against a slow CSFloat
+    price_hedge_percentile: float = 0.9  # CSFloat latency percentile to wait for
+    price_hedge_default_delay: float = 2.0  # until enough latency samples exist
+    price_hedge_min_delay: float = 0.3
     
     # Cache
     cache_enabled: bool = True
     cache_ttl: int = 300  # 5 minutes
+    price_cache_write_batch: int = 50  # fetched prices per upsert/commit
+    price_stale_max_age: int = 3600  # serve stale (and refresh) up to this age, then block
+    price_negative_ttl: int = 180  # how long "no provider lists this item" is trusted
+    price_memory_cache_max_entries: int = 10000
+    price_memory_cache_max_bytes: int = 8 * 1024 * 1024  # 8 MB
+    price_dump_chunk_size: int = 5000  # rows per transaction when loading a price dump
+    
+    # Price history
+    price_history_raw_days: int = 7  # raw points older than this become hourly buckets
+    price_history_hourly_days: int = 90  # hourly buckets older than this become daily
+    price_history_retention_interval: int = 3600  # seconds between retention runs
+    
+    # Bulk transaction create
+    bulk_transactions_chunk_size: int = 1000  # rows per INSERT + commit
+    bulk_transactions_max_rows: int = 50000  # rows past this are rejected per request
+    
+    # P&L series
+    pnl_series_default_days: int = 365  # range when no start is given
+    pnl_series_max_buckets: int = 1000  # e.g. ~2.7 years of daily buckets
+    pnl_series_cache_ttl: int = 600  # entries are keyed by data version, TTL only frees memory
+    pnl_series_cache_max_entries: int = 500
+    pnl_series_cache_max_bytes: int = 16 * 1024 * 1024  # 16 MB
+    
+    # Background price refresher
+    price_refresher_enabled: bool = False  # run inside the API process lifespan
+    price_refresher_requests_per_minute: int = 30  # share of provider budget
+    price_refresher_interval: int = 60  # seconds between refresh cycles
+    price_refresher_active_days: int = 30  # users with trades this recent are active
+    price_refresher_lease_seconds: int = 90
+    price_request_counts_flush_interval: int = 30  # seconds lookup counts are buffered per worker
+    
+    # Steam Market history import
+    market_history_page_size: int = 100  # Steam's max rows per render call
+    market_history_fetch_concurrency: int = 4  # pages in flight (still under the host limiter)
+    market_history_page_retries: int = 3
+    market_history_retry_backoff: float = 1.0  # seconds, doubled per retry
+    market_history_max_rows: int = 20000  # cap for "import everything"
+    market_parser_workers: int = 2  # threads parsing results_html off the event loop
+    import_job_stale_after: int = 300  # a "running" job not updated for this long was interrupted
+    import_job_poll_interval: float = 0.5  # seconds between progress checks of an SSE stream
+    market_archive_enabled: bool = False  # default for archiving raw pages of new imports
+    market_archive_compression: str = "zstd"  # "zstd" (needs zstandard) or "gzip"
+    
+    # Outbound HTTP (pooled per upstream host)
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry: float = 30.0  # seconds an idle connection is kept
+    http_timeout: float = 10.0
+    http2_enabled: bool = True  # used only if the `h2` package is installed
     
     class Config:
         env_file = ".env"
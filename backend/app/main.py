@@ -4,18 +4,42 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 from app.database import engine, Base
 from app.config import settings
-from app.api import auth, prices, transactions, import_history, test_runner
+from app.api import auth, prices, transactions, portfolio, import_history, test_runner, admin
+from app.services.http_client import http_clients
+from app.services.import_jobs import import_jobs
+from app.services.price_refresher import price_refresher
+from contextlib import asynccontextmanager
 import os
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """App startup/shutdown hooks"""
+    # Pooled outbound HTTP clients live for the whole app lifetime
+    app.state.http_clients = http_clients
+    
+    # Every worker may start the refresher; a DB lease elects one leader
+    if settings.price_refresher_enabled:
+        price_refresher.start()
+    
+    yield
+    
+    # Running imports are left "interrupted" and can be resumed
+    await import_jobs.shutdown()
+    await price_refresher.stop()
+    await http_clients.aclose()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.app_name,
     description="Track your CS2 P&L with transaction-based tracking",
     version="1.0.0",
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -25,14 +49,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],  # listing pagination, P&L series revalidation
 )
 
 # Include API routes (CORE ONLY)
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(transactions.router, prefix="/api/transactions", tags=["transactions"])
+app.include_router(portfolio.router, prefix="/api/portfolio", tags=["portfolio"])
 app.include_router(import_history.router, prefix="/api/import", tags=["import"])
 app.include_router(prices.router, prefix="/api/prices", tags=["prices"])
 app.include_router(test_runner.router, prefix="/api/test", tags=["testing"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 
 # Serve frontend static files
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Date, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, JSON, Date, Text, Boolean, LargeBinary, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -23,6 +23,13 @@ class User(Base):
 class Trade(Base):
     """Trade history model"""
     __tablename__ = "trades"
+    __table_args__ = (
+        # Keyset pagination of a user's trades, newest first (alembic 0009)
+        Index("ix_trades_user_time_id", "user_id", "timestamp", "id"),
+        Index("ix_trades_user_type_time_id", "user_id", "trade_type", "timestamp", "id"),
+        # Per-item, time-ordered scans for FIFO lot matching
+        Index("ix_trades_user_item_time", "user_id", "item_name", "timestamp", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -41,14 +48,184 @@ class Trade(Base):
     user = relationship("User", back_populates="trades")
 
 
+class ItemPnLSummary(Base):
+    """Per-user, per-item P&L and FIFO state, kept up to date on every trade write"""
+    __tablename__ = "item_pnl_summary"
+    __table_args__ = (UniqueConstraint("user_id", "item_name"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    item_name = Column(String(255), nullable=False)
+
+    buy_count = Column(Integer, default=0, nullable=False)
+    sell_count = Column(Integer, default=0, nullable=False)
+    total_bought = Column(Float, default=0.0, nullable=False)
+    total_sold = Column(Float, default=0.0, nullable=False)
+    total_fees = Column(Float, default=0.0, nullable=False)
+
+    # FIFO-matched sells
+    matched_count = Column(Integer, default=0, nullable=False)
+    realized_pnl = Column(Float, default=0.0, nullable=False)
+    realized_net_pnl = Column(Float, default=0.0, nullable=False)  # minus both legs' fees
+    profitable = Column(Integer, default=0, nullable=False)
+    losing = Column(Integer, default=0, nullable=False)
+    holding_seconds = Column(Float, default=0.0, nullable=False)
+    unmatched_sells = Column(Integer, default=0, nullable=False)  # sells with no earlier buy
+
+    # Open lots as JSON [[price, fee, iso timestamp], ...], oldest first
+    open_count = Column(Integer, default=0, nullable=False)
+    open_cost = Column(Float, default=0.0, nullable=False)
+    open_lots = Column(Text, default="[]", nullable=False)
+    # Newest trade applied; an older trade arriving means the item is rebuilt
+    last_timestamp = Column(DateTime)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# PriceCache.status values
+PRICE_OK = "ok"
+PRICE_NOT_LISTED = "not_listed"  # negative entry: no provider has a price
+
+
 class PriceCache(Base):
     """Price cache model for CSFloat/Steam prices"""
     __tablename__ = "price_cache"
     
     id = Column(Integer, primary_key=True, index=True)
     item_name = Column(String(255), unique=True, nullable=False, index=True)
-    price = Column(Float)
+    price = Column(Float)  # NULL for negative entries
+    status = Column(String(20), default=PRICE_OK, server_default=PRICE_OK, nullable=False)
     source = Column(String(50))  # "csfloat" or "steam"
     currency = Column(String(10), default="USD")
     cached_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PriceItem(Base):
+    """Compact integer key for an item name, used by the price history tables"""
+    __tablename__ = "price_items"
+    
+    id = Column(Integer, primary_key=True)
+    item_name = Column(String(255), unique=True, nullable=False)
+
+
+class PricePoint(Base):
+    """Append-only raw price observation (one per item per second at most)"""
+    __tablename__ = "price_points"
+    __table_args__ = {"sqlite_with_rowid": False}
+    
+    item_id = Column(Integer, primary_key=True, autoincrement=False)
+    ts = Column(Integer, primary_key=True, autoincrement=False)  # epoch seconds
+    price_cents = Column(Integer, nullable=False)
+
+
+class PriceRollup(Base):
+    """Downsampled price history bucket (hourly or daily)"""
+    __tablename__ = "price_rollups"
+    __table_args__ = {"sqlite_with_rowid": False}
+    
+    item_id = Column(Integer, primary_key=True, autoincrement=False)
+    resolution = Column(Integer, primary_key=True, autoincrement=False)  # bucket size in seconds
+    ts = Column(Integer, primary_key=True, autoincrement=False)  # bucket start, epoch seconds
+    min_cents = Column(Integer, nullable=False)
+    max_cents = Column(Integer, nullable=False)
+    sum_cents = Column(BigInteger, nullable=False)
+    samples = Column(Integer, nullable=False)
+
+
+class SchedulerLease(Base):
+    """Lease row electing a single leader for a background job across workers"""
+    __tablename__ = "scheduler_leases"
+    
+    name = Column(String(50), primary_key=True)  # e.g. "price_refresher"
+    holder = Column(String(255))  # "<host>:<pid>:<random>" of the current leader
+    expires_at = Column(DateTime, nullable=False)
+    paused = Column(Boolean, default=False, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PriceRequestCount(Base):
+    """Price lookups per item summed over all workers, to prioritise background refreshes"""
+    __tablename__ = "price_request_counts"
+    
+    item_name = Column(String(255), primary_key=True)
+    count = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class MarketSyncState(Base):
+    """Per-user high-water mark for incremental Steam Market history import"""
+    __tablename__ = "market_sync_state"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    last_row_id = Column(String(100))  # id of the newest imported history row
+    last_timestamp = Column(DateTime)  # its timestamp, fallback when ids don't match
+    last_synced_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# ImportJob.status values
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_INTERRUPTED = "interrupted"  # worker went away mid-run; resumable
+
+
+class ImportJob(Base):
+    """Background Steam Market history import and its progress"""
+    __tablename__ = "import_jobs"
+    
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String(20), default=JOB_PENDING, nullable=False)
+    error = Column(Text)
+    
+    # Request
+    count = Column(Integer)  # rows from the top of the history; NULL = all
+    full_sync = Column(Boolean, default=False, nullable=False)
+    archive = Column(Boolean, default=False, nullable=False)  # keep raw pages for reprocessing
+    
+    # High-water mark in effect for this job (kept so a resume uses the same one)
+    known_row_id = Column(String(100))
+    known_timestamp = Column(DateTime)
+    # Newest row seen, becomes the user's mark when the job completes
+    newest_row_id = Column(String(100))
+    newest_timestamp = Column(DateTime)
+    
+    # Progress; next_start is the offset of the first page not yet stored
+    next_start = Column(Integer, default=0, nullable=False)
+    total_count = Column(Integer)  # Steam's size of the whole history
+    pages_fetched = Column(Integer, default=0, nullable=False)
+    rows_parsed = Column(Integer, default=0, nullable=False)
+    imported = Column(Integer, default=0, nullable=False)
+    skipped = Column(Integer, default=0, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class MarketPageBlob(Base):
+    """Compressed raw results_html of a market history page, stored once per content hash"""
+    __tablename__ = "market_page_blobs"
+    
+    content_hash = Column(String(64), primary_key=True)  # sha256 of the UTF-8 HTML
+    encoding = Column(String(10), nullable=False)  # "zstd" or "gzip"
+    raw_size = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class MarketPageArchive(Base):
+    """A user's archived market history page (reference to its blob)"""
+    __tablename__ = "market_page_archive"
+    __table_args__ = (UniqueConstraint("user_id", "content_hash"),)
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    job_id = Column(String(32))  # import job that fetched it
+    start = Column(Integer, nullable=False)  # page offset when fetched
+    content_hash = Column(String(64), ForeignKey("market_page_blobs.content_hash"), nullable=False)
+    fetched_at = Column(DateTime, nullable=False)  # reference time for year-less dates
@@ -0,0 +1,173 @@
+"""
+Bulk creation of manual transactions
+
+Validated rows are buffered and written a chunk at a time: existing
+trade_ids are found with one chunked IN query, new rows go in with a bulk
+INSERT ... ON CONFLICT DO NOTHING and are applied to the P&L summary in the
+same transaction, which is then committed. A chunk that fails is rolled
+back and only its rows are reported as errors; earlier chunks stay.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import Trade
+from app.services.pnl_summary import record_trades
+from app.utils.db_helpers import bulk_insert_ignore, chunked
+
+logger = logging.getLogger(__name__)
+
+# Per-row result statuses
+ROW_CREATED = "created"
+ROW_DUPLICATE = "duplicate"  # trade_id already stored or repeated in the batch
+ROW_ERROR = "error"
+
+
+def manual_trade_id(user_id: int, item_name: str, timestamp: datetime) -> str:
+    """Deterministic trade_id of a manually entered transaction"""
+    return f"{user_id}_{item_name}_{int(timestamp.timestamp())}"
+
+
+def manual_net_amount(trade_type: str, price: float, fee: Optional[float]) -> float:
+    """Cash effect of a transaction: negative for buys, positive for sells"""
+    if trade_type == "BUY":
+        return -(price + (fee or 0))
+    return price - (fee or 0)
+
+
+class BulkTransactionWriter:
+    """
+    Collects per-row results while writing manual transactions in chunks
+
+    Rows are added as they are validated (add/error); call finish() once the
+    input is exhausted to write the last chunk and get the report.
+    """
+
+    def __init__(self, db: Session, user_id: int, chunk_size: Optional[int] = None):
+        self.db = db
+        self.user_id = user_id
+        self.chunk_size = chunk_size or settings.bulk_transactions_chunk_size
+        self.results: List[Dict] = []
+        self._pending: List[Tuple[int, Dict]] = []
+        self._seen = set()
+
+    def error(self, index: int, message: str):
+        """Record a row that could not be accepted"""
+        self.results.append({"index": index, "status": ROW_ERROR, "error": message})
+
+    def add(self, index: int, transaction: Dict):
+        """
+        Queue a validated row
+
+        Args:
+            index: Position of the row in the request
+            transaction: item_name, trade_type, price, fee and timestamp
+        """
+        trade_id = manual_trade_id(self.user_id, transaction["item_name"], transaction["timestamp"])
+        if trade_id in self._seen:
+            self.results.append({"index": index, "status": ROW_DUPLICATE, "trade_id": trade_id})
+            return
+        self._seen.add(trade_id)
+
+        fee = transaction.get("fee") or 0
+        self._pending.append((index, {
+            "user_id": self.user_id,
+            "trade_id": trade_id,
+            "trade_type": transaction["trade_type"],
+            "item_name": transaction["item_name"],
+            "item_asset_id": None,
+            "price": transaction["price"],
+            "fee": fee,
+            "net_amount": manual_net_amount(transaction["trade_type"], transaction["price"], fee),
+            "source": "manual",
+            "timestamp": transaction["timestamp"]
+        }))
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write and commit the queued rows"""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        try:
+            results = self._write(pending)
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"Bulk insert of {len(pending)} transactions for user {self.user_id} failed: {e}")
+            results = [
+                {"index": index, "status": ROW_ERROR, "error": "Database error, row not stored"}
+                for index, _ in pending
+            ]
+        self.results.extend(results)
+
+    def _write(self, pending: List[Tuple[int, Dict]]) -> List[Dict]:
+        trade_ids = [row["trade_id"] for _, row in pending]
+        existing = set()
+        for chunk in chunked(trade_ids):
+            existing.update(
+                trade_id for (trade_id,) in self.db.query(Trade.trade_id).filter(Trade.trade_id.in_(chunk))
+            )
+
+        now = datetime.utcnow()
+        new = []
+        for _, row in pending:
+            if row["trade_id"] not in existing:
+                row["created_at"] = now
+                new.append(row)
+        bulk_insert_ignore(self.db, Trade, new)
+
+        # Ids, and timestamps as stored, of the rows this chunk inserted
+        stored = {}
+        for chunk in chunked([row["trade_id"] for row in new]):
+            stored.update(
+                (trade_id, (trade_pk, timestamp))
+                for trade_pk, trade_id, timestamp in self.db.query(
+                    Trade.id, Trade.trade_id, Trade.timestamp
+                ).filter(Trade.trade_id.in_(chunk), Trade.user_id == self.user_id, Trade.created_at == now)
+            )
+
+        record_trades(self.db, self.user_id, sorted(
+            (
+                {**row, "id": stored[row["trade_id"]][0], "timestamp": stored[row["trade_id"]][1]}
+                for row in new if row["trade_id"] in stored
+            ),
+            key=lambda row: row["id"]
+        ))
+
+        results = []
+        for index, row in pending:
+            if row["trade_id"] in stored:
+                results.append({
+                    "index": index, "status": ROW_CREATED, "id": stored[row["trade_id"]][0], "trade_id": row["trade_id"]
+                })
+            else:
+                # Stored before, or by a concurrent request between our check and insert
+                results.append({"index": index, "status": ROW_DUPLICATE, "trade_id": row["trade_id"]})
+        return results
+
+    def finish(self) -> Dict:
+        """
+        Write what is left and report
+
+        Returns:
+            Dict with created/duplicates/errors counts and `results`, one
+            per row in request order
+        """
+        self.flush()
+        self.results.sort(key=lambda result: result["index"])
+
+        counts = {ROW_CREATED: 0, ROW_DUPLICATE: 0, ROW_ERROR: 0}
+        for result in self.results:
+            counts[result["status"]] += 1
+
+        return {
+            "created": counts[ROW_CREATED],
+            "duplicates": counts[ROW_DUPLICATE],
+            "errors": counts[ROW_ERROR],
+            "results": self.results
+        }
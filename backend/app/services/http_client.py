@@ -0,0 +1,141 @@
+import httpx
+from typing import Dict
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from urllib.parse import urlsplit
+from app.config import settings
+from app.services.rate_limiter import OutboundLimiter, outbound_limiter
+import logging
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class LimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Transport that routes every request through the outbound host limiter
+
+    Waits for the host's token bucket, refuses calls while its circuit is
+    open or a Retry-After is pending, and reports each outcome back.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, limiter: OutboundLimiter):
+        self._inner = inner
+        self._limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host_limiter = self._limiter.get(request.url.host)
+        trial = await host_limiter.acquire()
+
+        try:
+            response = await self._inner.handle_async_request(request)
+        except Exception:
+            host_limiter.record_error()
+            raise
+        except BaseException:
+            # Cancelled (e.g. the losing side of a hedged lookup): says
+            # nothing about the host, and must not keep the breaker trial
+            host_limiter.release(trial)
+            raise
+
+        host_limiter.record_response(response.status_code, response.headers.get("Retry-After"))
+        return response
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+class HTTPClientRegistry:
+    """
+    Application-lifetime registry of pooled httpx clients, one per upstream host
+
+    Every outbound Steam/CSFloat call goes through here so TCP+TLS connections
+    are reused across requests instead of being re-established per call, and
+    so every call passes the shared per-host rate limiter / circuit breaker.
+    Clients are created lazily on first use and closed on app shutdown.
+    """
+
+    def __init__(self, limiter: OutboundLimiter = outbound_limiter):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._limiter = limiter
+
+    def _host_key(self, url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry
+        )
+
+        # Shared clients must never carry one user's Steam cookies into
+        # another user's request, so the cookie jar refuses to store anything.
+        # Callers pass cookies explicitly per request via the Cookie header.
+        jar = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+        transport = httpx.AsyncHTTPTransport(
+            limits=limits,
+            http2=settings.http2_enabled and HTTP2_AVAILABLE
+        )
+
+        return httpx.AsyncClient(
+            transport=LimitedTransport(transport, self._limiter),
+            timeout=settings.http_timeout,
+            cookies=jar
+        )
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        """
+        Get the pooled client for the host of `url`
+
+        Args:
+            url: Any URL on the target host
+
+        Returns:
+            Shared AsyncClient for that host
+        """
+        key = self._host_key(url)
+        client = self._clients.get(key)
+
+        if client is None or client.is_closed:
+            client = self._build_client()
+            self._clients[key] = client
+            logger.debug(f"Created pooled HTTP client for {key}")
+
+        return client
+
+    def stats(self) -> Dict:
+        """Return open hosts and pool configuration"""
+        return {
+            "hosts": sorted(k for k, c in self._clients.items() if not c.is_closed),
+            "http2": settings.http2_enabled and HTTP2_AVAILABLE,
+            "max_connections": settings.http_max_connections,
+            "max_keepalive_connections": settings.http_max_keepalive_connections,
+            "keepalive_expiry": settings.http_keepalive_expiry
+        }
+
+    async def aclose(self):
+        """Close every pooled client (called on app shutdown)"""
+        for key, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client for {key}: {e}")
+
+        self._clients.clear()
+
+
+def cookie_header(cookies: Dict[str, str]) -> str:
+    """Serialize a cookie dict into a Cookie header value"""
+    return "; ".join(f"{name}={value}" for name, value in cookies.items())
+
+
+# Global registry instance
+http_clients = HTTPClientRegistry()
@@ -0,0 +1,233 @@
+import asyncio
+import uuid
+from contextlib import aclosing
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import logging
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import (
+    ImportJob, MarketSyncState,
+    JOB_PENDING, JOB_RUNNING, JOB_COMPLETED, JOB_FAILED, JOB_INTERRUPTED
+)
+from app.services.market_archive import market_archive
+from app.services.market_import import advance_high_water_mark, store_market_transactions
+from app.services.steam_market import MarketHistoryError, SteamMarketService
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (JOB_PENDING, JOB_RUNNING)
+FINISHED_STATUSES = (JOB_COMPLETED, JOB_FAILED, JOB_INTERRUPTED)
+RESUMABLE_STATUSES = (JOB_FAILED, JOB_INTERRUPTED)
+
+
+def job_to_dict(job: ImportJob) -> Dict:
+    """Public view of a job's state and progress"""
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "error": job.error,
+        "incremental": job.known_row_id is not None or job.known_timestamp is not None,
+        "total_count": job.total_count,
+        "next_start": job.next_start,
+        "pages_fetched": job.pages_fetched,
+        "rows_parsed": job.rows_parsed,
+        "imported": job.imported,
+        "skipped": job.skipped,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None
+    }
+
+
+class ImportJobManager:
+    """
+    Runs Steam Market history imports as background tasks
+
+    Each fetched page is stored in the same transaction as the job's
+    progress (next_start, counters), so a job that fails or whose worker
+    dies can be resumed from the first page it hadn't stored. Cookies are
+    only held in memory by the running task and never written to the
+    database; resuming needs them again.
+    """
+
+    def __init__(self):
+        self.steam_market = SteamMarketService()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    # ---- lookup ------------------------------------------------------------
+
+    def get(self, db: Session, job_id: str) -> Optional[ImportJob]:
+        """Load a job, marking it interrupted if its worker stopped updating it"""
+        job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+        if job is not None:
+            self._check_stale(db, job)
+        return job
+
+    def active_job(self, db: Session, user_id: int) -> Optional[ImportJob]:
+        """The user's pending or running job, if any"""
+        job = db.query(ImportJob).filter(
+            ImportJob.user_id == user_id,
+            ImportJob.status.in_(ACTIVE_STATUSES)
+        ).order_by(ImportJob.created_at.desc()).first()
+
+        if job is not None and self._check_stale(db, job):
+            return None
+        return job
+
+    def _check_stale(self, db: Session, job: ImportJob) -> bool:
+        if job.status not in ACTIVE_STATUSES or job.id in self._tasks:
+            return False
+
+        # Possibly running in another worker; only give up on it once it
+        # has stopped reporting progress
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.import_job_stale_after)
+        if (job.updated_at or job.created_at) > stale_before:
+            return False
+
+        job.status = JOB_INTERRUPTED
+        job.error = "Import stopped unexpectedly; resume it to continue"
+        db.commit()
+        return True
+
+    # ---- control -----------------------------------------------------------
+
+    def create(
+        self,
+        db: Session,
+        user_id: int,
+        count: Optional[int],
+        full_sync: bool,
+        archive: Optional[bool] = None
+    ) -> ImportJob:
+        """Record a new job, pinning the high-water mark it imports up to"""
+        sync_state = db.query(MarketSyncState).filter(MarketSyncState.user_id == user_id).first()
+        incremental = sync_state is not None and not full_sync
+
+        job = ImportJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            status=JOB_PENDING,
+            count=count,
+            full_sync=full_sync,
+            archive=settings.market_archive_enabled if archive is None else archive,
+            known_row_id=sync_state.last_row_id if incremental else None,
+            known_timestamp=sync_state.last_timestamp if incremental else None
+        )
+        db.add(job)
+        db.commit()
+        return job
+
+    def start(self, db: Session, job: ImportJob, cookies: str):
+        """Run (or resume) a job in the background on the current loop"""
+        job.status = JOB_PENDING
+        job.error = None
+        job.finished_at = None
+        db.commit()
+
+        job_id = job.id
+        task = asyncio.create_task(self.run(job_id, cookies))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def shutdown(self):
+        """Cancel running jobs; they are left interrupted and resumable"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ---- work --------------------------------------------------------------
+
+    async def run(self, job_id: str, cookies: str):
+        """Fetch, parse and store pages from job.next_start on"""
+        db = SessionLocal()
+        try:
+            job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+            job.status = JOB_RUNNING
+            job.started_at = job.started_at or datetime.utcnow()
+            db.commit()
+
+            logger.info(f"Import job {job_id} for user {job.user_id} running from offset {job.next_start}")
+
+            pages = self.steam_market.iter_history_pages(
+                self.steam_market._parse_cookies(cookies),
+                start=job.next_start,
+                count=job.count,
+                known_row_id=job.known_row_id,
+                known_timestamp=job.known_timestamp
+            )
+            complete = False
+
+            async with aclosing(pages):
+                async for page in pages:
+                    imported, skipped = store_market_transactions(db, job.user_id, page["transactions"])
+                    if job.archive:
+                        market_archive.store_page(db, job.user_id, page["html"], page["start"], job_id=job.id)
+
+                    if job.newest_timestamp is None and page["transactions"]:
+                        newest = page["transactions"][0]
+                        job.newest_row_id = newest.get("row_id")
+                        job.newest_timestamp = newest["timestamp"]
+
+                    job.total_count = page["total_count"] or job.total_count
+                    job.next_start = page["start"] + page["count"]
+                    job.pages_fetched += 1
+                    job.rows_parsed += page["rows"]
+                    job.imported += imported
+                    job.skipped += skipped
+                    complete = page["complete"]
+
+                    if page["last"]:
+                        self._finish(db, job, complete)
+
+                    # Trades and progress land together: resuming never
+                    # double-counts or skips a page
+                    db.commit()
+
+            if job.status != JOB_COMPLETED:
+                # Nothing left to fetch (resumed at/after the end)
+                self._finish(db, job, complete)
+                db.commit()
+
+            logger.info(
+                f"Import job {job_id} complete: {job.imported} imported, {job.skipped} skipped "
+                f"in {job.pages_fetched} pages"
+            )
+
+        except asyncio.CancelledError:
+            db.rollback()
+            self._mark(db, job_id, JOB_INTERRUPTED, "Import was stopped; resume it to continue")
+            raise
+        except MarketHistoryError as e:
+            db.rollback()
+            self._mark(db, job_id, JOB_FAILED, f"{e}. Check your cookies and resume the import.")
+        except Exception as e:
+            logger.error(f"Import job {job_id} failed: {e}")
+            db.rollback()
+            self._mark(db, job_id, JOB_FAILED, str(e))
+        finally:
+            db.close()
+
+    def _finish(self, db: Session, job: ImportJob, complete: bool):
+        advance_high_water_mark(db, job.user_id, job.newest_row_id, job.newest_timestamp, complete)
+        job.status = JOB_COMPLETED
+        job.finished_at = datetime.utcnow()
+
+    def _mark(self, db: Session, job_id: str, status: str, error: str):
+        logger.warning(f"Import job {job_id} {status}: {error}")
+        try:
+            db.query(ImportJob).filter(ImportJob.id == job_id).update(
+                {"status": status, "error": error, "finished_at": datetime.utcnow(), "updated_at": datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            logger.error(f"Could not record import job {job_id} state: {e}")
+            db.rollback()
+
+
+# Global job manager instance
+import_jobs = ImportJobManager()
@@ -0,0 +1,182 @@
+"""
+FIFO lot matching
+
+Every BUY opens a one-unit lot of its item; every SELL closes the oldest
+open lot of the same item. Trades must be fed in (timestamp, id) order per
+item, so a sell is only ever matched with a buy that happened before it.
+Open lots are kept in a deque per item, making matching O(1) per trade and
+linear overall.
+"""
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (trade_id, price, fee, timestamp) of a buy that hasn't been sold yet
+OpenLot = Tuple[int, float, float, datetime]
+
+
+def _new_item(item_name: str) -> Dict:
+    return {
+        "item_name": item_name,
+        "buy_count": 0,
+        "sell_count": 0,
+        "total_bought": 0.0,
+        "total_sold": 0.0,
+        "total_fees": 0.0,
+        "matched_count": 0,
+        "realized_pnl": 0.0,
+        "realized_net_pnl": 0.0,
+        "profitable": 0,
+        "losing": 0,
+        "holding_seconds": 0.0,
+        "unmatched_sells": 0,
+        "last_timestamp": None
+    }
+
+
+class LotMatcher:
+    """
+    Matches sells to earlier buys FIFO, per item
+
+    Per-item counters (totals, fees, realized P&L gross and net of both
+    legs' fees, wins/losses, summed holding time, sells with no open lot)
+    are kept as trades are added. Individual matched lots are only kept
+    when asked for, since heavy traders have hundreds of thousands.
+    """
+
+    def __init__(self, keep_matches: bool = False):
+        self.items: Dict[str, Dict] = {}
+        self.matches: List[Dict] = []
+        self._open: Dict[str, Deque[OpenLot]] = {}
+        self._keep_matches = keep_matches
+
+    def load_item(self, item_name: str, state: Dict, open_lots: Iterable[OpenLot]):
+        """
+        Resume an item from saved counters (an item_summary) and open lots
+
+        Trades added afterwards must not be older than state["last_timestamp"].
+        """
+        item = _new_item(item_name)
+        for key in item:
+            if key in state:
+                item[key] = state[key]
+        self.items[item_name] = item
+        self._open[item_name] = deque(open_lots)
+
+    def add(
+        self,
+        trade_id: int,
+        item_name: str,
+        trade_type: str,
+        price: Optional[float],
+        fee: Optional[float],
+        timestamp: datetime
+    ):
+        """
+        Process one trade
+
+        A SELL that closes a lot is appended to `matches` when the matcher
+        keeps them.
+
+        Raises:
+            ValueError: If the trade is older than the item's previous trade
+        """
+        item = self.items.get(item_name)
+        if item is None:
+            item = self.items[item_name] = _new_item(item_name)
+            self._open[item_name] = deque()
+
+        if item["last_timestamp"] is not None and timestamp < item["last_timestamp"]:
+            raise ValueError(f"Trades of {item_name!r} must be added in timestamp order")
+        item["last_timestamp"] = timestamp
+
+        price = price or 0.0
+        fee = fee or 0.0
+        item["total_fees"] += fee
+
+        if trade_type == "BUY":
+            item["buy_count"] += 1
+            item["total_bought"] += price
+            self._open[item_name].append((trade_id, price, fee, timestamp))
+            return
+
+        item["sell_count"] += 1
+        item["total_sold"] += price
+
+        lots = self._open[item_name]
+        if not lots:
+            # Sold something never bought here (e.g. an unboxed or traded-in item)
+            item["unmatched_sells"] += 1
+            return
+
+        buy_id, buy_price, buy_fee, bought_at = lots.popleft()
+        pnl = price - buy_price
+        holding_seconds = (timestamp - bought_at).total_seconds()
+
+        item["matched_count"] += 1
+        item["realized_pnl"] += pnl
+        item["realized_net_pnl"] += pnl - fee - buy_fee
+        item["holding_seconds"] += holding_seconds
+        if pnl > 0:
+            item["profitable"] += 1
+        elif pnl < 0:
+            item["losing"] += 1
+
+        if self._keep_matches:
+            self.matches.append({
+                "item_name": item_name,
+                "buy_trade_id": buy_id,
+                "sell_trade_id": trade_id,
+                "buy_price": buy_price,
+                "sell_price": price,
+                "pnl": pnl,
+                "net_pnl": pnl - fee - buy_fee,
+                "bought_at": bought_at,
+                "sold_at": timestamp,
+                "holding_seconds": holding_seconds
+            })
+
+    def add_all(self, trades: Iterable[Tuple]) -> "LotMatcher":
+        """Add (id, item_name, trade_type, price, fee, timestamp) tuples in order"""
+        for trade in trades:
+            self.add(*trade)
+        return self
+
+    def open_lots(self, item_name: str) -> List[OpenLot]:
+        """Unsold buys of an item, oldest first"""
+        return list(self._open.get(item_name, ()))
+
+    def item_summary(self, item_name: str) -> Dict:
+        """Counters of one item plus its open position and average holding time"""
+        item = self.items[item_name]
+        lots = self._open[item_name]
+        summary = dict(item)
+        summary["open_lots"] = len(lots)
+        summary["open_cost"] = sum(lot[1] for lot in lots)
+        summary["avg_holding_days"] = (
+            item["holding_seconds"] / item["matched_count"] / 86400 if item["matched_count"] else None
+        )
+        return summary
+
+    def totals(self) -> Dict:
+        """Matched-lot counters summed over all items"""
+        totals = {"matched_count": 0, "profitable": 0, "losing": 0, "realized_pnl": 0.0,
+                  "realized_net_pnl": 0.0, "unmatched_sells": 0, "open_lots": 0}
+        for item_name, item in self.items.items():
+            for key in ("matched_count", "profitable", "losing", "realized_pnl",
+                        "realized_net_pnl", "unmatched_sells"):
+                totals[key] += item[key]
+            totals["open_lots"] += len(self._open[item_name])
+        return totals
+
+
+def match_trades(trades: Iterable[Tuple], keep_matches: bool = False) -> LotMatcher:
+    """
+    Run the matcher over (id, item_name, trade_type, price, fee, timestamp) tuples
+
+    The trades are sorted by (timestamp, id) first, so any order is accepted.
+    """
+    return LotMatcher(keep_matches).add_all(sorted(trades, key=lambda trade: (trade[5], trade[0])))
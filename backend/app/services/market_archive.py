@@ -0,0 +1,197 @@
+import gzip
+import hashlib
+import time
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+import logging
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import MarketPageArchive, MarketPageBlob, Trade
+from app.services.market_import import store_market_transactions
+from app.services.market_parser import parse_market_html
+from app.services.pnl_summary import rebuild_user
+from app.utils.db_helpers import bulk_insert_ignore, chunked
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def compress(raw: bytes) -> Tuple[str, bytes]:
+    """Compress with zstd when available (and configured), gzip otherwise"""
+    if settings.market_archive_compression == "zstd" and ZSTD_AVAILABLE:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(raw)
+    return "gzip", gzip.compress(raw, compresslevel=6)
+
+
+def decompress(encoding: str, data: bytes) -> bytes:
+    if encoding == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Archived page is zstd-compressed; install the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class MarketArchiveService:
+    """
+    Archive of raw market history pages, for reparsing without Steam
+
+    Each page's results_html is stored compressed in market_page_blobs under
+    its sha256, so identical pages (the same history fetched again, or an
+    unchanged tail on every full sync) are kept once. market_page_archive
+    links users to the blobs with the time they were fetched, which is the
+    reference for Steam's year-less dates when reparsing.
+    """
+
+    def store_page(
+        self,
+        db: Session,
+        user_id: int,
+        html: str,
+        start: int,
+        job_id: Optional[str] = None,
+        fetched_at: Optional[datetime] = None
+    ) -> Optional[str]:
+        """
+        Archive one page; does not commit
+
+        Returns:
+            The page's content hash, or None for an empty page
+        """
+        if not html:
+            return None
+
+        raw = html.encode("utf-8")
+        content_hash = hashlib.sha256(raw).hexdigest()
+
+        if not db.query(MarketPageBlob.content_hash).filter(
+            MarketPageBlob.content_hash == content_hash
+        ).first():
+            encoding, data = compress(raw)
+            bulk_insert_ignore(db, MarketPageBlob, [{
+                "content_hash": content_hash,
+                "encoding": encoding,
+                "raw_size": len(raw),
+                "data": data,
+                "created_at": datetime.utcnow()
+            }])
+
+        if not db.query(MarketPageArchive.id).filter(
+            MarketPageArchive.user_id == user_id,
+            MarketPageArchive.content_hash == content_hash
+        ).first():
+            bulk_insert_ignore(db, MarketPageArchive, [{
+                "user_id": user_id,
+                "job_id": job_id,
+                "start": start,
+                "content_hash": content_hash,
+                "fetched_at": fetched_at or datetime.utcnow()
+            }])
+
+        return content_hash
+
+    def iter_pages(self, db: Session, user_id: int) -> Iterator[Tuple[datetime, str]]:
+        """
+        A user's archived pages as (fetched_at, html), newest fetch first
+
+        Blobs are loaded in chunks, so the whole archive is never in memory.
+        """
+        refs = db.query(
+            MarketPageArchive.content_hash, MarketPageArchive.fetched_at
+        ).filter(
+            MarketPageArchive.user_id == user_id
+        ).order_by(
+            MarketPageArchive.fetched_at.desc(), MarketPageArchive.start
+        ).all()
+
+        for chunk in chunked(refs, 50):
+            blobs = {
+                blob.content_hash: blob
+                for blob in db.query(MarketPageBlob).filter(
+                    MarketPageBlob.content_hash.in_([ref.content_hash for ref in chunk])
+                )
+            }
+            for ref in chunk:
+                blob = blobs[ref.content_hash]
+                yield ref.fetched_at, decompress(blob.encoding, blob.data).decode("utf-8")
+            db.expunge_all()
+
+    def stats(self, db: Session, user_id: int) -> Dict:
+        """Page count and stored/raw sizes of a user's archive"""
+        pages, raw_bytes, stored_bytes = db.query(
+            func.count(MarketPageArchive.id),
+            func.coalesce(func.sum(MarketPageBlob.raw_size), 0),
+            func.coalesce(func.sum(func.length(MarketPageBlob.data)), 0)
+        ).join(
+            MarketPageBlob, MarketPageArchive.content_hash == MarketPageBlob.content_hash
+        ).filter(MarketPageArchive.user_id == user_id).one()
+
+        return {"pages": pages, "raw_bytes": raw_bytes, "stored_bytes": stored_bytes}
+
+    def reprocess_user(self, db: Session, user_id: int, dry_run: bool = False) -> Dict:
+        """
+        Rebuild a user's Steam Market trades from archived pages only
+
+        Deletes the user's source="steam_market" trades and re-imports every
+        archived page with the current parser, then rebuilds the user's P&L
+        summary, all in one transaction. Trades imported before archiving was
+        enabled are only recreated if their pages are in the archive. With
+        dry_run the transaction is rolled back and only the counts are
+        reported.
+
+        Returns:
+            Dict with pages, rows_parsed, deleted, imported, skipped, seconds
+            and rows_per_second
+        """
+        t0 = time.perf_counter()
+        pages = rows_parsed = imported = skipped = 0
+
+        try:
+            deleted = db.query(Trade).filter(
+                Trade.user_id == user_id,
+                Trade.source == "steam_market"
+            ).delete(synchronize_session=False)
+
+            for fetched_at, html in self.iter_pages(db, user_id):
+                transactions = parse_market_html(html, reference=fetched_at)
+                page_imported, page_skipped = store_market_transactions(
+                    db, user_id, transactions, update_summary=False
+                )
+                pages += 1
+                rows_parsed += len(transactions)
+                imported += page_imported
+                skipped += page_skipped
+
+            rebuild_user(db, user_id)
+
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        elapsed = time.perf_counter() - t0
+        report = {
+            "user_id": user_id,
+            "dry_run": dry_run,
+            "pages": pages,
+            "rows_parsed": rows_parsed,
+            "deleted": deleted,
+            "imported": imported,
+            "skipped": skipped,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows_parsed / elapsed) if elapsed > 0 else rows_parsed
+        }
+        logger.info(f"Reprocessed market archive: {report}")
+        return report
+
+
+# Global archive instance
+market_archive = MarketArchiveService()
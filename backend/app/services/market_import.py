@@ -0,0 +1,132 @@
+from typing import Dict, List, Optional, Tuple
+import logging
+from datetime import datetime
+from sqlalchemy.orm import Session
+from app.models import MarketSyncState, Trade
+from app.services.pnl_summary import record_trades
+from app.utils.db_helpers import bulk_insert_ignore, chunked
+
+logger = logging.getLogger(__name__)
+
+STEAM_MARKET_FEE = 0.05  # Steam Market takes 5% fee (auto-calculated)
+
+
+def market_trade_id(user_id: int, tx: Dict) -> str:
+    """Deterministic trade_id of an imported market row"""
+    return f"{user_id}_market_{tx['item_name']}_{int(tx['timestamp'].timestamp())}"
+
+
+def store_market_transactions(
+    db: Session,
+    user_id: int,
+    transactions: List[Dict],
+    update_summary: bool = True
+) -> Tuple[int, int]:
+    """
+    Insert parsed market history rows as trades, skipping ones already stored
+
+    Existing trade_ids are found with one chunked IN query and the new rows
+    are written with a bulk INSERT ... ON CONFLICT DO NOTHING. Rows that
+    repeat a trade_id within the same batch count as skipped. Does not
+    commit; the caller owns the transaction.
+
+    Args:
+        db: Database session
+        user_id: Integer user ID
+        transactions: Rows from SteamMarketService.fetch_market_history
+        update_summary: Apply the new trades to the user's P&L summary; pass
+                        False only when the caller rebuilds it afterwards
+
+    Returns:
+        (imported, skipped)
+    """
+    candidates = []
+    for tx in transactions:
+        try:
+            candidates.append((market_trade_id(user_id, tx), tx))
+        except Exception as e:
+            logger.error(f"Error importing transaction: {e}")
+
+    trade_ids = list({trade_id for trade_id, _ in candidates})
+    seen = set()
+    for chunk in chunked(trade_ids):
+        seen.update(
+            trade_id for (trade_id,) in db.query(Trade.trade_id).filter(Trade.trade_id.in_(chunk))
+        )
+
+    rows = []
+    skipped = 0
+    now = datetime.utcnow()
+
+    for trade_id, tx in candidates:
+        if trade_id in seen:
+            skipped += 1
+            continue
+
+        try:
+            # Calculate net amount
+            price = tx.get("price", 0)
+            fee = price * STEAM_MARKET_FEE
+
+            if tx["trade_type"] == "BUY":
+                net_amount = -(price + fee)
+            else:
+                net_amount = price - fee
+
+            rows.append({
+                "user_id": user_id,
+                "trade_id": trade_id,
+                "trade_type": tx["trade_type"],
+                "item_name": tx["item_name"],
+                "item_asset_id": None,
+                "price": price,
+                "fee": fee,
+                "net_amount": net_amount,
+                "source": "steam_market",  # Mark as Steam Market transaction
+                "timestamp": tx["timestamp"],
+                "created_at": now
+            })
+            seen.add(trade_id)
+
+        except Exception as e:
+            logger.error(f"Error importing transaction: {e}")
+            continue
+
+    bulk_insert_ignore(db, Trade, rows)
+    if update_summary:
+        record_trades(db, user_id, rows)
+
+    return len(rows), skipped
+
+
+def advance_high_water_mark(
+    db: Session,
+    user_id: int,
+    newest_row_id: Optional[str],
+    newest_timestamp: Optional[datetime],
+    complete: bool
+):
+    """
+    Move the user's high-water mark to the newest imported row
+
+    Only done when nothing between the imported rows and the previous mark
+    was left unfetched (a failed page or the `count` cap would otherwise
+    leave a gap that later incremental syncs skip forever). Does not commit.
+
+    Args:
+        db: Database session
+        user_id: Integer user ID
+        newest_row_id: row_id of the newest row seen by this import
+        newest_timestamp: Its timestamp
+        complete: Whether the import reached the previous mark or the end of history
+    """
+    state = db.query(MarketSyncState).filter(MarketSyncState.user_id == user_id).first()
+    if state is None:
+        state = MarketSyncState(user_id=user_id)
+        db.add(state)
+    state.last_synced_at = datetime.utcnow()
+
+    had_mark = state.last_row_id is not None or state.last_timestamp is not None
+    if newest_timestamp is not None and (complete or not had_mark):
+        state.last_row_id = newest_row_id
+        state.last_timestamp = newest_timestamp
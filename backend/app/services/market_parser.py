@@ -0,0 +1,211 @@
+"""
+Steam Market history HTML parser
+
+Parses the `results_html` of /market/myhistory/render/ with lxml and
+precompiled XPath, with a regex fast path for Steam's date formats that
+only falls back to dateutil for anything unrecognised. Output matches the
+original BeautifulSoup/html.parser implementation row for row.
+
+Parsing is CPU-bound, so async callers should use `parse_market_html_async`,
+which runs it on a small thread pool instead of the event loop.
+"""
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+from lxml import etree, html as lxml_html
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_ROWS = etree.XPath(f"//div[{_has_class('market_listing_row')}]")
+_ITEM_NAME = etree.XPath(f"(.//span[{_has_class('market_listing_item_name')}])[1]")
+_PRICE = etree.XPath(f"(.//span[{_has_class('market_listing_price')}])[1]")
+_DATE = etree.XPath(f"(.//div[{_has_class('market_listing_listed_date')}])[1]")
+_GAIN = etree.XPath(f"(.//div[{_has_class('market_listing_gainorloss')}])[1]")
+
+_MONTHS = {
+    name: number
+    for number, names in enumerate((
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+        ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+        ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december")
+    ), start=1)
+    for name in names
+}
+
+# "13 Feb", "13 Feb, 2024", "13 Feb 2024"
+_DAY_MONTH = re.compile(r"^(\d{1,2}) ([A-Za-z]+)(?:,? (\d{4}))?$")
+# "Feb 13", "Feb 13, 2024"
+_MONTH_DAY = re.compile(r"^([A-Za-z]+) (\d{1,2})(?:,? (\d{4}))?$")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def parse_price(price_text: str) -> float:
+    """
+    Parse price string to float
+
+    Examples: "$1.23", "Rp 15,000", "€2.50"
+    """
+    try:
+        # Remove currency symbols and commas
+        cleaned = price_text.replace('$', '').replace('€', '').replace('£', '')
+        cleaned = cleaned.replace('Rp', '').replace(',', '').strip()
+
+        return float(cleaned)
+    except ValueError:
+        return 0.0
+
+
+def _parse_date_slow(date_text: str, reference: Optional[datetime]) -> datetime:
+    # A row without a listed date gets the time it was fetched, as in the
+    # original parser (which used the current time); not the reference day
+    # at midnight, which is what dateutil would make of it given a default
+    if not date_text.strip():
+        return reference or datetime.utcnow()
+
+    try:
+        # Steam uses format like "13 Feb" or "13 Feb @ 4:39pm"
+        # For simplicity, use current year if year not specified
+        from dateutil import parser
+
+        if reference is None:
+            return parser.parse(date_text, fuzzy=True)
+        default = reference.replace(hour=0, minute=0, second=0, microsecond=0)
+        return parser.parse(date_text, fuzzy=True, default=default)
+    except Exception:
+        # Fallback to current datetime
+        return reference or datetime.utcnow()
+
+
+def parse_date(date_text: str, reference: Optional[datetime] = None) -> datetime:
+    """
+    Parse Steam date format to datetime
+
+    Known formats are matched directly; anything else goes through
+    dateutil's fuzzy parser, which also defines the result for the fast
+    path (missing year = current year, time = midnight). An empty or
+    unparseable date falls back to the reference, i.e. the current time.
+
+    Args:
+        date_text: Text of the listed-date cell
+        reference: "Now" for year-less dates (default: the current time);
+                   reparsing an archived page passes its fetch time
+
+    Examples: "13 Feb", "13 Feb, 2026"
+    """
+    match = _DAY_MONTH.match(date_text)
+    if match:
+        day, month, year = match.groups()
+    else:
+        match = _MONTH_DAY.match(date_text)
+        if not match:
+            return _parse_date_slow(date_text, reference)
+        month, day, year = match.groups()
+
+    month_number = _MONTHS.get(month.lower())
+    if month_number is None:
+        return _parse_date_slow(date_text, reference)
+
+    try:
+        return datetime(int(year) if year else (reference or datetime.now()).year, month_number, int(day))
+    except ValueError:
+        return _parse_date_slow(date_text, reference)
+
+
+def _text(elements: List) -> Optional[str]:
+    return elements[0].text_content().strip() if elements else None
+
+
+def parse_market_html(html: str, reference: Optional[datetime] = None) -> List[Dict]:
+    """
+    Parse Steam market history HTML to extract transactions
+
+    Args:
+        html: results_html of a market history render response
+        reference: When the page was fetched, for year-less dates (default: now)
+
+    Returns:
+        Transactions in page order (newest first)
+    """
+    return parse_market_page(html, reference)[0]
+
+
+def parse_market_page(html: str, reference: Optional[datetime] = None) -> Tuple[List[Dict], int]:
+    """
+    parse_market_html, plus how many history rows the page held
+
+    Rows that fail to parse are dropped from the transactions but still
+    counted, so a short page can be told apart from a page with bad rows.
+
+    Returns:
+        (transactions, number of row elements in the HTML)
+    """
+    transactions = []
+
+    if not html or not html.strip():
+        return transactions, 0
+
+    try:
+        root = lxml_html.document_fromstring(html)
+    except (etree.ParserError, ValueError) as e:
+        logger.error(f"Error parsing market HTML: {e}")
+        return transactions, 0
+
+    rows = _ROWS(root)
+    for row in rows:
+        try:
+            # Steam ids rows as "history_row_<listing>_<event>"; stable across pages
+            row_id = row.get('id')
+
+            item_name = _text(_ITEM_NAME(row)) or "Unknown"
+
+            price_text = _text(_PRICE(row))
+            price = parse_price(price_text if price_text is not None else "$0.00")
+
+            timestamp = parse_date(_text(_DATE(row)) or "", reference)
+
+            # Determine if it's a buy or sell
+            # (Steam shows "+" for bought, "-" for sold in the gain/loss column)
+            gain_text = _text(_GAIN(row))
+            is_purchase = gain_text is None or not gain_text.startswith('-')
+
+            transactions.append({
+                "row_id": row_id or f"{item_name}|{timestamp.isoformat()}|{price}",
+                "item_name": item_name,
+                "price": price,
+                "trade_type": "BUY" if is_purchase else "SELL",
+                "timestamp": timestamp,
+                "source": "steam_market"
+            })
+
+        except Exception as e:
+            logger.warning(f"Error parsing transaction row: {e}")
+            continue
+
+    return transactions, len(rows)
+
+
+async def parse_market_html_async(html: str) -> List[Dict]:
+    """parse_market_html on the parser thread pool, keeping the event loop free"""
+    return (await parse_market_page_async(html))[0]
+
+
+async def parse_market_page_async(html: str) -> Tuple[List[Dict], int]:
+    """parse_market_page on the parser thread pool, keeping the event loop free"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.market_parser_workers,
+            thread_name_prefix="market-parser"
+        )
+
+    return await asyncio.get_running_loop().run_in_executor(_executor, parse_market_page, html)
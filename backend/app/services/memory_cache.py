@@ -0,0 +1,109 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Rough per-entry bookkeeping cost (OrderedDict node + expiry tuple)
+ENTRY_OVERHEAD_BYTES = 120
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache with a per-entry TTL
+
+    Entries are evicted least-recently-used first whenever either the entry
+    count or the approximate memory footprint exceeds its cap. Expired entries
+    are dropped lazily on read. Not thread-safe; meant for use from the event
+    loop only.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _entry_size(self, key: Hashable, value: Any) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(value) + ENTRY_OVERHEAD_BYTES
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry"""
+        entry = self._data.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Store a value, evicting LRU entries to stay within the caps
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Seconds until expiry (defaults to the cache-wide TTL)
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        if key in self._data:
+            self._remove(key)
+
+        size = self._entry_size(key, value)
+        if size > self.max_bytes:
+            return
+
+        self._data[key] = (value, time.monotonic() + ttl, size)
+        self._bytes += size
+
+        while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key: Hashable):
+        """Drop a key if present"""
+        if key in self._data:
+            self._remove(key)
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        self._data.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Return size and hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
@@ -0,0 +1,92 @@
+"""
+Profit & loss statistics for the dashboard
+
+Both endpoints read the materialized item_pnl_summary (see pnl_summary),
+one row per traded item, instead of scanning the user's trades: totals are
+SUMs over those rows and the per-item view maps them directly.
+"""
+from typing import Dict, List
+import logging
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import ItemPnLSummary
+from app.services.pnl_summary import ensure_user
+
+logger = logging.getLogger(__name__)
+
+
+def compute_pnl(db: Session, user_id: int) -> Dict:
+    """
+    P&L statistics for a user, as returned by GET /api/transactions/pnl
+
+    Args:
+        db: Database session
+        user_id: Integer user ID
+
+    Returns:
+        Dict with the PnLStats fields
+    """
+    ensure_user(db, user_id)
+
+    total_bought, total_sold, total_fees, transaction_count, profitable, losing = db.query(
+        func.coalesce(func.sum(ItemPnLSummary.total_bought), 0.0),
+        func.coalesce(func.sum(ItemPnLSummary.total_sold), 0.0),
+        func.coalesce(func.sum(ItemPnLSummary.total_fees), 0.0),
+        func.coalesce(func.sum(ItemPnLSummary.buy_count + ItemPnLSummary.sell_count), 0),
+        func.coalesce(func.sum(ItemPnLSummary.profitable), 0),
+        func.coalesce(func.sum(ItemPnLSummary.losing), 0)
+    ).filter(ItemPnLSummary.user_id == user_id).one()
+
+    total_profit = total_sold - total_bought
+
+    return {
+        "total_bought": total_bought,
+        "total_sold": total_sold,
+        "total_profit": total_profit,
+        "total_fees": total_fees,
+        "net_profit": total_profit - total_fees,
+        "transaction_count": transaction_count,
+        "profitable_trades": profitable,
+        "losing_trades": losing
+    }
+
+
+def items_summary(db: Session, user_id: int) -> List[Dict]:
+    """
+    Per-item totals and FIFO-matched P&L, as returned by GET /items/summary
+
+    `pnl` stays total_sold - total_bought; `realized_pnl` only counts sells
+    matched with an earlier buy, and the unsold buys are reported as the
+    item's open lots.
+
+    Returns:
+        Item summaries sorted by pnl, highest first
+    """
+    ensure_user(db, user_id)
+
+    summaries = []
+    for row in db.query(ItemPnLSummary).filter(ItemPnLSummary.user_id == user_id):
+        summaries.append({
+            "item_name": row.item_name,
+            "total_bought": row.total_bought,
+            "total_sold": row.total_sold,
+            "buy_count": row.buy_count,
+            "sell_count": row.sell_count,
+            "pnl": row.total_sold - row.total_bought,
+            "avg_buy_price": row.total_bought / row.buy_count if row.buy_count else 0,
+            "avg_sell_price": row.total_sold / row.sell_count if row.sell_count else 0,
+            "total_fees": row.total_fees,
+            "matched_count": row.matched_count,
+            "realized_pnl": row.realized_pnl,
+            "realized_net_pnl": row.realized_net_pnl,
+            "profitable": row.profitable,
+            "losing": row.losing,
+            "unmatched_sells": row.unmatched_sells,
+            "avg_holding_days": row.holding_seconds / row.matched_count / 86400 if row.matched_count else None,
+            "open_lots": row.open_count,
+            "open_cost": row.open_cost,
+            "last_trade_at": row.last_timestamp
+        })
+
+    summaries.sort(key=lambda summary: summary["pnl"], reverse=True)
+    return summaries
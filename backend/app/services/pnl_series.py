@@ -0,0 +1,246 @@
+"""
+Time-bucketed P&L and cash-flow series
+
+Buy/sell volume, counts and fees are bucketed by day, week (ISO, starting
+Monday) or month with a GROUP BY in the database. Realized P&L comes from
+one streaming pass of the LotMatcher over the items sold in the range, with
+each matched lot booked to the bucket of its sell.
+
+A series only changes when the user's trades do, and every trade write
+touches item_pnl_summary, so (row count, newest updated_at) of the user's
+summary rows is a cheap data version. It keys both the in-process cache and
+the ETag, which lets clients revalidate with If-None-Match.
+"""
+import hashlib
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Tuple
+import logging
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import ItemPnLSummary, Trade
+from app.services.lot_matching import LotMatcher
+from app.services.memory_cache import TTLCache
+from app.services.pnl_summary import STREAM_BATCH_SIZE, ensure_user
+
+logger = logging.getLogger(__name__)
+
+INTERVALS = ("day", "week", "month")
+
+
+def bucket_start(day: date, interval: str) -> date:
+    """First day of the bucket containing `day`"""
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, interval: str) -> date:
+    """First day of the bucket after the one starting at `start`"""
+    if interval == "week":
+        return start + timedelta(days=7)
+    if interval == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_count(start: date, end: date, interval: str) -> int:
+    """Number of buckets covering start..end (inclusive)"""
+    if interval == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    if interval == "week":
+        return (bucket_start(end, "week") - bucket_start(start, "week")).days // 7 + 1
+    return (end - start).days + 1
+
+
+def _bucket_sql(db: Session, interval: str):
+    """Trade.timestamp truncated to its bucket, as a YYYY-MM-DD string"""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(func.date_trunc(interval, Trade.timestamp), "YYYY-MM-DD")
+
+    if interval == "week":
+        # Forward to Sunday (or stay on it), then back to that week's Monday
+        return func.date(Trade.timestamp, "weekday 0", "-6 days")
+    if interval == "month":
+        return func.strftime("%Y-%m-01", Trade.timestamp)
+    return func.strftime("%Y-%m-%d", Trade.timestamp)
+
+
+def _empty_bucket(period: str) -> Dict:
+    return {
+        "period": period,
+        "buy_volume": 0.0,
+        "sell_volume": 0.0,
+        "buy_count": 0,
+        "sell_count": 0,
+        "fees": 0.0,
+        "net_cash_flow": 0.0,
+        "realized_pnl": 0.0,
+        "realized_net_pnl": 0.0,
+        "matched_count": 0
+    }
+
+
+class PnLSeriesService:
+    """Builds and caches per-user P&L series"""
+
+    def __init__(self):
+        self._cache = TTLCache(
+            max_entries=settings.pnl_series_cache_max_entries,
+            max_bytes=settings.pnl_series_cache_max_bytes,
+            ttl=settings.pnl_series_cache_ttl
+        )
+
+    def etag(self, db: Session, user_id: int, interval: str, start: date, end: date) -> str:
+        """
+        Validator of a series: changes whenever the user's trades do
+
+        Builds the user's P&L summary first if they don't have one yet.
+        """
+        ensure_user(db, user_id)
+        rows, updated_at = db.query(
+            func.count(ItemPnLSummary.id), func.max(ItemPnLSummary.updated_at)
+        ).filter(ItemPnLSummary.user_id == user_id).one()
+
+        version = f"{user_id}|{interval}|{start}|{end}|{rows}|{updated_at}"
+        return f'W/"{hashlib.sha1(version.encode("utf-8")).hexdigest()[:24]}"'
+
+    def get(self, db: Session, user_id: int, interval: str, start: date, end: date, etag: str) -> Dict:
+        """
+        The series for start..end (inclusive dates), from cache when its etag still matches
+
+        Args:
+            db: Database session
+            user_id: Integer user ID
+            interval: "day", "week" or "month"
+            start: First day of the range
+            end: Last day of the range
+            etag: Result of etag() for the same arguments
+
+        Returns:
+            Dict with user_id, interval, start, end, buckets (one per
+            interval, oldest first, empty ones included) and totals
+        """
+        cached = self._cache.get(etag)
+        if cached is not None:
+            return cached
+
+        series = self.build(db, user_id, interval, start, end)
+        self._cache.set(etag, series)
+        return series
+
+    def build(self, db: Session, user_id: int, interval: str, start: date, end: date) -> Dict:
+        """Compute a series without the cache"""
+        range_start = datetime.combine(start, time.min)
+        range_end = datetime.combine(end + timedelta(days=1), time.min)
+
+        buckets: Dict[str, Dict] = {}
+        period = bucket_start(start, interval)
+        while period <= end:
+            buckets[period.isoformat()] = _empty_bucket(period.isoformat())
+            period = next_bucket(period, interval)
+
+        for period, row in self._volumes(db, user_id, interval, range_start, range_end):
+            buckets[period].update(row)
+
+        for period, realized in self._realized(db, user_id, interval, range_start, range_end):
+            buckets[period].update(realized)
+
+        totals = _empty_bucket(None)
+        del totals["period"]
+        for bucket in buckets.values():
+            bucket["net_cash_flow"] = bucket["sell_volume"] - bucket["buy_volume"] - bucket["fees"]
+            for key in totals:
+                totals[key] += bucket[key]
+
+        return {
+            "user_id": user_id,
+            "interval": interval,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "buckets": list(buckets.values()),
+            "totals": totals
+        }
+
+    def _volumes(
+        self, db: Session, user_id: int, interval: str, range_start: datetime, range_end: datetime
+    ) -> List[Tuple[str, Dict]]:
+        bucket = _bucket_sql(db, interval).label("bucket")
+        is_buy = Trade.trade_type == "BUY"
+
+        rows = db.query(
+            bucket,
+            func.coalesce(func.sum(case((is_buy, Trade.price), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case((is_buy, 0.0), else_=Trade.price)), 0.0),
+            func.sum(case((is_buy, 1), else_=0)),
+            func.sum(case((is_buy, 0), else_=1)),
+            func.coalesce(func.sum(func.coalesce(Trade.fee, 0.0)), 0.0)
+        ).filter(
+            Trade.user_id == user_id,
+            Trade.timestamp >= range_start,
+            Trade.timestamp < range_end
+        ).group_by(bucket).all()
+
+        return [
+            (period, {
+                "buy_volume": buy_volume,
+                "sell_volume": sell_volume,
+                "buy_count": buy_count,
+                "sell_count": sell_count,
+                "fees": fees
+            })
+            for period, buy_volume, sell_volume, buy_count, sell_count, fees in rows
+        ]
+
+    def _realized(
+        self, db: Session, user_id: int, interval: str, range_start: datetime, range_end: datetime
+    ) -> List[Tuple[str, Dict]]:
+        # Only items sold in the range matter, but their whole history up to
+        # the range end decides which lots those sells close
+        sold_in_range = db.query(Trade.item_name).filter(
+            Trade.user_id == user_id,
+            Trade.trade_type != "BUY",
+            Trade.timestamp >= range_start,
+            Trade.timestamp < range_end
+        ).distinct()
+
+        # IN never matches NULL; trades without an item name are one item too
+        sold = Trade.item_name.in_(sold_in_range)
+        if db.query(sold_in_range.filter(Trade.item_name.is_(None)).exists()).scalar():
+            sold = or_(sold, Trade.item_name.is_(None))
+
+        trades = db.query(
+            Trade.id, Trade.item_name, Trade.trade_type, Trade.price, Trade.fee, Trade.timestamp
+        ).filter(
+            Trade.user_id == user_id,
+            sold,
+            Trade.timestamp < range_end
+        ).order_by(Trade.item_name, Trade.timestamp, Trade.id).yield_per(STREAM_BATCH_SIZE)
+
+        realized: Dict[str, Dict] = {}
+        matcher = LotMatcher(keep_matches=True)
+
+        for trade in trades:
+            matcher.add(*trade)
+            if not matcher.matches:
+                continue
+
+            match = matcher.matches.pop()
+            if match["sold_at"] < range_start:
+                continue
+
+            period = bucket_start(match["sold_at"].date(), interval).isoformat()
+            bucket = realized.get(period)
+            if bucket is None:
+                bucket = realized[period] = {"realized_pnl": 0.0, "realized_net_pnl": 0.0, "matched_count": 0}
+            bucket["realized_pnl"] += match["pnl"]
+            bucket["realized_net_pnl"] += match["net_pnl"]
+            bucket["matched_count"] += 1
+
+        return list(realized.items())
+
+
+# Global series service instance
+pnl_series = PnLSeriesService()
@@ -0,0 +1,276 @@
+"""
+Materialized per-user, per-item P&L
+
+item_pnl_summary holds, for every item a user traded, the buy/sell
+counters and the FIFO lot-matching state (matched P&L and the open lots).
+Every write to trades updates it in the same transaction:
+
+- new trades at or after an item's last_timestamp are applied
+  incrementally on top of the stored state;
+- an older trade, or a deleted one, means that item is rebuilt from its
+  trades (only that item's, not the user's).
+
+So /pnl and /items/summary read one row per item instead of every trade.
+`check_user` compares the stored rows with a full recomputation.
+"""
+import json
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+import logging
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.models import ItemPnLSummary, Trade
+from app.services.lot_matching import LotMatcher
+from app.utils.db_helpers import bulk_upsert, chunked
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip when streaming trades
+STREAM_BATCH_SIZE = 10000
+
+# Counters copied between LotMatcher items and summary rows
+COUNTER_FIELDS = (
+    "buy_count", "sell_count", "total_bought", "total_sold", "total_fees",
+    "matched_count", "realized_pnl", "realized_net_pnl", "profitable", "losing",
+    "holding_seconds", "unmatched_sells", "last_timestamp"
+)
+
+STATE_FIELDS = COUNTER_FIELDS + ("open_count", "open_cost", "open_lots", "updated_at")
+
+
+def stream_trades(db: Session, user_id: int, item_names: Optional[Sequence[str]] = None):
+    """
+    A user's trades as (id, item_name, trade_type, price, fee, timestamp) tuples
+
+    Ordered by (item_name, timestamp, id), i.e. per item in the order the
+    LotMatcher needs, and fetched in batches rather than all at once.
+    """
+    query = db.query(
+        Trade.id, Trade.item_name, Trade.trade_type, Trade.price, Trade.fee, Trade.timestamp
+    ).filter(Trade.user_id == user_id)
+    if item_names is not None:
+        condition = Trade.item_name.in_(item_names)
+        if "" in item_names:
+            condition = or_(condition, Trade.item_name.is_(None))
+        query = query.filter(condition)
+
+    return query.order_by(Trade.item_name, Trade.timestamp, Trade.id).yield_per(STREAM_BATCH_SIZE)
+
+
+def _dump_lots(lots) -> str:
+    return json.dumps([[price, fee, timestamp.isoformat()] for _, price, fee, timestamp in lots])
+
+
+def _load_lots(open_lots: str) -> List:
+    return [(None, price, fee, datetime.fromisoformat(timestamp)) for price, fee, timestamp in json.loads(open_lots)]
+
+
+def _summary_row(user_id: int, matcher: LotMatcher, item_name: str, now: datetime) -> Dict:
+    item = matcher.items[item_name]
+    lots = matcher.open_lots(item_name)
+    row = {"user_id": user_id, "item_name": item_name}
+    row.update({field: item[field] for field in COUNTER_FIELDS})
+    row.update({
+        "open_count": len(lots),
+        "open_cost": sum(lot[1] for lot in lots),
+        "open_lots": _dump_lots(lots),
+        "updated_at": now
+    })
+    return row
+
+
+def _save(db: Session, user_id: int, matcher: LotMatcher, item_names: Iterable[str]):
+    now = datetime.utcnow()
+    rows = [_summary_row(user_id, matcher, item_name, now) for item_name in item_names]
+    bulk_upsert(db, ItemPnLSummary, rows, ["user_id", "item_name"], STATE_FIELDS)
+
+
+def _item_key(item_name: Optional[str]) -> str:
+    # Trades without an item name are summarized under ""
+    return item_name or ""
+
+
+def _has_summary(db: Session, user_id: int) -> bool:
+    return db.query(ItemPnLSummary.id).filter(ItemPnLSummary.user_id == user_id).first() is not None
+
+
+def rebuild_items(db: Session, user_id: int, item_names: Iterable[str]):
+    """
+    Recompute the summary rows of some of a user's items from their trades
+
+    Rows of items with no trades left are deleted. A user without a summary
+    yet gets all of it built instead. Does not commit; pending trade
+    changes must be flushed.
+    """
+    if not _has_summary(db, user_id):
+        rebuild_user(db, user_id)
+        return
+
+    item_names = list({_item_key(item_name) for item_name in item_names})
+
+    for chunk in chunked(item_names):
+        matcher = LotMatcher()
+        for trade_id, item_name, trade_type, price, fee, timestamp in stream_trades(db, user_id, chunk):
+            matcher.add(trade_id, _item_key(item_name), trade_type, price, fee, timestamp)
+
+        gone = [item_name for item_name in chunk if item_name not in matcher.items]
+        if gone:
+            db.query(ItemPnLSummary).filter(
+                ItemPnLSummary.user_id == user_id,
+                ItemPnLSummary.item_name.in_(gone)
+            ).delete(synchronize_session=False)
+        _save(db, user_id, matcher, matcher.items)
+
+
+def rebuild_user(db: Session, user_id: int) -> int:
+    """
+    Recompute all of a user's summary rows from the trades table
+
+    Does not commit.
+
+    Returns:
+        Number of items summarized
+    """
+    db.query(ItemPnLSummary).filter(ItemPnLSummary.user_id == user_id).delete(synchronize_session=False)
+
+    matcher = LotMatcher()
+    for trade_id, item_name, trade_type, price, fee, timestamp in stream_trades(db, user_id):
+        matcher.add(trade_id, _item_key(item_name), trade_type, price, fee, timestamp)
+
+    _save(db, user_id, matcher, matcher.items)
+    return len(matcher.items)
+
+
+def record_trades(db: Session, user_id: int, trades: List[Dict]):
+    """
+    Apply newly inserted trades to the user's summary
+
+    Args:
+        db: Database session (the trades must already be inserted/flushed)
+        user_id: Integer user ID
+        trades: Column dicts with item_name, trade_type, price, fee and
+                timestamp, in insertion (id) order
+
+    A user without a summary yet (never read, only written to) gets all of
+    it built from the trades table, which already holds `trades`; updating
+    just their items would leave the rest of the user's history out, and
+    ensure_user only backfills users with no rows at all.
+
+    Does not commit; the caller owns the transaction.
+    """
+    by_item = defaultdict(list)
+    for trade in trades:
+        by_item[_item_key(trade["item_name"])].append(trade)
+    if not by_item:
+        return
+
+    if not _has_summary(db, user_id):
+        rebuild_user(db, user_id)
+        return
+
+    stored = {}
+    for chunk in chunked(list(by_item)):
+        stored.update(
+            (summary.item_name, summary)
+            for summary in db.query(ItemPnLSummary).filter(
+                ItemPnLSummary.user_id == user_id,
+                ItemPnLSummary.item_name.in_(chunk)
+            ).with_for_update()
+        )
+
+    matcher = LotMatcher()
+    stale = []
+
+    for item_name, item_trades in by_item.items():
+        # Stable sort: same-timestamp trades keep their id order
+        item_trades.sort(key=lambda trade: trade["timestamp"])
+
+        summary = stored.get(item_name)
+        if summary is not None:
+            if summary.last_timestamp is not None and item_trades[0]["timestamp"] < summary.last_timestamp:
+                stale.append(item_name)
+                continue
+            matcher.load_item(
+                item_name,
+                {field: getattr(summary, field) for field in COUNTER_FIELDS},
+                _load_lots(summary.open_lots)
+            )
+
+        for trade in item_trades:
+            matcher.add(
+                None, item_name, trade["trade_type"], trade["price"], trade.get("fee"), trade["timestamp"]
+            )
+
+    # Written with core statements: keep the identity map from overwriting them
+    for summary in stored.values():
+        db.expunge(summary)
+
+    _save(db, user_id, matcher, matcher.items)
+    if stale:
+        rebuild_items(db, user_id, stale)
+
+
+def ensure_user(db: Session, user_id: int):
+    """Build a user's summary on first read if they have trades but no rows yet (backfill)"""
+    if _has_summary(db, user_id):
+        return
+    if not db.query(Trade.id).filter(Trade.user_id == user_id).first():
+        return
+
+    items = rebuild_user(db, user_id)
+    db.commit()
+    logger.info(f"Built P&L summary for user {user_id} ({items} items)")
+
+
+def _differs(stored, expected) -> bool:
+    if isinstance(stored, float) or isinstance(expected, float):
+        return not math.isclose(stored or 0.0, expected or 0.0, rel_tol=1e-9, abs_tol=1e-6)
+    return stored != expected
+
+
+def check_user(db: Session, user_id: int) -> List[str]:
+    """
+    Compare a user's stored summary with a recomputation from the trades
+
+    Returns:
+        One line per mismatch (empty if consistent)
+    """
+    matcher = LotMatcher()
+    for trade_id, item_name, trade_type, price, fee, timestamp in stream_trades(db, user_id):
+        matcher.add(trade_id, _item_key(item_name), trade_type, price, fee, timestamp)
+
+    stored = {
+        summary.item_name: summary
+        for summary in db.query(ItemPnLSummary).filter(ItemPnLSummary.user_id == user_id)
+    }
+    now = datetime.utcnow()
+    problems = []
+
+    for item_name in sorted(set(stored) | set(matcher.items)):
+        if item_name not in stored:
+            problems.append(f"{item_name!r}: missing summary row")
+            continue
+        if item_name not in matcher.items:
+            problems.append(f"{item_name!r}: summary row without trades")
+            continue
+
+        expected = _summary_row(user_id, matcher, item_name, now)
+        summary = stored[item_name]
+        for field in STATE_FIELDS:
+            if field == "updated_at":
+                continue
+            if field == "open_lots":
+                stored_lots = [lot[1:] for lot in _load_lots(summary.open_lots)]
+                expected_lots = [lot[1:] for lot in matcher.open_lots(item_name)]
+                if len(stored_lots) != len(expected_lots) or any(
+                    _differs(a[0], b[0]) or _differs(a[1], b[1]) or a[2] != b[2]
+                    for a, b in zip(stored_lots, expected_lots)
+                ):
+                    problems.append(f"{item_name!r}: open lots differ")
+                continue
+            if _differs(getattr(summary, field), expected[field]):
+                problems.append(f"{item_name!r}: {field} is {getattr(summary, field)}, expected {expected[field]}")
+
+    return problems
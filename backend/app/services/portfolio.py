@@ -0,0 +1,209 @@
+"""
+Portfolio valuation and unrealized P&L
+
+Open positions come from item_pnl_summary (open_count lots costing
+open_cost per user and item), latest prices from price_cache. Both are
+loaded into columnar NumPy arrays and valued in one vectorized pass: market
+value, cost basis, unrealized P&L and portfolio weight per position, and
+per-user totals via bincount, for one user or every user at once.
+
+Positions without a usable cached price are reported but left out of
+market value, unrealized P&L and weights; their cost still counts in
+cost_basis.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+import logging
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models import ItemPnLSummary, PriceCache, PRICE_OK
+
+logger = logging.getLogger(__name__)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator, 0 where the denominator isn't positive"""
+    return np.divide(
+        numerator, denominator, out=np.zeros_like(numerator, dtype=np.float64), where=denominator > 0
+    )
+
+
+class PortfolioValuation:
+    """
+    Valued open positions of one or more users, as parallel arrays
+
+    Position arrays are ordered by (user_id, item_name); user arrays are
+    ordered by user_id and hold each user's totals.
+    """
+
+    def __init__(
+        self,
+        user_ids: np.ndarray,
+        item_names: np.ndarray,
+        quantities: np.ndarray,
+        costs: np.ndarray,
+        prices: Dict[str, float],
+        priced_at: Dict[str, datetime],
+        now: Optional[datetime] = None
+    ):
+        """
+        Args:
+            user_ids: int64 user ID per position, sorted
+            item_names: Item name per position (object array)
+            quantities: Open lots per position
+            costs: Summed buy price of those lots
+            prices: Latest price per item name (items without one are unpriced)
+            priced_at: When each price was cached
+            now: Reference time for price ages (default: utcnow)
+        """
+        now = now or datetime.utcnow()
+        self.user_id = user_ids
+        self.item_name = item_names
+        self.quantity = quantities
+        self.cost_basis = costs
+
+        # Look prices up once per distinct item, then broadcast to positions
+        names, position_item = np.unique(item_names, return_inverse=True)
+        item_price = np.array([prices.get(name, np.nan) for name in names], dtype=np.float64)
+        item_age = np.array(
+            [(now - priced_at[name]).total_seconds() if name in priced_at else np.nan for name in names],
+            dtype=np.float64
+        )
+
+        self.price = item_price[position_item]
+        self.price_age = item_age[position_item]
+        self.priced = ~np.isnan(self.price)
+        self.market_value = np.where(self.priced, quantities * np.nan_to_num(self.price), 0.0)
+        self.unrealized_pnl = np.where(self.priced, self.market_value - costs, 0.0)
+
+        # Per-user totals: positions are sorted by user, so users are contiguous
+        self.users, position_user, counts = np.unique(user_ids, return_inverse=True, return_counts=True)
+        self._user_start = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+        self._user_end = np.cumsum(counts)
+        size = len(self.users)
+
+        def per_user(values: np.ndarray) -> np.ndarray:
+            return np.bincount(position_user, weights=values, minlength=size)
+
+        self.user_market_value = per_user(self.market_value)
+        self.user_cost_basis = per_user(costs)
+        self.user_priced_cost = per_user(np.where(self.priced, costs, 0.0))
+        self.user_unrealized_pnl = per_user(self.unrealized_pnl)
+        self.user_open_lots = per_user(quantities).astype(np.int64)
+        self.user_items = counts
+        self.user_unpriced_items = per_user((~self.priced).astype(np.float64)).astype(np.int64)
+
+        self.weight = _ratio(self.market_value, self.user_market_value[position_user])
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def _totals(self, index: int) -> Dict:
+        return {
+            "user_id": int(self.users[index]),
+            "market_value": float(self.user_market_value[index]),
+            "cost_basis": float(self.user_cost_basis[index]),
+            "priced_cost_basis": float(self.user_priced_cost[index]),
+            "unrealized_pnl": float(self.user_unrealized_pnl[index]),
+            "unrealized_pnl_pct": float(
+                _ratio(self.user_unrealized_pnl[index:index + 1], self.user_priced_cost[index:index + 1])[0] * 100
+            ),
+            "open_lots": int(self.user_open_lots[index]),
+            "items": int(self.user_items[index]),
+            "unpriced_items": int(self.user_unpriced_items[index])
+        }
+
+    def totals(self) -> List[Dict]:
+        """Totals of every user, by user_id"""
+        return [self._totals(index) for index in range(len(self.users))]
+
+    def user(self, user_id: int) -> Dict:
+        """
+        One user's totals and positions, largest market value first
+
+        Returns:
+            Totals dict (see totals()) plus `positions`; all zero for a user
+            without open positions
+        """
+        index = int(np.searchsorted(self.users, user_id))
+        if index == len(self.users) or self.users[index] != user_id:
+            return {
+                "user_id": user_id, "market_value": 0.0, "cost_basis": 0.0, "priced_cost_basis": 0.0,
+                "unrealized_pnl": 0.0, "unrealized_pnl_pct": 0.0, "open_lots": 0, "items": 0,
+                "unpriced_items": 0, "positions": []
+            }
+
+        start, end = self._user_start[index], self._user_end[index]
+        # Unpriced positions (market value 0) go last, biggest cost first
+        order = np.lexsort((-self.cost_basis[start:end], -self.market_value[start:end])) + start
+
+        positions = []
+        for i in order:
+            priced = bool(self.priced[i])
+            quantity = int(self.quantity[i])
+            positions.append({
+                "item_name": self.item_name[i],
+                "quantity": quantity,
+                "cost_basis": float(self.cost_basis[i]),
+                "avg_cost": float(self.cost_basis[i]) / quantity,
+                "price": float(self.price[i]) if priced else None,
+                "price_age_seconds": int(self.price_age[i]) if priced else None,
+                "market_value": float(self.market_value[i]) if priced else None,
+                "unrealized_pnl": float(self.unrealized_pnl[i]) if priced else None,
+                "weight": float(self.weight[i])
+            })
+
+        valuation = self._totals(index)
+        valuation["positions"] = positions
+        return valuation
+
+
+def value_portfolios(
+    db: Session, user_ids: Optional[Sequence[int]] = None, now: Optional[datetime] = None
+) -> PortfolioValuation:
+    """
+    Value the open positions of some or all users
+
+    Reads the P&L summary as is; callers serving a single user should run
+    pnl_summary.ensure_user first so a user without a summary yet is built.
+
+    Args:
+        db: Database session
+        user_ids: Integer user IDs to value (default: every user)
+        now: Reference time for price ages (default: utcnow)
+
+    Returns:
+        PortfolioValuation
+    """
+    positions = db.query(
+        ItemPnLSummary.user_id, ItemPnLSummary.item_name, ItemPnLSummary.open_count, ItemPnLSummary.open_cost
+    ).filter(ItemPnLSummary.open_count > 0)
+    if user_ids is not None:
+        positions = positions.filter(ItemPnLSummary.user_id.in_(list(user_ids)))
+    rows = positions.order_by(ItemPnLSummary.user_id, ItemPnLSummary.item_name).all()
+
+    held = positions.with_entities(ItemPnLSummary.item_name).distinct().order_by(None)
+    prices: Dict[str, float] = {}
+    priced_at: Dict[str, datetime] = {}
+    for item_name, price, cached_at in db.query(
+        PriceCache.item_name, PriceCache.price, PriceCache.cached_at
+    ).filter(
+        PriceCache.item_name.in_(held),
+        PriceCache.status == PRICE_OK,
+        PriceCache.price.isnot(None)
+    ):
+        prices[item_name] = price
+        priced_at[item_name] = cached_at
+
+    item_names = np.empty(len(rows), dtype=object)
+    item_names[:] = [row[1] for row in rows]
+
+    return PortfolioValuation(
+        np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+        item_names,
+        np.fromiter((row[2] for row in rows), dtype=np.int64, count=len(rows)),
+        np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows)),
+        prices,
+        priced_at,
+        now
+    )
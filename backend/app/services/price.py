@@ -1,10 +1,21 @@
-import httpx
-from typing import Optional, Dict
+import asyncio
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional, Dict, List, Tuple
 import logging
-from bs4 import BeautifulSoup
-from app.models import PriceCache
+from app.config import settings
+from app.database import SessionLocal
+from app.models import PriceCache, PriceRequestCount, PRICE_OK, PRICE_NOT_LISTED
+from app.services.http_client import http_clients
+from app.services.memory_cache import TTLCache
+from app.services.price_history import price_history
+from app.services.rate_limiter import RateLimitedError, outbound_limiter
+from app.utils.db_helpers import bulk_increment, bulk_upsert, chunked
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +27,47 @@ class PriceService:
         # CSFloat market API (public, no auth needed)
         self.csfloat_api_url = "https://csfloat.com/api/v1/listings"
         self.steam_market_url = "https://steamcommunity.com/market/priceoverview/"
-        self.cache_ttl = 300  # 5 minutes cache
+        self.cache_ttl = settings.cache_ttl
+        
+        # Hot prices answered from process memory before touching price_cache
+        self._memory = TTLCache(
+            max_entries=settings.price_memory_cache_max_entries,
+            max_bytes=settings.price_memory_cache_max_bytes,
+            ttl=self.cache_ttl
+        )
+        
+        # Per-provider in-flight bounds for upstream lookups (pacing itself
+        # happens per host in the shared outbound limiter)
+        self._semaphores = {
+            "csfloat": asyncio.Semaphore(settings.price_fetch_concurrency),
+            "steam": asyncio.Semaphore(settings.price_fetch_concurrency)
+        }
+        
+        # Single-flight: item name -> the upstream fetch already in progress
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.upstream_fetches = 0
+        self.coalesced_fetches = 0
+        
+        # Hedging: recent CSFloat latencies and which provider answered
+        self._csfloat_latencies = deque(maxlen=200)
+        self.hedged_fetches = 0
+        self.provider_wins = Counter()
+        # Losing CSFloat requests left running as the circuit's trial
+        self._hedge_losers = set()
+        
+        # Lookups answered by a negative (unpriceable) cache entry
+        self.negative_hits = 0
+        
+        # Strong refs to background stale-while-revalidate refreshes, and the
+        # item names they cover
+        self._refresh_tasks = set()
+        self._refreshing = set()
+        
+        # Lookups per item name not yet added to price_request_counts (which
+        # the background refresher prioritises by, across all workers)
+        self._pending_requests = Counter()
+        self._requests_flushed_at = time.monotonic()
+        self._requests_flush_task: Optional[asyncio.Task] = None
     
     async def get_item_price(self, item_name: str, db: Session = None) -> Optional[float]:
         """
@@ -29,31 +80,342 @@ class PriceService:
         Returns:
             Price in USD or None
         """
-        # Check cache first
-        if db:
-            cached_price = self._get_cached_price(item_name, db)
-            if cached_price is not None:
-                logger.debug(f"Using cached price for {item_name}: ${cached_price}")
-                return cached_price
+        info = await self.get_item_price_info(item_name, db)
+        return info["price"]
+    
+    async def get_item_price_info(self, item_name: str, db: Session = None) -> Dict:
+        """
+        Get price for an item with stale-while-revalidate semantics
+        
+        A fresh cached price is returned as-is. A price older than the TTL but
+        within `price_stale_max_age` is returned immediately flagged as stale,
+        and a background refresh is scheduled. Anything older (or missing)
+        blocks on the upstream fetch.
+        
+        Args:
+            item_name: Market hash name of the item
+            db: Database session for caching
+            
+        Returns:
+            Dict with 'price', 'is_stale' and 'age_seconds'
+        """
+        self._count_requests([item_name])
+        
+        # Check cache first (memory, then price_cache)
+        entry = self._lookup_cached([item_name], db).get(item_name)
+        if entry is not None:
+            price, cached_at = entry
+            age = (datetime.utcnow() - cached_at).total_seconds()
+            
+            if price is None:
+                # Negative entry: known to be unpriceable, don't ask again yet
+                self.negative_hits += 1
+                return {"price": None, "is_stale": False, "age_seconds": int(age)}
+            
+            is_stale = age >= self.cache_ttl
+            if is_stale:
+                self._schedule_refresh([item_name])
+            
+            logger.debug(f"Using cached price for {item_name}: ${price} (age {age:.0f}s)")
+            return {"price": price, "is_stale": is_stale, "age_seconds": int(age)}
+        
+        price, source = await self._fetch_coalesced(item_name)
+        
+        # Cache the price (or the fact that nobody lists it)
+        if price is not None or source == PRICE_NOT_LISTED:
+            self._cache_price(item_name, price, db, source)
+        
+        return {"price": price, "is_stale": False, "age_seconds": 0}
+    
+    def _schedule_refresh(self, item_names: List[str]):
+        """
+        Refresh stale prices in the background (each at most once at a time)
+        
+        All the names go to one task, which writes their prices with one
+        upsert and commit.
+        """
+        item_names = [
+            name for name in item_names
+            if name not in self._inflight and name not in self._refreshing
+        ]
+        if not item_names:
+            return
+        
+        self._refreshing.update(item_names)
+        task = asyncio.create_task(self._refresh(item_names))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
+    async def _refresh(self, item_names: List[str]):
+        """Fetch prices concurrently and write them through both cache tiers at once"""
+        try:
+            results = await asyncio.gather(
+                *(self._fetch_coalesced(item_name) for item_name in item_names),
+                return_exceptions=True
+            )
+            
+            prices = {}
+            sources = {}
+            for item_name, result in zip(item_names, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Background refresh failed for {item_name}: {result}")
+                    continue
+                price, source = result
+                if price is not None or source == PRICE_NOT_LISTED:
+                    prices[item_name] = price
+                    sources[item_name] = source
+            
+            if not prices:
+                return
+            
+            # The request's session is gone by now; use a dedicated one
+            db = SessionLocal()
+            try:
+                self._cache_prices(prices, db, sources)
+            finally:
+                db.close()
+        except Exception as e:
+            logger.warning(f"Background refresh of {len(item_names)} prices failed: {e}")
+        finally:
+            self._refreshing.difference_update(item_names)
+    
+    async def refresh_prices(
+        self,
+        item_names: Iterable[str],
+        db: Session,
+        pace: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> int:
+        """
+        Fetch prices from upstream, bypassing the cache, and write them through both cache tiers
+        
+        Items are fetched one after another and written every
+        `price_cache_write_batch`; a failed lookup leaves its cached price
+        as it was.
+        
+        Args:
+            item_names: Item names, in the order to refresh them
+            db: Database session for caching
+            pace: Awaited before each fetch; returning False stops the run
+            
+        Returns:
+            Number of items whose price (or not-listed result) was written
+        """
+        refreshed = 0
+        pending = {}
+        sources = {}
+        
+        try:
+            for item_name in item_names:
+                if pace is not None and not await pace():
+                    break
+                
+                price, source = await self._fetch_coalesced(item_name)
+                if price is None and source != PRICE_NOT_LISTED:
+                    continue
+                
+                pending[item_name] = price
+                sources[item_name] = source
+                refreshed += 1
+                if len(pending) >= settings.price_cache_write_batch:
+                    self._cache_prices(pending, db, sources)
+                    pending = {}
+                    sources = {}
+        finally:
+            self._cache_prices(pending, db, sources)
+        
+        return refreshed
+    
+    def _count_requests(self, item_names: Iterable[str]):
+        """Count lookups, flushing them to price_request_counts every so often"""
+        self._pending_requests.update(item_names)
+        
+        if time.monotonic() - self._requests_flushed_at < settings.price_request_counts_flush_interval:
+            return
+        if self._requests_flush_task is not None and not self._requests_flush_task.done():
+            return
+        
+        self._requests_flushed_at = time.monotonic()
+        self._requests_flush_task = asyncio.create_task(self._flush_requests_background())
+    
+    async def _flush_requests_background(self):
+        # The request's session may be mid-transaction; use a dedicated one
+        db = SessionLocal()
+        try:
+            self.flush_request_counts(db)
+        finally:
+            db.close()
+    
+    def flush_request_counts(self, db: Session):
+        """
+        Add this process's buffered lookup counts to price_request_counts
         
-        # Try CSFloat first (more accurate for CS2 items)
-        price = await self._get_csfloat_price(item_name)
+        Counts that fail to write are kept for the next flush.
+        """
+        pending, self._pending_requests = self._pending_requests, Counter()
+        if not pending:
+            return
         
-        # Fallback to Steam Market
-        if price is None:
-            price = await self._get_steam_market_price(item_name)
+        now = datetime.utcnow()
+        try:
+            bulk_increment(
+                db,
+                PriceRequestCount,
+                [{"item_name": name, "count": count, "updated_at": now} for name, count in pending.items()],
+                conflict_columns=["item_name"],
+                increment_columns=["count"]
+            )
+            db.commit()
+        except Exception as e:
+            logger.error(f"Error flushing price request counts: {e}")
+            db.rollback()
+            self._pending_requests.update(pending)
+    
+    async def _fetch_coalesced(self, item_name: str) -> Tuple[Optional[float], Optional[str]]:
+        """
+        Fetch from upstream, sharing one in-flight request per item name
         
-        # Cache the price
-        if price is not None and db:
-            self._cache_price(item_name, price, db)
+        Concurrent callers for the same item await the same task instead of
+        each spending a provider request. The shared task is shielded so one
+        caller giving up doesn't cancel it for the others.
+        """
+        task = self._inflight.get(item_name)
+        
+        if task is not None:
+            self.coalesced_fetches += 1
+            return await asyncio.shield(task)
+        
+        task = asyncio.create_task(self._fetch_upstream(item_name))
+        self._inflight[item_name] = task
+        self.upstream_fetches += 1
         
-        return price
+        def release(done: asyncio.Task):
+            if self._inflight.get(item_name) is done:
+                del self._inflight[item_name]
+        
+        task.add_done_callback(release)
+        return await asyncio.shield(task)
     
-    async def _get_csfloat_price(self, item_name: str) -> Optional[float]:
+    async def _fetch_upstream(self, item_name: str) -> Tuple[Optional[float], Optional[str]]:
+        """
+        Fetch a price from the providers, bypassing the cache
+        
+        Returns:
+            (price, source) where source is "csfloat" or "steam";
+            (None, PRICE_NOT_LISTED) if both providers answered without a price;
+            (None, None) if a lookup failed and the outcome is unknown
+        """
+        unlisted = set()
+        
+        if settings.price_hedge_enabled:
+            price, source = await self._fetch_hedged(item_name, unlisted)
+        else:
+            # Try CSFloat first (more accurate for CS2 items)
+            price, source = await self._get_csfloat_price(item_name, unlisted), "csfloat"
+            
+            # Fallback to Steam Market
+            if price is None:
+                price, source = await self._get_steam_market_price(item_name, unlisted), "steam"
+        
+        if price is not None:
+            return price, source
+        
+        if unlisted == {"csfloat", "steam"}:
+            return None, PRICE_NOT_LISTED
+        
+        return None, None
+    
+    async def _fetch_hedged(self, item_name: str, unlisted: set) -> Tuple[Optional[float], Optional[str]]:
+        """
+        Ask CSFloat first, hedging to Steam if CSFloat is slow
+        
+        If CSFloat hasn't answered within its recent latency percentile, the
+        Steam lookup starts in parallel and the first valid price wins; the
+        other request is cancelled. A CSFloat miss that comes back quickly
+        falls through to Steam as before.
+        """
+        providers = {
+            asyncio.create_task(self._get_csfloat_price(item_name, unlisted)): "csfloat"
+        }
+        
+        try:
+            result = await self._race(item_name, unlisted, providers)
+        except BaseException:
+            # Cancelled ourselves: nothing we started may outlive us
+            for task in providers:
+                task.cancel()
+            raise
+        
+        for task, source in providers.items():
+            if task.done():
+                continue
+            if source == "csfloat" and self._csfloat_half_open():
+                # The losing CSFloat request is the circuit's trial: let it
+                # finish so its outcome can close (or re-open) the circuit
+                self._hedge_losers.add(task)
+                task.add_done_callback(self._hedge_losers.discard)
+            else:
+                task.cancel()
+        
+        return result
+    
+    async def _race(
+        self, item_name: str, unlisted: set, providers: Dict[asyncio.Task, str]
+    ) -> Tuple[Optional[float], Optional[str]]:
+        """Wait for the CSFloat task in `providers`, adding Steam to it when needed"""
+        done, pending = await asyncio.wait(set(providers), timeout=self._hedge_delay())
+        
+        if not done:
+            self.hedged_fetches += 1
+        
+        # Primary slow (still pending) or empty-handed: bring in Steam
+        for task in done:
+            if task.result() is not None:
+                self.provider_wins["csfloat"] += 1
+                return task.result(), "csfloat"
+        
+        secondary = asyncio.create_task(self._get_steam_market_price(item_name, unlisted))
+        providers[secondary] = "steam"
+        pending.add(secondary)
+        
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.result() is not None:
+                    source = providers[task]
+                    self.provider_wins[source] += 1
+                    return task.result(), source
+        
+        return None, None
+    
+    def _csfloat_half_open(self) -> bool:
+        """Whether CSFloat's circuit is letting a single trial request through"""
+        return outbound_limiter.get(urlsplit(self.csfloat_api_url).hostname).breaker.state == "half_open"
+    
+    def _hedge_delay(self) -> float:
+        """Seconds to wait on CSFloat before hedging, from its latency percentile"""
+        samples = sorted(self._csfloat_latencies)
+        if len(samples) < 20:
+            return settings.price_hedge_default_delay
+        
+        index = min(len(samples) - 1, int(len(samples) * settings.price_hedge_percentile))
+        return max(samples[index], settings.price_hedge_min_delay)
+    
+    @asynccontextmanager
+    async def _provider_slot(self, provider: str):
+        """Hold one of the provider's in-flight slots"""
+        async with self._semaphores[provider]:
+            yield
+    
+    async def _get_csfloat_price(self, item_name: str, unlisted: Optional[set] = None) -> Optional[float]:
         """
         Get price from CSFloat market
         
         CSFloat API is public and doesn't require auth for basic price checks
+        
+        Args:
+            item_name: Market hash name of the item
+            unlisted: If given, "csfloat" is added when CSFloat answered but
+                has no price for the item (as opposed to an error)
         """
         try:
             # CSFloat API endpoint for listings
@@ -63,43 +425,56 @@ class PriceService:
                 "sort_by": "lowest_price"
             }
             
-            async with httpx.AsyncClient() as client:
+            client = http_clients.get(self.csfloat_api_url)
+            async with self._provider_slot("csfloat"):
+                started = time.monotonic()
                 response = await client.get(
                     self.csfloat_api_url,
                     params=params,
                     timeout=10.0,
                     headers={"User-Agent": "CS2Tracker/1.0"}
                 )
+            
+            if response.status_code == 200:
+                self._csfloat_latencies.append(time.monotonic() - started)
+                data = response.json()
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Get listings
-                    listings = data.get("data", [])
+                # Get listings
+                listings = data.get("data", [])
+                
+                if listings:
+                    # Get average of lowest 3 prices
+                    prices = [
+                        listing.get("price", 0) / 100  # CSFloat uses cents
+                        for listing in listings[:3]
+                        if listing.get("price")
+                    ]
                     
-                    if listings:
-                        # Get average of lowest 3 prices
-                        prices = [
-                            listing.get("price", 0) / 100  # CSFloat uses cents
-                            for listing in listings[:3]
-                            if listing.get("price")
-                        ]
-                        
-                        if prices:
-                            avg_price = sum(prices) / len(prices)
-                            logger.info(f"CSFloat price for {item_name}: ${avg_price:.2f}")
-                            return round(avg_price, 2)
+                    if prices:
+                        avg_price = sum(prices) / len(prices)
+                        logger.info(f"CSFloat price for {item_name}: ${avg_price:.2f}")
+                        return round(avg_price, 2)
                 
+                if unlisted is not None:
+                    unlisted.add("csfloat")
+                
+        except RateLimitedError as e:
+            logger.info(f"Skipping CSFloat for {item_name}: {e}")
         except Exception as e:
             logger.warning(f"Failed to get CSFloat price for {item_name}: {e}")
         
         return None
     
-    async def _get_steam_market_price(self, item_name: str) -> Optional[float]:
+    async def _get_steam_market_price(self, item_name: str, unlisted: Optional[set] = None) -> Optional[float]:
         """
         Fallback: Get price from Steam Community Market
         
         Note: Steam has rate limits, use sparingly
+        
+        Args:
+            item_name: Market hash name of the item
+            unlisted: If given, "steam" is added when Steam answered but has
+                no price for the item (as opposed to an error)
         """
         try:
             params = {
@@ -108,27 +483,33 @@ class PriceService:
                 "market_hash_name": item_name
             }
             
-            async with httpx.AsyncClient() as client:
+            client = http_clients.get(self.steam_market_url)
+            async with self._provider_slot("steam"):
                 response = await client.get(
                     self.steam_market_url,
                     params=params,
                     timeout=10.0
                 )
+            
+            if response.status_code == 200:
+                data = response.json()
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Steam returns prices as strings like "$1.23"
-                    lowest_price = data.get("lowest_price", "")
-                    median_price = data.get("median_price", "")
-                    
-                    # Parse price (remove $ and convert to float)
-                    price_str = lowest_price or median_price
-                    if price_str:
-                        price = float(price_str.replace("$", "").replace(",", ""))
-                        logger.info(f"Steam Market price for {item_name}: ${price:.2f}")
-                        return round(price, 2)
+                # Steam returns prices as strings like "$1.23"
+                lowest_price = data.get("lowest_price", "")
+                median_price = data.get("median_price", "")
+                
+                # Parse price (remove $ and convert to float)
+                price_str = lowest_price or median_price
+                if price_str:
+                    price = float(price_str.replace("$", "").replace(",", ""))
+                    logger.info(f"Steam Market price for {item_name}: ${price:.2f}")
+                    return round(price, 2)
+                
+                if unlisted is not None:
+                    unlisted.add("steam")
                 
+        except RateLimitedError as e:
+            logger.info(f"Skipping Steam Market for {item_name}: {e}")
         except Exception as e:
             logger.warning(f"Failed to get Steam Market price for {item_name}: {e}")
         
@@ -136,49 +517,262 @@ class PriceService:
     
     def _get_cached_price(self, item_name: str, db: Session) -> Optional[float]:
         """Get cached price if still fresh"""
+        return self._get_cached_prices([item_name], db).get(item_name)
+    
+    def _get_cached_prices(self, item_names: List[str], db: Optional[Session]) -> Dict[str, float]:
+        """
+        Get fresh cached prices for many items
+        
+        Returns:
+            Dict of item name to price, only for entries still within TTL
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.cache_ttl)
+        
+        return {
+            item_name: price
+            for item_name, (price, cached_at) in self._lookup_cached(item_names, db).items()
+            if price is not None and cached_at > cutoff
+        }
+    
+    def _lookup_cached(
+        self,
+        item_names: List[str],
+        db: Optional[Session]
+    ) -> Dict[str, Tuple[float, datetime]]:
+        """
+        Look up cached prices, including stale ones still inside the grace window
+        
+        Reads through the in-memory tier first; only names it doesn't hold go
+        to price_cache, with one IN query per chunk. Fresh database hits are
+        copied into memory for the rest of their TTL.
+        
+        Returns:
+            Dict of item name to (price, cached_at) for entries younger than
+            max(cache_ttl, price_stale_max_age). Negative entries younger than
+            price_negative_ttl are included with a price of None.
+        """
+        found = {}
+        remaining = []
+        
+        for item_name in item_names:
+            entry = self._memory.get(item_name) if settings.cache_enabled else None
+            if entry is not None:
+                found[item_name] = entry
+            else:
+                remaining.append(item_name)
+        
+        if not remaining or db is None:
+            return found
+        
+        now = datetime.utcnow()
+        max_age = max(self.cache_ttl, settings.price_stale_max_age)
+        cutoff = now - timedelta(seconds=max_age)
+        negative_cutoff = now - timedelta(seconds=settings.price_negative_ttl)
+        
         try:
-            cache_entry = db.query(PriceCache).filter(
-                PriceCache.item_name == item_name
-            ).first()
-            
-            if cache_entry:
-                # Check if cache is still fresh (within TTL)
-                age = datetime.utcnow() - cache_entry.cached_at
-                if age.total_seconds() < self.cache_ttl:
-                    return cache_entry.price
+            for chunk in chunked(remaining):
+                rows = db.query(PriceCache.item_name, PriceCache.price, PriceCache.cached_at).filter(
+                    PriceCache.item_name.in_(chunk),
+                    or_(
+                        and_(PriceCache.status == PRICE_OK, PriceCache.cached_at > cutoff),
+                        and_(PriceCache.status == PRICE_NOT_LISTED, PriceCache.cached_at > negative_cutoff)
+                    )
+                ).all()
+                
+                for item_name, price, cached_at in rows:
+                    found[item_name] = (price, cached_at)
+                    if settings.cache_enabled:
+                        ttl = self.cache_ttl if price is not None else settings.price_negative_ttl
+                        remaining_ttl = ttl - (now - cached_at).total_seconds()
+                        self._memory.set(item_name, (price, cached_at), ttl=remaining_ttl)
         except Exception as e:
             logger.error(f"Error reading price cache: {e}")
         
-        return None
+        return found
+    
+    def _cache_price(self, item_name: str, price: Optional[float], db: Session, source: Optional[str] = None):
+        """Cache price in database (None caches a negative entry)"""
+        self._cache_prices({item_name: price}, db, {item_name: source})
     
-    def _cache_price(self, item_name: str, price: float, db: Session):
-        """Cache price in database"""
+    def _cache_prices(
+        self,
+        prices: Dict[str, float],
+        db: Optional[Session],
+        sources: Optional[Dict[str, Optional[str]]] = None
+    ):
+        """
+        Cache many prices with a single multi-row upsert and one commit
+        
+        Each real price is also appended to the price history in the same
+        transaction.
+        
+        A price of None stores a negative entry: the item is known to have no
+        listings and is served as unpriceable for `price_negative_ttl`.
+        
+        Args:
+            prices: Dict of item name to price (or None)
+            db: Database session
+            sources: Dict of item name to the provider that priced it
+        """
+        sources = sources or {}
+        if not prices:
+            return
+        
+        now = datetime.utcnow()
+        
+        # Write-through: memory is updated even if the DB write fails below
+        if settings.cache_enabled:
+            for item_name, price in prices.items():
+                ttl = self.cache_ttl if price is not None else settings.price_negative_ttl
+                self._memory.set(item_name, (price, now), ttl=ttl)
+        
+        if db is None:
+            return
+        
+        rows = [
+            {
+                "item_name": item_name,
+                "price": price,
+                "status": PRICE_OK if price is not None else PRICE_NOT_LISTED,
+                "source": sources.get(item_name) if price is not None else None,
+                "cached_at": now,
+                "updated_at": now
+            }
+            for item_name, price in prices.items()
+        ]
+        
         try:
-            # Check if entry exists
-            cache_entry = db.query(PriceCache).filter(
-                PriceCache.item_name == item_name
-            ).first()
-            
-            if cache_entry:
-                # Update existing
-                cache_entry.price = price
-                cache_entry.cached_at = datetime.utcnow()
-            else:
-                # Create new
-                cache_entry = PriceCache(
-                    item_name=item_name,
-                    price=price,
-                    cached_at=datetime.utcnow()
-                )
-                db.add(cache_entry)
-            
+            bulk_upsert(
+                db,
+                PriceCache,
+                rows,
+                conflict_columns=["item_name"],
+                update_columns=["price", "status", "source", "cached_at", "updated_at"]
+            )
+            price_history.record(
+                db,
+                {name: price for name, price in prices.items() if price is not None},
+                now
+            )
             db.commit()
-            logger.debug(f"Cached price for {item_name}: ${price}")
+            logger.debug(f"Cached {len(rows)} prices")
             
         except Exception as e:
             logger.error(f"Error caching price: {e}")
             db.rollback()
     
+    def invalidate(self, item_names: Iterable[str]):
+        """
+        Drop items from the in-memory tier
+        
+        For code that writes price_cache directly (e.g. the dump loader), so
+        this process doesn't keep serving the older prices from memory.
+        """
+        for item_name in item_names:
+            self._memory.delete(item_name)
+    
+    def cache_stats(self) -> Dict:
+        """Return counters for the in-memory price tier and single-flight"""
+        return {
+            "enabled": settings.cache_enabled,
+            **self._memory.stats(),
+            "single_flight": {
+                "in_flight": len(self._inflight),
+                "upstream_fetches": self.upstream_fetches,
+                "coalesced_fetches": self.coalesced_fetches
+            },
+            "negative_cache": {
+                "ttl": settings.price_negative_ttl,
+                "upstream_fetches_saved": self.negative_hits
+            },
+            "hedging": {
+                "enabled": settings.price_hedge_enabled,
+                "delay_seconds": round(self._hedge_delay(), 3),
+                "hedged_fetches": self.hedged_fetches,
+                "provider_wins": dict(self.provider_wins)
+            }
+        }
+    
+    async def iter_prices(
+        self,
+        item_names: list,
+        db: Session = None
+    ) -> AsyncIterator[Tuple[str, Optional[float]]]:
+        """
+        Resolve prices for many items, yielding each as soon as it is known
+        
+        Cache hits are yielded first without any network I/O; stale hits
+        inside the grace window are yielded too and refreshed in the
+        background, and names negatively cached as unpriceable are yielded
+        as None without asking the providers. Misses are fetched concurrently; provider slots and token
+        buckets bound how many are in flight and how fast they go out.
+        
+        Args:
+            item_names: List of item names (duplicates are ignored)
+            db: Database session for caching
+            
+        Yields:
+            (item_name, price) tuples; price is None if no provider knew it
+        """
+        unique_names = list(dict.fromkeys(item_names))
+        self._count_requests(unique_names)
+        cached = self._lookup_cached(unique_names, db)
+        stale_cutoff = datetime.utcnow() - timedelta(seconds=self.cache_ttl)
+        hits = []
+        stale = []
+        misses = []
+        
+        for item_name in unique_names:
+            entry = cached.get(item_name)
+            if entry is None:
+                misses.append(item_name)
+                continue
+            
+            price, cached_at = entry
+            if price is None:
+                self.negative_hits += 1
+            elif cached_at <= stale_cutoff:
+                stale.append(item_name)
+            hits.append((item_name, price))
+        
+        # One background task refreshes every stale hit
+        self._schedule_refresh(stale)
+        
+        for hit in hits:
+            yield hit
+        
+        if not misses:
+            return
+        
+        async def fetch(name: str) -> Tuple[str, Optional[float], Optional[str]]:
+            return (name, *await self._fetch_coalesced(name))
+        
+        tasks = [asyncio.create_task(fetch(name)) for name in misses]
+        pending_writes = {}
+        pending_sources = {}
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item_name, price, source = await next_done
+                
+                if price is not None or source == PRICE_NOT_LISTED:
+                    pending_writes[item_name] = price
+                    pending_sources[item_name] = source
+                    if len(pending_writes) >= settings.price_cache_write_batch:
+                        self._cache_prices(pending_writes, db, pending_sources)
+                        pending_writes = {}
+                        pending_sources = {}
+                
+                yield item_name, price
+        finally:
+            # Consumer stopped early: stop waiting (shared fetches still
+            # finish for any other caller awaiting them)
+            for task in tasks:
+                task.cancel()
+            
+            if pending_writes:
+                self._cache_prices(pending_writes, db, pending_sources)
+    
     async def bulk_fetch_prices(self, item_names: list, db: Session = None) -> Dict[str, float]:
         """
         Fetch prices for multiple items
@@ -192,15 +786,12 @@ class PriceService:
         """
         prices = {}
         
-        # Fetch prices with a small delay to avoid rate limits
-        import asyncio
-        
-        for item_name in item_names:
-            price = await self.get_item_price(item_name, db)
+        async for item_name, price in self.iter_prices(item_names, db):
             if price:
                 prices[item_name] = price
-            
-            # Small delay to be nice to APIs
-            await asyncio.sleep(0.5)
         
         return prices
+
+
+# Shared instance so cache and in-flight state are global to the process
+price_service = PriceService()
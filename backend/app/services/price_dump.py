@@ -0,0 +1,367 @@
+import codecs
+import csv
+import json
+import math
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import PriceCache, PRICE_OK
+from app.services.price import price_service
+from app.services.price_history import price_history
+from app.utils.db_helpers import bulk_upsert
+
+logger = logging.getLogger(__name__)
+
+NAME_KEYS = ("market_hash_name", "item_name", "name")
+PRICE_KEYS = ("price", "lowest_price", "suggested_price", "median_price")
+
+
+class DumpFormatError(ValueError):
+    """Raised when a dump can't be parsed"""
+
+
+def _record_from_obj(obj, name: Optional[str] = None) -> Optional[Tuple[str, float]]:
+    """Pull (name, price) out of one dump entry; None if it has no usable price"""
+    if isinstance(obj, dict):
+        name = name or next((obj[k] for k in NAME_KEYS if obj.get(k)), None)
+        value = next((obj[k] for k in PRICE_KEYS if obj.get(k) is not None), None)
+    else:
+        value = obj
+
+    if not name or value is None:
+        return None
+
+    try:
+        if isinstance(value, str):
+            value = value.replace("$", "").replace(",", "").strip()
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+
+    # float() also takes "nan"/"inf", which price_history can't bucket
+    if not (math.isfinite(price) and price >= 0):
+        return None
+    return str(name), price
+
+
+class DumpParser:
+    """
+    Incremental parser for full-market price dumps
+
+    Bytes are pushed in with `feed()` as they arrive; complete records come
+    out immediately, so memory use is bounded by the largest single record
+    rather than the file size. Supported formats:
+
+    - json: a top-level object {"name": price | {...}} or an array of
+      objects with a name key and a price key
+    - ndjson: one such object per line
+    - csv: a header row with a name column and a price column (quoted
+      fields may span lines)
+    """
+
+    def __init__(self, fmt: str):
+        if fmt not in ("json", "ndjson", "csv"):
+            raise DumpFormatError(f"Unsupported dump format: {fmt}")
+
+        self.fmt = fmt
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buffer = ""
+        self._json = json.JSONDecoder()
+        self._container = None  # "{" or "[" once the JSON top level is seen
+        self._done = False
+        self._csv_columns: Optional[Tuple[int, int]] = None
+        self._csv_record: List[str] = []  # lines of a record with a quoted field still open
+        self._csv_quotes = 0  # quote characters in those lines
+        self.skipped = 0
+
+    def feed(self, data: bytes) -> List[Tuple[str, float]]:
+        """Consume a chunk of bytes; return the records it completed"""
+        self._buffer += self._decoder.decode(data)
+        return self._drain(final=False)
+
+    def close(self) -> List[Tuple[str, float]]:
+        """Flush the tail of the input"""
+        self._buffer += self._decoder.decode(b"", final=True)
+        records = self._drain(final=True)
+
+        if self.fmt == "json" and not self._done:
+            raise DumpFormatError("Truncated JSON dump")
+        return records
+
+    def _drain(self, final: bool) -> List[Tuple[str, float]]:
+        if self.fmt == "json":
+            return self._drain_json(final)
+        return self._drain_lines(final)
+
+    # ---- line formats ------------------------------------------------------
+
+    def _drain_lines(self, final: bool) -> List[Tuple[str, float]]:
+        lines = self._buffer.split("\n")
+        self._buffer = "" if final else lines.pop()
+        records = []
+
+        if self.fmt == "ndjson":
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    record = _record_from_obj(json.loads(line))
+                except ValueError:
+                    record = None
+                self._collect(records, record)
+            return records
+
+        for row in csv.reader(self._csv_records(lines, final)):
+            if self._csv_columns is None:
+                header = [col.strip().lower() for col in row]
+                name_col = next((header.index(k) for k in NAME_KEYS if k in header), None)
+                price_col = next((header.index(k) for k in PRICE_KEYS if k in header), None)
+                if name_col is None or price_col is None:
+                    raise DumpFormatError("CSV header needs a name column and a price column")
+                self._csv_columns = (name_col, price_col)
+                continue
+
+            name_col, price_col = self._csv_columns
+            if len(row) <= max(name_col, price_col):
+                record = None
+            else:
+                record = _record_from_obj(row[price_col], name=row[name_col])
+            self._collect(records, record)
+
+        return records
+
+    def _csv_records(self, lines: List[str], final: bool) -> List[str]:
+        """
+        Join lines into whole CSV records
+
+        A quoted field may contain newlines; while a record has an odd
+        number of quote characters (an escaped "" counts as two) its lines are
+        held back until the closing quote arrives.
+        """
+        records = []
+        for line in lines:
+            if not self._csv_record and not line.strip():
+                continue
+            self._csv_record.append(line)
+            self._csv_quotes += line.count('"')
+            if self._csv_quotes % 2 == 0:
+                records.append("\n".join(self._csv_record))
+                self._csv_record = []
+                self._csv_quotes = 0
+
+        if final and self._csv_record:
+            # Unterminated quote: let the csv module make of it what it can
+            records.append("\n".join(self._csv_record))
+            self._csv_record = []
+            self._csv_quotes = 0
+        return records
+
+    # ---- JSON --------------------------------------------------------------
+
+    def _skip(self, pos: int, chars: str) -> int:
+        while pos < len(self._buffer) and self._buffer[pos] in chars:
+            pos += 1
+        return pos
+
+    def _decode_at(self, pos: int, final: bool):
+        """raw_decode at pos; None if the value may still be incomplete"""
+        try:
+            value, end = self._json.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise DumpFormatError(f"Invalid JSON near offset {pos}")
+            return None
+
+        # A bare number at the very end of the buffer might continue
+        if end >= len(self._buffer) and not final:
+            return None
+        return value, end
+
+    def _drain_json(self, final: bool) -> List[Tuple[str, float]]:
+        records = []
+        pos = self._skip(0, " \t\r\n")
+
+        if self._container is None:
+            if pos >= len(self._buffer):
+                self._buffer = ""
+                return records
+            if self._buffer[pos] not in "[{":
+                raise DumpFormatError("JSON dump must be an object or an array")
+            self._container = self._buffer[pos]
+            pos += 1
+
+        while not self._done:
+            pos = self._skip(pos, " \t\r\n,")
+            if pos >= len(self._buffer):
+                break
+
+            if self._buffer[pos] in "]}":
+                self._done = True
+                pos += 1
+                break
+
+            if self._container == "[":
+                decoded = self._decode_at(pos, final)
+                if decoded is None:
+                    break
+                value, pos = decoded
+                self._collect(records, _record_from_obj(value))
+                continue
+
+            key = self._decode_at(pos, final)
+            if key is None:
+                break
+            colon = self._skip(key[1], " \t\r\n")
+            if colon >= len(self._buffer):
+                break
+            if self._buffer[colon] != ":":
+                raise DumpFormatError(f"Expected ':' near offset {colon}")
+            decoded = self._decode_at(self._skip(colon + 1, " \t\r\n"), final)
+            if decoded is None:
+                break
+            value, pos = decoded
+            self._collect(records, _record_from_obj(value, name=key[0]))
+
+        self._buffer = self._buffer[pos:]
+        return records
+
+    def _collect(self, records: List, record: Optional[Tuple[str, float]]):
+        if record is None:
+            self.skipped += 1
+        else:
+            records.append(record)
+
+
+class PriceDumpLoader:
+    """
+    Bulk-upserts parsed dump records into price_cache in large transactions
+
+    Each chunk is one multi-row upsert plus one history append, committed
+    together. `source` is stored in PriceCache.source as provenance.
+    """
+
+    def __init__(self, db: Session, source: str, chunk_size: Optional[int] = None, price_unit: str = "dollars"):
+        self.db = db
+        self.source = source[:50]  # PriceCache.source is String(50)
+        self.chunk_size = chunk_size or settings.price_dump_chunk_size
+        self.divisor = 100.0 if price_unit == "cents" else 1.0
+        self._pending: Dict[str, float] = {}
+        self.loaded = 0
+        self.chunks = 0
+        self.started = time.perf_counter()
+
+    def add(self, records: Iterable[Tuple[str, float]]):
+        for name, price in records:
+            self._pending[name] = round(price / self.divisor, 2)
+            if len(self._pending) >= self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "item_name": name,
+                "price": price,
+                "status": PRICE_OK,
+                "source": self.source,
+                "cached_at": now,
+                "updated_at": now
+            }
+            for name, price in self._pending.items()
+        ]
+
+        try:
+            bulk_upsert(
+                self.db,
+                PriceCache,
+                rows,
+                conflict_columns=["item_name"],
+                update_columns=["price", "status", "source", "cached_at", "updated_at"]
+            )
+            price_history.record(self.db, self._pending, now)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        # Don't let this process keep serving the pre-dump prices from memory
+        price_service.invalidate(self._pending)
+
+        self.loaded += len(rows)
+        self.chunks += 1
+        self._pending = {}
+
+    def report(self, skipped: int = 0) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "loaded": self.loaded,
+            "skipped": skipped,
+            "chunks": self.chunks,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(self.loaded / elapsed) if elapsed > 0 else self.loaded,
+            "source": self.source
+        }
+
+
+def load_dump_file(
+    db: Session,
+    path: str,
+    fmt: Optional[str] = None,
+    source: Optional[str] = None,
+    chunk_size: Optional[int] = None,
+    price_unit: str = "dollars",
+    read_size: int = 1 << 20
+) -> Dict:
+    """
+    Stream a dump file from disk into price_cache
+
+    Args:
+        db: Database session
+        path: Dump file path
+        fmt: json, ndjson or csv (guessed from the extension if omitted)
+        source: Provenance stored in PriceCache.source (default "dump:<file name>")
+        chunk_size: Rows per upsert transaction
+        price_unit: "dollars" or "cents"
+        read_size: Bytes read per chunk
+
+    Returns:
+        Load report with rows/sec
+    """
+    parser = DumpParser(fmt or guess_format(path))
+    loader = PriceDumpLoader(
+        db,
+        source or f"dump:{os.path.basename(path)}",
+        chunk_size=chunk_size,
+        price_unit=price_unit
+    )
+
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(read_size)
+            if not data:
+                break
+            loader.add(parser.feed(data))
+
+    loader.add(parser.close())
+    loader.flush()
+
+    report = loader.report(parser.skipped)
+    logger.info(f"Loaded price dump {path}: {report}")
+    return report
+
+
+def guess_format(filename: str) -> str:
+    """Dump format from a file name"""
+    lowered = filename.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "json"
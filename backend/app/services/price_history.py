@@ -0,0 +1,287 @@
+import calendar
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import PriceItem, PricePoint, PriceRollup
+from app.utils.db_helpers import bulk_insert_ignore, chunked
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 86400
+RESOLUTIONS = {"hour": HOUR, "day": DAY}
+
+
+def to_epoch(value: datetime) -> int:
+    """Naive UTC datetime -> epoch seconds"""
+    return calendar.timegm(value.utctimetuple())
+
+
+class PriceHistoryService:
+    """
+    Append-only price history with hourly/daily rollups
+
+    Every price written to price_cache is also appended to price_points as
+    (item_id, ts, price_cents) - integer item keys, epoch seconds and integer
+    cents keep rows small and the (item_id, ts) primary key makes range scans
+    cheap. The retention job folds raw points into hourly buckets after
+    `price_history_raw_days` and hourly buckets into daily ones after
+    `price_history_hourly_days`.
+    """
+
+    def __init__(self):
+        # item_name -> price_items.id, only for keys known to be committed
+        self._keys: Dict[str, int] = {}
+
+    def _existing_keys(self, db: Session, item_names: List[str]) -> Dict[str, int]:
+        keys = {}
+        for chunk in chunked(item_names):
+            rows = db.query(PriceItem.item_name, PriceItem.id).filter(PriceItem.item_name.in_(chunk))
+            keys.update({name: item_id for name, item_id in rows})
+        return keys
+
+    def item_keys(self, db: Session, item_names: List[str], create: bool = True) -> Dict[str, int]:
+        """
+        Map item names to their integer keys
+
+        Args:
+            db: Database session
+            item_names: Item names to resolve
+            create: Insert keys for unknown names (in the caller's transaction)
+
+        Returns:
+            Dict of item name to key (unknown names are omitted if create=False)
+        """
+        keys = {name: self._keys[name] for name in item_names if name in self._keys}
+        missing = [name for name in item_names if name not in keys]
+
+        if missing:
+            found = self._existing_keys(db, missing)
+            self._keys.update(found)
+            keys.update(found)
+            missing = [name for name in missing if name not in found]
+
+        if missing and create:
+            bulk_insert_ignore(db, PriceItem, [{"item_name": name} for name in missing])
+            # Not memoized: the insert may still be rolled back with the caller
+            keys.update(self._existing_keys(db, missing))
+
+        return keys
+
+    def record(self, db: Session, prices: Dict[str, float], at: datetime):
+        """
+        Append one point per priced item (does not commit)
+
+        Args:
+            db: Database session
+            prices: Dict of item name to price in USD
+            at: Observation time (naive UTC)
+        """
+        if not prices:
+            return
+
+        keys = self.item_keys(db, list(prices))
+        ts = to_epoch(at)
+        rows = [
+            {"item_id": keys[name], "ts": ts, "price_cents": int(round(price * 100))}
+            for name, price in prices.items()
+            if name in keys
+        ]
+        bulk_insert_ignore(db, PricePoint, rows)
+
+    # ---- queries -----------------------------------------------------------
+
+    def query_series(
+        self,
+        db: Session,
+        item_names: List[str],
+        start: datetime,
+        end: datetime,
+        resolution: str = "auto"
+    ) -> Dict:
+        """
+        Price series for many items over [start, end] in one call
+
+        Args:
+            db: Database session
+            item_names: Items to chart
+            start: Range start (naive UTC)
+            end: Range end (naive UTC)
+            resolution: "raw", "hour", "day" or "auto" (picked from the span)
+
+        Returns:
+            Dict with the resolution used and, per item, a list of
+            [ts, avg_price, min_price, max_price] rows ordered by ts
+        """
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+
+        if resolution == "auto":
+            span = end_ts - start_ts
+            if span <= 2 * DAY:
+                resolution = "raw"
+            elif span <= 60 * DAY:
+                resolution = "hour"
+            else:
+                resolution = "day"
+
+        keys = self.item_keys(db, list(dict.fromkeys(item_names)), create=False)
+        names_by_key = {item_id: name for name, item_id in keys.items()}
+        series = {name: [] for name in item_names}
+
+        for chunk in chunked(list(names_by_key)):
+            if resolution == "raw":
+                rows = db.execute(
+                    select(PricePoint.item_id, PricePoint.ts, PricePoint.price_cents)
+                    .where(
+                        PricePoint.item_id.in_(chunk),
+                        PricePoint.ts.between(start_ts, end_ts)
+                    )
+                    .order_by(PricePoint.item_id, PricePoint.ts)
+                )
+                for item_id, ts, cents in rows:
+                    price = cents / 100
+                    series[names_by_key[item_id]].append([ts, price, price, price])
+            else:
+                for item_id, points in self._bucketed(db, chunk, start_ts, end_ts, RESOLUTIONS[resolution]).items():
+                    series[names_by_key[item_id]].extend(points)
+
+        return {"resolution": resolution, "series": series}
+
+    def _bucketed(
+        self,
+        db: Session,
+        item_ids: List[int],
+        start_ts: int,
+        end_ts: int,
+        bucket: int
+    ) -> Dict[int, List]:
+        """Aggregate raw points and finer rollups into `bucket`-second buckets"""
+        raw_bucket = (PricePoint.ts // bucket) * bucket
+        raw = (
+            select(
+                PricePoint.item_id,
+                raw_bucket.label("bucket"),
+                func.min(PricePoint.price_cents),
+                func.max(PricePoint.price_cents),
+                func.sum(PricePoint.price_cents),
+                func.count()
+            )
+            .where(PricePoint.item_id.in_(item_ids), PricePoint.ts.between(start_ts, end_ts))
+            .group_by(PricePoint.item_id, raw_bucket)
+        )
+
+        rollup_bucket = (PriceRollup.ts // bucket) * bucket
+        rolled = (
+            select(
+                PriceRollup.item_id,
+                rollup_bucket.label("bucket"),
+                func.min(PriceRollup.min_cents),
+                func.max(PriceRollup.max_cents),
+                func.sum(PriceRollup.sum_cents),
+                func.sum(PriceRollup.samples)
+            )
+            .where(
+                PriceRollup.item_id.in_(item_ids),
+                PriceRollup.resolution <= bucket,
+                PriceRollup.ts.between(start_ts, end_ts)
+            )
+            .group_by(PriceRollup.item_id, rollup_bucket)
+        )
+
+        merged: Dict[tuple, list] = {}
+        for stmt in (rolled, raw):
+            for item_id, ts, low, high, total, samples in db.execute(stmt):
+                acc = merged.get((item_id, ts))
+                if acc is None:
+                    merged[(item_id, ts)] = [low, high, total, samples]
+                else:
+                    acc[0] = min(acc[0], low)
+                    acc[1] = max(acc[1], high)
+                    acc[2] += total
+                    acc[3] += samples
+
+        result: Dict[int, List] = {}
+        for (item_id, ts), (low, high, total, samples) in sorted(merged.items()):
+            result.setdefault(item_id, []).append(
+                [ts, round(total / samples / 100, 2), low / 100, high / 100]
+            )
+        return result
+
+    # ---- retention ---------------------------------------------------------
+
+    def _roll_up(self, db: Session, source, cutoff: int, bucket: int) -> int:
+        """Fold rows of `source` older than `cutoff` into `bucket` rollups"""
+        if source is PricePoint:
+            bucket_ts = (PricePoint.ts // bucket) * bucket
+            select_stmt = (
+                select(
+                    PricePoint.item_id,
+                    literal(bucket),
+                    bucket_ts,
+                    func.min(PricePoint.price_cents),
+                    func.max(PricePoint.price_cents),
+                    func.sum(PricePoint.price_cents),
+                    func.count()
+                )
+                .where(PricePoint.ts < cutoff)
+                .group_by(PricePoint.item_id, bucket_ts)
+            )
+            source_filter = [PricePoint.ts < cutoff]
+        else:
+            bucket_ts = (PriceRollup.ts // bucket) * bucket
+            finer = PriceRollup.resolution < bucket
+            select_stmt = (
+                select(
+                    PriceRollup.item_id,
+                    literal(bucket),
+                    bucket_ts,
+                    func.min(PriceRollup.min_cents),
+                    func.max(PriceRollup.max_cents),
+                    func.sum(PriceRollup.sum_cents),
+                    func.sum(PriceRollup.samples)
+                )
+                .where(finer, PriceRollup.ts < cutoff)
+                .group_by(PriceRollup.item_id, bucket_ts)
+            )
+            source_filter = [finer, PriceRollup.ts < cutoff]
+
+        # Cutoffs are bucket-aligned and the source rows are deleted in the
+        # same transaction, so a bucket is never produced twice.
+        db.execute(
+            insert(PriceRollup).from_select(
+                ["item_id", "resolution", "ts", "min_cents", "max_cents", "sum_cents", "samples"],
+                select_stmt
+            )
+        )
+        result = db.execute(delete(source).where(*source_filter))
+        return result.rowcount or 0
+
+    def run_retention(self, db: Session, now: Optional[float] = None) -> Dict:
+        """
+        Downsample old history: raw -> hourly -> daily
+
+        Returns:
+            Counts of raw points and hourly buckets folded away
+        """
+        now = int(now if now is not None else time.time())
+        raw_cutoff = (now - settings.price_history_raw_days * DAY) // HOUR * HOUR
+        hourly_cutoff = (now - settings.price_history_hourly_days * DAY) // DAY * DAY
+
+        try:
+            raw_folded = self._roll_up(db, PricePoint, raw_cutoff, HOUR)
+            hourly_folded = self._roll_up(db, PriceRollup, hourly_cutoff, DAY)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        logger.info(f"Price history retention: {raw_folded} raw points, {hourly_folded} hourly buckets rolled up")
+        return {"raw_points_rolled_up": raw_folded, "hourly_buckets_rolled_up": hourly_folded}
+
+
+# Global history instance
+price_history = PriceHistoryService()
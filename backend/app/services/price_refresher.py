@@ -0,0 +1,283 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import logging
+from sqlalchemy import and_, case, distinct, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models import PriceCache, PriceRequestCount, SchedulerLease, Trade, PRICE_NOT_LISTED
+from app.services.price import price_service
+from app.services.price_history import price_history
+from app.services.rate_limiter import TokenBucket
+from app.utils.db_helpers import chunked
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "price_refresher"
+
+
+class PriceRefresher:
+    """
+    Background job keeping price_cache warm for items active users trade
+
+    Each cycle collects the distinct Trade.item_name values of users with
+    recent trades, orders them by how many units are held and how often
+    they're requested, and refreshes the ones about to expire within a
+    requests-per-minute budget.
+
+    Several API workers (or a standalone worker) may run this; a lease row in
+    scheduler_leases makes sure only one of them refreshes at a time. The
+    pause flag lives on the same row so it applies to whichever is leading.
+    """
+
+    def __init__(self):
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._bucket = TokenBucket(settings.price_refresher_requests_per_minute, burst=1)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self.is_leader = False
+        self.last_cycle_at: Optional[datetime] = None
+        self.last_cycle_targets = 0
+        self.last_cycle_refreshed = 0
+        self.total_refreshed = 0
+        self.last_retention_at = 0.0  # loop time of the last history retention run
+
+    # ---- lease -------------------------------------------------------------
+
+    def _acquire_lease(self, db: Session) -> bool:
+        """Take or renew the lease; False if another live holder owns it"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=settings.price_refresher_lease_seconds)
+
+        updated = db.query(SchedulerLease).filter(
+            SchedulerLease.name == LEASE_NAME,
+            or_(
+                SchedulerLease.holder == self.holder_id,
+                SchedulerLease.holder.is_(None),
+                SchedulerLease.expires_at < now
+            )
+        ).update(
+            {"holder": self.holder_id, "expires_at": expires_at, "updated_at": now},
+            synchronize_session=False
+        )
+
+        if updated:
+            db.commit()
+            return True
+
+        if db.query(SchedulerLease).filter(SchedulerLease.name == LEASE_NAME).first():
+            db.rollback()
+            return False
+
+        try:
+            db.add(SchedulerLease(name=LEASE_NAME, holder=self.holder_id, expires_at=expires_at))
+            db.commit()
+            return True
+        except IntegrityError:
+            # Another worker created the row first
+            db.rollback()
+            return False
+
+    def _release_lease(self, db: Session):
+        db.query(SchedulerLease).filter(
+            SchedulerLease.name == LEASE_NAME,
+            SchedulerLease.holder == self.holder_id
+        ).update({"holder": None, "expires_at": datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+
+    def _get_lease_row(self, db: Session) -> SchedulerLease:
+        lease = db.query(SchedulerLease).filter(SchedulerLease.name == LEASE_NAME).first()
+        if not lease:
+            lease = SchedulerLease(name=LEASE_NAME, holder=None, expires_at=datetime.utcnow())
+            db.add(lease)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                lease = db.query(SchedulerLease).filter(SchedulerLease.name == LEASE_NAME).first()
+        return lease
+
+    # ---- control -----------------------------------------------------------
+
+    def set_paused(self, db: Session, paused: bool):
+        """Pause or resume refreshing for every worker"""
+        lease = self._get_lease_row(db)
+        lease.paused = paused
+        db.commit()
+
+    def status(self, db: Session) -> Dict:
+        """Lease state plus this process's counters"""
+        lease = self._get_lease_row(db)
+        return {
+            "running_here": self._task is not None and not self._task.done(),
+            "is_leader": self.is_leader,
+            "holder_id": self.holder_id,
+            "lease_holder": lease.holder,
+            "lease_expires_at": lease.expires_at,
+            "paused": lease.paused,
+            "requests_per_minute": settings.price_refresher_requests_per_minute,
+            "last_cycle_at": self.last_cycle_at,
+            "last_cycle_targets": self.last_cycle_targets,
+            "last_cycle_refreshed": self.last_cycle_refreshed,
+            "total_refreshed": self.total_refreshed
+        }
+
+    # ---- work --------------------------------------------------------------
+
+    def collect_targets(self, db: Session) -> List[str]:
+        """
+        Item names worth refreshing, highest priority first
+
+        Priority is units currently held across active users plus how often
+        the item has been looked up (price_request_counts, summed over every
+        worker). Items whose cached price still has more than a fifth of its
+        TTL left are skipped (price_negative_ttl for not-listed entries).
+        """
+        since = datetime.utcnow() - timedelta(days=settings.price_refresher_active_days)
+        active_users = db.query(Trade.user_id).filter(Trade.timestamp >= since).distinct()
+
+        held = func.sum(case((Trade.trade_type == "BUY", 1), else_=-1))
+        rows = db.query(
+            Trade.item_name,
+            held.label("held"),
+            func.count(distinct(Trade.user_id)).label("holders")
+        ).filter(
+            Trade.user_id.in_(active_users),
+            Trade.item_name.isnot(None)
+        ).group_by(Trade.item_name).all()
+
+        if not rows:
+            return []
+
+        # Negative entries expire for readers after price_negative_ttl, not cache_ttl
+        now = datetime.utcnow()
+        refresh_before = now - timedelta(seconds=price_service.cache_ttl * 0.8)
+        refresh_negative_before = now - timedelta(seconds=settings.price_negative_ttl * 0.8)
+        names = [row.item_name for row in rows]
+        still_fresh = set()
+        requests = {}
+        price_service.flush_request_counts(db)
+        for chunk in chunked(names):
+            still_fresh.update(
+                name for (name,) in db.query(PriceCache.item_name).filter(
+                    PriceCache.item_name.in_(chunk),
+                    or_(
+                        and_(PriceCache.status != PRICE_NOT_LISTED, PriceCache.cached_at > refresh_before),
+                        and_(PriceCache.status == PRICE_NOT_LISTED, PriceCache.cached_at > refresh_negative_before)
+                    )
+                )
+            )
+            requests.update(
+                db.query(PriceRequestCount.item_name, PriceRequestCount.count).filter(
+                    PriceRequestCount.item_name.in_(chunk)
+                )
+            )
+
+        scored = [
+            (max(row.held or 0, 0) + row.holders + requests.get(row.item_name, 0), row.item_name)
+            for row in rows
+            if row.item_name not in still_fresh
+        ]
+        scored.sort(reverse=True)
+
+        return [name for _, name in scored]
+
+    async def run_cycle(self, db: Session) -> int:
+        """
+        Refresh one round of targets while holding the lease
+
+        Returns:
+            Number of prices refreshed
+        """
+        targets = self.collect_targets(db)
+        self.last_cycle_targets = len(targets)
+        renew_every = max(settings.price_refresher_lease_seconds / 3, 1)
+        last_renewal = asyncio.get_running_loop().time()
+
+        async def pace() -> bool:
+            nonlocal last_renewal
+            if self._stopping.is_set():
+                return False
+
+            now = asyncio.get_running_loop().time()
+            if now - last_renewal >= renew_every:
+                last_renewal = now
+                if not self._acquire_lease(db) or self._get_lease_row(db).paused:
+                    return False
+
+            await self._bucket.acquire()
+            return True
+
+        refreshed = await price_service.refresh_prices(targets, db, pace=pace)
+
+        self.last_cycle_at = datetime.utcnow()
+        self.last_cycle_refreshed = refreshed
+        self.total_refreshed += refreshed
+        logger.info(f"Price refresher cycle: {refreshed}/{len(targets)} refreshed")
+        return refreshed
+
+    def _maybe_run_retention(self, db: Session):
+        """Downsample price history at most every price_history_retention_interval"""
+        now = asyncio.get_running_loop().time()
+        if self.last_retention_at and now - self.last_retention_at < settings.price_history_retention_interval:
+            return
+        self.last_retention_at = now
+        price_history.run_retention(db)
+
+    async def run_forever(self):
+        """Leader-elected refresh loop; returns when stop() is called"""
+        logger.info(f"Price refresher started ({self.holder_id})")
+
+        while not self._stopping.is_set():
+            db = SessionLocal()
+            try:
+                self.is_leader = self._acquire_lease(db)
+                if self.is_leader and not self._get_lease_row(db).paused:
+                    await self.run_cycle(db)
+                    self._maybe_run_retention(db)
+            except Exception as e:
+                logger.error(f"Price refresher cycle failed: {e}")
+                db.rollback()
+            finally:
+                db.close()
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=settings.price_refresher_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        db = SessionLocal()
+        try:
+            self._release_lease(db)
+        finally:
+            db.close()
+        self.is_leader = False
+        logger.info("Price refresher stopped")
+
+    def start(self):
+        """Run the refresh loop as a background task on the current loop"""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def wait(self):
+        """Wait for the loop started by start() to finish (after stop())"""
+        task = self._task
+        if task is not None:
+            await task
+
+    async def stop(self):
+        """Stop the loop and give up the lease"""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+# Global refresher instance
+price_refresher = PriceRefresher()
@@ -0,0 +1,275 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from app.config import settings
+
+
+class TokenBucket:
+    """
+    Async token bucket for pacing outbound requests
+
+    Tokens refill continuously at `rate_per_minute`; up to `burst` tokens can
+    accumulate while idle. `acquire()` waits just long enough for the next
+    token instead of sleeping a fixed interval after every call.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None):
+        self.rate = max(rate_per_minute, 0.001) / 60.0  # tokens per second
+        self.capacity = float(burst if burst is not None else max(1, int(rate_per_minute // 60)))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def available(self) -> float:
+        """Tokens currently available (for status reporting)"""
+        self._refill()
+        return self.tokens
+
+
+class RateLimitedError(Exception):
+    """Raised when an upstream host can't be called right now"""
+
+    def __init__(self, host: str, reason: str, retry_in: float):
+        super().__init__(f"{host}: {reason} (retry in {retry_in:.0f}s)")
+        self.host = host
+        self.reason = reason
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Stops calling a host for a cooldown after repeated consecutive failures
+
+    closed -> open after `failure_threshold` failures in a row; open ->
+    half_open once `cooldown` seconds have passed, letting a single trial
+    request through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a trial request through"""
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now"""
+        if self.state == "open" and self.retry_in() == 0:
+            self.state = "half_open"
+            self._trial_in_flight = False
+
+        if self.state == "closed":
+            return True
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release(self):
+        """Give back a trial that ended without an outcome (e.g. cancelled)"""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+        self._trial_in_flight = False
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "retry_in": round(self.retry_in(), 1)
+        }
+
+
+class HostLimiter:
+    """Token bucket, Retry-After back-off and circuit breaker for one host"""
+
+    def __init__(self, host: str, rate_per_minute: float):
+        self.host = host
+        self.rate_per_minute = rate_per_minute
+        self.bucket = TokenBucket(rate_per_minute, settings.rate_limit_burst)
+        self.breaker = CircuitBreaker(
+            settings.circuit_breaker_failure_threshold,
+            settings.circuit_breaker_cooldown
+        )
+        self.blocked_until = 0.0  # monotonic time set from Retry-After
+        self.requests = 0
+        self.failures = 0
+        self.throttled = 0  # 429 responses
+        self.rejected = 0  # calls refused locally (open circuit / Retry-After)
+
+    async def acquire(self) -> bool:
+        """
+        Wait for permission to send one request
+
+        Once this returns, the caller owns the request's outcome: it must
+        end in record_response(), record_error() or release().
+
+        Returns:
+            True if this request is the half-open circuit's trial
+
+        Raises:
+            RateLimitedError: If the circuit is open or the host asked us to
+                back off for longer than `rate_limit_max_wait`
+        """
+        # Checked before the breaker, so a refusal never holds its trial
+        wait = self.blocked_until - time.monotonic()
+        if wait > settings.rate_limit_max_wait:
+            self.rejected += 1
+            raise RateLimitedError(self.host, "Retry-After", wait)
+
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise RateLimitedError(self.host, "circuit open", self.breaker.retry_in())
+        trial = self.breaker.state == "half_open"
+
+        try:
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if settings.rate_limit_enabled:
+                await self.bucket.acquire()
+        except BaseException:
+            # Cancelled while waiting: the trial (if ours) was never used
+            self.release(trial)
+            raise
+
+        self.requests += 1
+        return trial
+
+    def record_response(self, status_code: int, retry_after: Optional[str]):
+        """Feed a response back into the back-off and breaker state"""
+        if status_code == 429 or status_code == 503:
+            if status_code == 429:
+                self.throttled += 1
+            delay = parse_retry_after(retry_after)
+            if delay is None:
+                delay = settings.rate_limit_default_backoff
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+        if status_code == 429 or status_code >= 500:
+            self.failures += 1
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def record_error(self):
+        """Count a transport-level failure (timeout, connection reset, ...)"""
+        self.failures += 1
+        self.breaker.record_failure()
+
+    def release(self, trial: bool):
+        """
+        End a request without an outcome (cancelled): no success, no failure
+
+        Args:
+            trial: What acquire() returned; only the trial holder frees it
+        """
+        if trial:
+            self.breaker.release()
+
+    def stats(self) -> Dict:
+        return {
+            "rate_per_minute": self.rate_per_minute,
+            "tokens_available": round(self.bucket.available(), 2),
+            "blocked_for": round(max(0.0, self.blocked_until - time.monotonic()), 1),
+            "requests": self.requests,
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "circuit": self.breaker.stats()
+        }
+
+
+class OutboundLimiter:
+    """
+    Registry of HostLimiters shared by every outbound HTTP call
+
+    Per-host rates come from settings; hosts without a specific rate use
+    `max_requests_per_minute`.
+    """
+
+    def __init__(self):
+        self._hosts: Dict[str, HostLimiter] = {}
+
+    def _rate_for(self, host: str) -> float:
+        rates = {
+            "csfloat.com": settings.csfloat_requests_per_minute,
+            "steamcommunity.com": settings.steam_market_requests_per_minute
+        }
+        return rates.get(host, settings.max_requests_per_minute)
+
+    def get(self, host: str) -> HostLimiter:
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = HostLimiter(host, self._rate_for(host))
+            self._hosts[host] = limiter
+        return limiter
+
+    def reset(self, host: Optional[str] = None):
+        """Forget state for one host (or all), closing its circuit"""
+        if host is None:
+            self._hosts.clear()
+        else:
+            self._hosts.pop(host, None)
+
+    def stats(self) -> Dict:
+        return {
+            "rate_limit_enabled": settings.rate_limit_enabled,
+            "hosts": {host: limiter.stats() for host, limiter in sorted(self._hosts.items())}
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+# Global limiter shared by all pooled HTTP clients
+outbound_limiter = OutboundLimiter()
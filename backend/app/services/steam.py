@@ -2,6 +2,7 @@ import httpx
 import re
 from typing import Dict, List, Optional
 from app.config import settings
+from app.services.http_client import http_clients
 from urllib.parse import urlencode, parse_qs, urlparse
 import logging
 
@@ -80,14 +81,14 @@ class SteamService:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                players = data.get("response", {}).get("players", [])
-                if players:
-                    return players[0]
+            client = http_clients.get(url)
+            response = await client.get(url, params=params, timeout=10.0)
+            response.raise_for_status()
+            data = response.json()
+            
+            players = data.get("response", {}).get("players", [])
+            if players:
+                return players[0]
         except Exception as e:
             logger.error(f"Failed to get player summary for {steam_id}: {e}")
         
@@ -119,50 +120,50 @@ class SteamService:
                 params["start_assetid"] = start_assetid
             
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(url, params=params, timeout=30.0)
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    # Check if inventory is private
-                    if "error" in data:
-                        logger.error(f"Inventory error: {data['error']}")
-                        return {"items": [], "error": data["error"]}
-                    
-                    # Get assets and descriptions
-                    assets = data.get("assets", [])
-                    descriptions = data.get("descriptions", [])
+                client = http_clients.get(url)
+                response = await client.get(url, params=params, timeout=30.0)
+                response.raise_for_status()
+                data = response.json()
+                
+                # Check if inventory is private
+                if "error" in data:
+                    logger.error(f"Inventory error: {data['error']}")
+                    return {"items": [], "error": data["error"]}
+                
+                # Get assets and descriptions
+                assets = data.get("assets", [])
+                descriptions = data.get("descriptions", [])
+                
+                # Create description lookup
+                desc_map = {
+                    f"{d['classid']}_{d['instanceid']}": d 
+                    for d in descriptions
+                }
+                
+                # Combine assets with descriptions
+                for asset in assets:
+                    key = f"{asset['classid']}_{asset['instanceid']}"
+                    desc = desc_map.get(key, {})
                     
-                    # Create description lookup
-                    desc_map = {
-                        f"{d['classid']}_{d['instanceid']}": d 
-                        for d in descriptions
+                    item = {
+                        "asset_id": asset["assetid"],
+                        "name": desc.get("market_hash_name", "Unknown"),
+                        "icon_url": desc.get("icon_url", ""),
+                        "tradable": desc.get("tradable", 0) == 1,
+                        "marketable": desc.get("marketable", 0) == 1,
+                        "type": desc.get("type", ""),
+                        "rarity": self._extract_rarity(desc.get("tags", [])),
+                        "category": self._extract_category(desc.get("tags", [])),
                     }
                     
-                    # Combine assets with descriptions
-                    for asset in assets:
-                        key = f"{asset['classid']}_{asset['instanceid']}"
-                        desc = desc_map.get(key, {})
-                        
-                        item = {
-                            "asset_id": asset["assetid"],
-                            "name": desc.get("market_hash_name", "Unknown"),
-                            "icon_url": desc.get("icon_url", ""),
-                            "tradable": desc.get("tradable", 0) == 1,
-                            "marketable": desc.get("marketable", 0) == 1,
-                            "type": desc.get("type", ""),
-                            "rarity": self._extract_rarity(desc.get("tags", [])),
-                            "category": self._extract_category(desc.get("tags", [])),
-                        }
-                        
-                        all_items.append(item)
+                    all_items.append(item)
+                
+                # Check if there are more items
+                if data.get("more_items", 0) == 1:
+                    start_assetid = data.get("last_assetid")
+                else:
+                    break
                     
-                    # Check if there are more items
-                    if data.get("more_items", 0) == 1:
-                        start_assetid = data.get("last_assetid")
-                    else:
-                        break
-                        
             except httpx.HTTPError as e:
                 logger.error(f"HTTP error fetching inventory: {e}")
                 break
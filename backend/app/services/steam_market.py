@@ -1,12 +1,25 @@
-import httpx
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
 import logging
+from collections import deque
+from contextlib import aclosing
 from datetime import datetime
 import json
+from app.config import settings
+from app.services.http_client import http_clients, cookie_header
+from app.services.market_parser import parse_market_page_async
 
 logger = logging.getLogger(__name__)
 
 
+class MarketHistoryError(Exception):
+    """A market history page couldn't be fetched, even after retries"""
+    
+    def __init__(self, start: int):
+        super().__init__(f"Failed to fetch market history page at offset {start}")
+        self.start = start
+
+
 class SteamMarketService:
     """Service for fetching Steam Market transaction history"""
     
@@ -17,17 +30,28 @@ class SteamMarketService:
     async def fetch_market_history(
         self, 
         cookies: str,
-        count: int = 500
+        count: Optional[int] = None,
+        known_row_id: Optional[str] = None,
+        known_timestamp: Optional[datetime] = None
     ) -> Dict:
         """
         Fetch Steam Market transaction history using browser cookies
         
+        Collects `iter_history_pages` into one list. History is returned
+        newest first; when a high-water mark from a previous import is given,
+        only the rows newer than it are returned.
+        
         Args:
             cookies: Browser cookies string (format: "name1=value1; name2=value2")
-            count: Number of transactions to fetch (max 500 per request)
+            count: Number of transactions to fetch (None for the full history,
+                   up to settings.market_history_max_rows)
+            known_row_id: row_id of the newest previously imported row
+            known_timestamp: Its timestamp; rows older than this are known too
             
         Returns:
-            Dict with 'success', 'transactions', and 'total_count'
+            Dict with 'success', 'transactions', 'total_count', 'pages',
+            'reached_known' and 'complete' (no unfetched rows remain between
+            the returned rows and the high-water mark / end of history)
         """
         try:
             # Parse cookies string into dict
@@ -40,37 +64,41 @@ class SteamMarketService:
                     "transactions": []
                 }
             
-            # Fetch market history
             transactions = []
-            start = 0
-            
-            while start < count:
-                batch = await self._fetch_batch(
-                    cookie_dict,
-                    start=start,
-                    count=min(100, count - start)  # Steam limits to 100 per call
-                )
-                
-                if not batch["success"]:
-                    break
-                
-                batch_transactions = batch.get("transactions", [])
-                if not batch_transactions:
-                    break
-                
-                transactions.extend(batch_transactions)
-                start += len(batch_transactions)
-                
-                # If we got less than requested, we're done
-                if len(batch_transactions) < 100:
-                    break
+            pages = 0
+            last = None
             
-            logger.info(f"Fetched {len(transactions)} market transactions")
+            try:
+                async with aclosing(self.iter_history_pages(
+                    cookie_dict, count=count, known_row_id=known_row_id, known_timestamp=known_timestamp
+                )) as history:
+                    async for page in history:
+                        transactions.extend(page["transactions"])
+                        pages += 1
+                        last = page
+            except MarketHistoryError as e:
+                if last is None:
+                    return {
+                        "success": False,
+                        "error": "Steam did not return market history (check your cookies)",
+                        "transactions": []
+                    }
+                logger.warning(f"Stopping market history fetch early: {e}")
+                last = None
+            
+            reached_known = bool(last and last["reached_known"])
+            logger.info(
+                f"Fetched {len(transactions)} market transactions in {pages} pages"
+                + (" (stopped at already-imported rows)" if reached_known else "")
+            )
             
             return {
                 "success": True,
                 "transactions": transactions,
-                "total_count": len(transactions)
+                "total_count": len(transactions),
+                "pages": pages,
+                "reached_known": reached_known,
+                "complete": bool(last and last["complete"])
             }
             
         except Exception as e:
@@ -81,6 +109,141 @@ class SteamMarketService:
                 "transactions": []
             }
     
+    async def iter_history_pages(
+        self,
+        cookies: Dict,
+        start: int = 0,
+        count: Optional[int] = None,
+        known_row_id: Optional[str] = None,
+        known_timestamp: Optional[datetime] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield market history pages in order, fetching ahead concurrently
+        
+        The page at `start` reports Steam's total_count; later offsets are
+        then fetched up to market_history_fetch_concurrency pages ahead of the
+        consumer (still subject to the steamcommunity.com rate limiter), each
+        retried individually. Iteration stops at the high-water mark, a short
+        page, or `count` rows from the top of the history.
+        
+        Args:
+            cookies: Cookie dict
+            start: Offset to start from (resuming an interrupted import)
+            count: Rows from the top to cover (None for the full history,
+                   up to settings.market_history_max_rows)
+            known_row_id: row_id of the newest previously imported row
+            known_timestamp: Its timestamp; rows older than this are known too
+            
+        Yields:
+            Dicts with 'start', 'count', 'rows' (parsed), 'transactions' (rows
+            newer than the mark), 'html' (raw results_html), 'total_count',
+            'reached_known', 'last' and
+            'complete' (last page, and nothing unfetched remains before the
+            mark / end of history)
+            
+        Raises:
+            MarketHistoryError: A page still failed after retries
+        """
+        page_size = settings.market_history_page_size
+        limit = min(count or settings.market_history_max_rows, settings.market_history_max_rows)
+        if start >= limit:
+            return
+        
+        first = await self._fetch_page(cookies, start, min(page_size, limit - start))
+        if not first["success"]:
+            raise MarketHistoryError(start)
+        
+        # total_count is Steam's size of the whole history; without it,
+        # fetch up to the limit and stop at the first short page
+        total = first.get("total_count") or 0
+        end = min(limit, total or limit)
+        offsets = iter(range(start + page_size, end, page_size))
+        pending = deque()
+        
+        def schedule():
+            while len(pending) < settings.market_history_fetch_concurrency:
+                offset = next(offsets, None)
+                if offset is None:
+                    return
+                size = min(page_size, end - offset)
+                pending.append((offset, size, asyncio.create_task(self._fetch_page(cookies, offset, size))))
+        
+        try:
+            offset, size, batch = start, min(page_size, limit - start), first
+            
+            while True:
+                rows = batch.get("transactions", [])
+                new_rows, reached_known = self._split_at_known(rows, known_row_id, known_timestamp)
+                
+                # If Steam sent fewer rows than requested, we're done. Count
+                # the page's rows, not the parsed ones: a row the parser
+                # dropped must not end the import and move the mark past
+                # history we never fetched.
+                exhausted = batch.get("row_count", len(rows)) < size or 0 < total <= offset + size
+                last = reached_known or exhausted or offset + size >= end
+                
+                if not last:
+                    schedule()
+                
+                yield {
+                    "start": offset,
+                    "count": size,
+                    "rows": len(rows),
+                    "transactions": new_rows,
+                    "html": batch.get("results_html", ""),
+                    "total_count": total,
+                    "reached_known": reached_known,
+                    "last": last,
+                    "complete": reached_known or exhausted
+                }
+                
+                if last or not pending:
+                    return
+                
+                offset, size, task = pending.popleft()
+                batch = await task
+                if not batch["success"]:
+                    raise MarketHistoryError(offset)
+        finally:
+            for _, _, task in pending:
+                task.cancel()
+    
+    async def _fetch_page(self, cookies: Dict, start: int, count: int) -> Dict:
+        """_fetch_batch with retries and exponential back-off"""
+        batch = await self._fetch_batch(cookies, start=start, count=count)
+        
+        for attempt in range(settings.market_history_page_retries):
+            if batch["success"]:
+                break
+            await asyncio.sleep(settings.market_history_retry_backoff * 2 ** attempt)
+            logger.info(f"Retrying market history page at {start} (attempt {attempt + 2})")
+            batch = await self._fetch_batch(cookies, start=start, count=count)
+        
+        return batch
+    
+    def _split_at_known(
+        self,
+        rows: List[Dict],
+        known_row_id: Optional[str],
+        known_timestamp: Optional[datetime]
+    ) -> Tuple[List[Dict], bool]:
+        """
+        Cut a newest-first page at the first already-imported row
+        
+        Returns:
+            (rows newer than the high-water mark, whether the mark was reached)
+        """
+        if not known_row_id and not known_timestamp:
+            return rows, False
+        
+        for i, row in enumerate(rows):
+            if known_row_id and row.get("row_id") == known_row_id:
+                return rows[:i], True
+            if known_timestamp and row["timestamp"] < known_timestamp:
+                return rows[:i], True
+        
+        return rows, False
+    
     async def _fetch_batch(
         self,
         cookies: Dict,
@@ -108,99 +271,45 @@ class SteamMarketService:
             "Accept": "*/*",
             "Accept-Language": "en-US,en;q=0.9",
             "Referer": "https://steamcommunity.com/market/",
-            "X-Requested-With": "XMLHttpRequest"
+            "X-Requested-With": "XMLHttpRequest",
+            # Sent per request: the pooled client is shared between users
+            "Cookie": cookie_header(cookies)
         }
         
         try:
-            async with httpx.AsyncClient(cookies=cookies, headers=headers) as client:
-                response = await client.get(
-                    self.render_url,
-                    params=params,
-                    timeout=30.0
-                )
-                
-                if response.status_code != 200:
-                    logger.error(f"HTTP {response.status_code} from Steam market")
-                    return {"success": False, "transactions": []}
-                
-                data = response.json()
-                
-                if not data.get("success"):
-                    logger.error(f"Steam API error: {data.get('error', 'Unknown')}")
-                    return {"success": False, "transactions": []}
-                
-                # Parse HTML to extract transactions
-                transactions = self._parse_market_html(data.get("results_html", ""))
-                
-                return {
-                    "success": True,
-                    "transactions": transactions,
-                    "total_count": data.get("total_count", 0)
-                }
-                
+            client = http_clients.get(self.render_url)
+            response = await client.get(
+                self.render_url,
+                params=params,
+                headers=headers,
+                timeout=30.0
+            )
+            
+            if response.status_code != 200:
+                logger.error(f"HTTP {response.status_code} from Steam market")
+                return {"success": False, "transactions": []}
+            
+            data = response.json()
+            
+            if not data.get("success"):
+                logger.error(f"Steam API error: {data.get('error', 'Unknown')}")
+                return {"success": False, "transactions": []}
+            
+            # Parse HTML to extract transactions (off the event loop)
+            transactions, row_count = await parse_market_page_async(data.get("results_html", ""))
+            
+            return {
+                "success": True,
+                "transactions": transactions,
+                "row_count": row_count,  # rows on the page, parsed or not
+                "total_count": data.get("total_count", 0),
+                "results_html": data.get("results_html", "")
+            }
+            
         except Exception as e:
             logger.error(f"Error in _fetch_batch: {e}")
             return {"success": False, "transactions": []}
     
-    def _parse_market_html(self, html: str) -> List[Dict]:
-        """
-        Parse Steam market history HTML to extract transactions
-        
-        This is a simplified parser - you might need to adjust based on actual HTML structure
-        """
-        from bs4 import BeautifulSoup
-        
-        transactions = []
-        
-        try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Find all market history rows
-            rows = soup.find_all('div', class_='market_listing_row')
-            
-            for row in rows:
-                try:
-                    # Extract item name
-                    name_elem = row.find('span', class_='market_listing_item_name')
-                    item_name = name_elem.text.strip() if name_elem else "Unknown"
-                    
-                    # Extract price
-                    price_elem = row.find('span', class_='market_listing_price')
-                    price_text = price_elem.text.strip() if price_elem else "$0.00"
-                    price = self._parse_price(price_text)
-                    
-                    # Extract date
-                    date_elem = row.find('div', class_='market_listing_listed_date')
-                    date_text = date_elem.text.strip() if date_elem else ""
-                    timestamp = self._parse_date(date_text)
-                    
-                    # Determine if it's a buy or sell
-                    # (Steam shows "+" for bought, "-" for sold in the gain/loss column)
-                    gain_elem = row.find('div', class_='market_listing_gainorloss')
-                    is_purchase = True
-                    if gain_elem:
-                        gain_text = gain_elem.text.strip()
-                        is_purchase = not gain_text.startswith('-')
-                    
-                    transaction = {
-                        "item_name": item_name,
-                        "price": price,
-                        "trade_type": "BUY" if is_purchase else "SELL",
-                        "timestamp": timestamp,
-                        "source": "steam_market"
-                    }
-                    
-                    transactions.append(transaction)
-                    
-                except Exception as e:
-                    logger.warning(f"Error parsing transaction row: {e}")
-                    continue
-            
-        except Exception as e:
-            logger.error(f"Error parsing market HTML: {e}")
-        
-        return transactions
-    
     def _parse_cookies(self, cookie_string: str) -> Dict:
         """
         Parse cookie string into dictionary
@@ -219,37 +328,3 @@ class SteamMarketService:
             logger.error(f"Error parsing cookies: {e}")
         
         return cookies
-    
-    def _parse_price(self, price_text: str) -> float:
-        """
-        Parse price string to float
-        
-        Examples: "$1.23", "Rp 15,000", "€2.50"
-        """
-        try:
-            # Remove currency symbols and commas
-            cleaned = price_text.replace('$', '').replace('€', '').replace('£', '')
-            cleaned = cleaned.replace('Rp', '').replace(',', '').strip()
-            
-            return float(cleaned)
-        except:
-            return 0.0
-    
-    def _parse_date(self, date_text: str) -> datetime:
-        """
-        Parse Steam date format to datetime
-        
-        Examples: "13 Feb", "13 Feb, 2026"
-        """
-        try:
-            # Steam uses format like "13 Feb" or "13 Feb @ 4:39pm"
-            # For simplicity, use current year if year not specified
-            from dateutil import parser
-            
-            # Try to parse with dateutil
-            dt = parser.parse(date_text, fuzzy=True)
-            return dt
-            
-        except:
-            # Fallback to current datetime
-            return datetime.utcnow()
@@ -0,0 +1,182 @@
+"""
+Helper functions for set-based database operations
+"""
+from typing import Dict, Iterable, Iterator, List, Sequence
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# Stay well below SQLite's bound-parameter limit for IN (...) lists
+IN_CHUNK_SIZE = 500
+
+# Rows handed to the driver per executemany call
+BULK_CHUNK_SIZE = 5000
+
+
+def chunked(values: Sequence, size: int = IN_CHUNK_SIZE) -> Iterator[Sequence]:
+    """Yield consecutive slices of `values` with at most `size` elements"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def dialect_insert(db: Session, model):
+    """
+    Build an INSERT for `model` (a mapped class or Table) that supports ON CONFLICT when the dialect does
+
+    Returns:
+        A SQLite/Postgres dialect insert, or a generic insert otherwise
+    """
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    return insert(model)
+
+
+def supports_on_conflict(db: Session) -> bool:
+    """Whether the session's dialect understands INSERT ... ON CONFLICT"""
+    return db.get_bind().dialect.name in ("sqlite", "postgresql")
+
+
+def bulk_upsert(
+    db: Session,
+    model,
+    rows: List[Dict],
+    conflict_columns: Iterable[str],
+    update_columns: Iterable[str],
+    chunk_size: int = BULK_CHUNK_SIZE
+):
+    """
+    Insert rows, updating `update_columns` where `conflict_columns` collide
+
+    Compiles one INSERT ... ON CONFLICT DO UPDATE and executes it with the
+    rows as a parameter list, which the driver batches (insertmanyvalues)
+    without re-compiling a giant VALUES clause per chunk. Does not commit;
+    the caller owns the transaction.
+
+    Args:
+        db: Database session
+        model: Mapped model class
+        rows: Column dicts, all with the same keys
+        conflict_columns: Columns of the unique constraint to upsert on
+        update_columns: Columns overwritten on conflict
+        chunk_size: Rows per executemany call
+    """
+    if not rows:
+        return
+
+    conflict_columns = list(conflict_columns)
+    update_columns = list(update_columns)
+
+    if not supports_on_conflict(db):
+        # Portable fallback: one merge per row keyed on the conflict columns
+        table = model.__table__
+        for row in rows:
+            existing = db.query(model).filter(
+                *[table.c[col] == row[col] for col in conflict_columns]
+            ).first()
+            if existing:
+                for col in update_columns:
+                    setattr(existing, col, row[col])
+            else:
+                db.add(model(**row))
+        db.flush()
+        return
+
+    stmt = dialect_insert(db, model.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_={col: stmt.excluded[col] for col in update_columns}
+    )
+    for chunk in chunked(rows, chunk_size):
+        db.execute(stmt, list(chunk))
+
+
+def bulk_increment(
+    db: Session,
+    model,
+    rows: List[Dict],
+    conflict_columns: Iterable[str],
+    increment_columns: Iterable[str],
+    chunk_size: int = BULK_CHUNK_SIZE
+):
+    """
+    Insert rows, adding to `increment_columns` where `conflict_columns` collide
+
+    Like bulk_upsert, but the stored value becomes stored + new instead of
+    new, so concurrent writers' counts add up. Does not commit.
+
+    Args:
+        db: Database session
+        model: Mapped model class
+        rows: Column dicts, all with the same keys
+        conflict_columns: Columns of the unique constraint to upsert on
+        increment_columns: Numeric columns summed on conflict
+        chunk_size: Rows per executemany call
+    """
+    if not rows:
+        return
+
+    conflict_columns = list(conflict_columns)
+    increment_columns = list(increment_columns)
+    table = model.__table__
+
+    if not supports_on_conflict(db):
+        for row in rows:
+            updated = db.query(model).filter(
+                *[table.c[col] == row[col] for col in conflict_columns]
+            ).update(
+                {table.c[col]: table.c[col] + row[col] for col in increment_columns},
+                synchronize_session=False
+            )
+            if not updated:
+                db.add(model(**row))
+        db.flush()
+        return
+
+    stmt = dialect_insert(db, table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_={
+            **{col: stmt.excluded[col] for col in rows[0] if col not in conflict_columns},
+            **{col: table.c[col] + stmt.excluded[col] for col in increment_columns}
+        }
+    )
+    for chunk in chunked(rows, chunk_size):
+        db.execute(stmt, list(chunk))
+
+
+def bulk_insert_ignore(
+    db: Session,
+    model,
+    rows: List[Dict],
+    chunk_size: int = BULK_CHUNK_SIZE
+):
+    """
+    Insert rows, silently skipping any that collide with a unique constraint
+
+    Uses INSERT ... ON CONFLICT DO NOTHING where supported; elsewhere falls
+    back to one INSERT per row, each in a savepoint so a duplicate only
+    skips that row. Does not commit.
+    """
+    if not rows:
+        return
+
+    stmt = dialect_insert(db, model.__table__)
+
+    if not supports_on_conflict(db):
+        # Portable fallback: a failed row rolls back to its own savepoint
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    db.execute(stmt, row)
+            except IntegrityError:
+                pass
+        return
+
+    stmt = stmt.on_conflict_do_nothing()
+    for chunk in chunked(rows, chunk_size):
+        db.execute(stmt, list(chunk))
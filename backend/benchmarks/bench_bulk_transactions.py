@@ -0,0 +1,118 @@
+"""
+Benchmark: one POST /api/transactions/ per row vs POST /api/transactions/bulk
+
+Sends the same randomized manual transactions (out of time order, so the
+P&L summary also has to rebuild items) to two empty databases through the
+API, one request per row and as a single bulk request (JSON array and
+NDJSON). Checks the stored trades and P&L summaries end up identical.
+
+Run from the backend directory:
+    python -m benchmarks.bench_bulk_transactions [rows ...]
+"""
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.database import get_db
+from app.main import app
+from app.models import Trade
+from app.services.pnl import compute_pnl
+from app.services.pnl_summary import check_user
+from benchmarks.bench_pnl import BenchDatabase, same
+
+
+def make_rows(rng: random.Random, n: int) -> list:
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "item_name": f"Item {rng.randrange(200)}",
+            "trade_type": rng.choice(("BUY", "BUY", "SELL")),
+            "price": round(rng.uniform(0.03, 500), 2),
+            "fee": rng.choice((0.0, 0.5)),
+            # Unique seconds: manual trade_ids are per item and second
+            "timestamp": (start + timedelta(seconds=i * 7 + rng.randrange(7))).isoformat()
+        }
+        for i in rng.sample(range(n * 4), n)
+    ]
+
+
+def run(label: str, n: int, send) -> dict:
+    bench = BenchDatabase()
+    session = sessionmaker(bind=bench.engine, autoflush=False)
+
+    def override_db():
+        db = session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_db
+    try:
+        user_id = bench.add_user(1)
+        client = TestClient(app)
+        t0 = time.perf_counter()
+        send(client, user_id)
+        elapsed = time.perf_counter() - t0
+
+        assert check_user(bench.db, user_id) == [], f"{label}: summary inconsistent"
+        trades = sorted(
+            (trade_id, trade_type, price, timestamp)
+            for trade_id, trade_type, price, timestamp in bench.db.query(
+                Trade.trade_id, Trade.trade_type, Trade.price, Trade.timestamp
+            )
+        )
+        pnl = compute_pnl(bench.db, user_id)
+        print(f"  {label:<12} rows={n:<7} {elapsed:8.3f}s  ({n / elapsed:9.0f} rows/s)")
+        return {"trades": trades, "pnl": pnl}
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        bench.close()
+
+
+def one_by_one(rows: list):
+    def send(client, user_id):
+        for row in rows:
+            assert client.post(f"/api/transactions/?user_id={user_id}", json=row).status_code == 200
+    return send
+
+
+def bulk_json(rows: list):
+    def send(client, user_id):
+        report = client.post(f"/api/transactions/bulk?user_id={user_id}", json=rows).json()
+        assert report["created"] == len(rows), report
+    return send
+
+
+def bulk_ndjson(rows: list):
+    def send(client, user_id):
+        body = "\n".join(json.dumps(row) for row in rows).encode("utf-8")
+        report = client.post(
+            f"/api/transactions/bulk?user_id={user_id}", content=body,
+            headers={"Content-Type": "application/x-ndjson"}
+        ).json()
+        assert report["created"] == len(rows), report
+    return send
+
+
+def main(sizes: list):
+    for n in sizes:
+        rows = make_rows(random.Random(n), n)
+        results = [
+            run("one-by-one", n, one_by_one(rows)),
+            run("bulk JSON", n, bulk_json(rows)),
+            run("bulk NDJSON", n, bulk_ndjson(rows))
+        ]
+        for result in results[1:]:
+            assert result["trades"] == results[0]["trades"], "stored trades differ"
+            assert same(results[0]["pnl"], result["pnl"]), f"{results[0]['pnl']} != {result['pnl']}"
+        print("  results identical")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 5000])
@@ -0,0 +1,106 @@
+"""
+Benchmark: per-call httpx.AsyncClient vs the shared pooled client registry
+
+Starts a local HTTP/1.1 keep-alive stub server, issues the same number of
+price-style GET requests both ways and reports how many TCP connections
+(handshakes) the server accepted plus p50/p99 latency per call.
+
+Run from the backend directory:
+    python -m benchmarks.bench_http_client [requests]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+from app.config import settings
+from app.services.http_client import HTTPClientRegistry
+
+# Measure connection reuse, not the outbound rate limiter
+settings.rate_limit_enabled = False
+
+BODY = b'{"data": [{"price": 123}, {"price": 125}, {"price": 130}]}'
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: " + str(len(BODY)).encode() + b"\r\n"
+    b"Connection: keep-alive\r\n\r\n" + BODY
+)
+
+
+class StubServer:
+    """Minimal keep-alive HTTP server that counts accepted connections"""
+
+    def __init__(self):
+        self.connections = 0
+        self.server = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                if not head:
+                    break
+                writer.write(RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/api/v1/listings"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def run_per_call(url: str, n: int) -> list:
+    latencies = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            await client.get(url, params={"market_hash_name": "AK-47 | Redline"})
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+async def run_pooled(url: str, n: int) -> list:
+    registry = HTTPClientRegistry()
+    latencies = []
+    try:
+        for _ in range(n):
+            t0 = time.perf_counter()
+            client = registry.get(url)
+            await client.get(url, params={"market_hash_name": "AK-47 | Redline"})
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        await registry.aclose()
+    return latencies
+
+
+def report(label: str, latencies: list, connections: int):
+    ordered = sorted(latencies)
+    p50 = statistics.median(ordered) * 1000
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000
+    print(f"{label:<10} calls={len(ordered):<6} handshakes={connections:<6} "
+          f"p50={p50:.3f}ms p99={p99:.3f}ms")
+
+
+async def main(n: int):
+    for label, runner in (("per-call", run_per_call), ("pooled", run_pooled)):
+        server = StubServer()
+        url = await server.start()
+        latencies = await runner(url, n)
+        await server.stop()
+        report(label, latencies, server.connections)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,69 @@
+"""
+Benchmark: list.pop(0) FIFO matching vs the deque-based LotMatcher
+
+Feeds the same synthetic history of one heavily traded item (all buys
+first, then the sells: the worst case for pop(0)) to both matchers, checks
+the win/loss counts agree and reports the time per trade. The list version
+grows quadratically; LotMatcher stays flat.
+
+Run from the backend directory:
+    python -m benchmarks.bench_lot_matching [trades ...]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.services.lot_matching import LotMatcher
+
+
+def make_history(n: int) -> list:
+    rng = random.Random(n)
+    start = datetime(2024, 1, 1)
+    buys = n // 2
+    return [
+        (i, "AK-47 | Redline (Field-Tested)", "BUY" if i < buys else "SELL",
+         round(rng.uniform(5, 15), 2), 0.0, start + timedelta(minutes=i))
+        for i in range(n)
+    ]
+
+
+def legacy_match(trades: list) -> dict:
+    """The original matching loop: buys.pop(0) on a Python list"""
+    buys = []
+    profitable = losing = 0
+    for _, _, trade_type, price, _, _ in trades:
+        if trade_type == "BUY":
+            buys.append(price)
+        elif buys:
+            buy_price = buys.pop(0)
+            if price > buy_price:
+                profitable += 1
+            elif price < buy_price:
+                losing += 1
+    return {"profitable": profitable, "losing": losing}
+
+
+def lot_match(trades: list) -> dict:
+    totals = LotMatcher().add_all(trades).totals()
+    return {"profitable": totals["profitable"], "losing": totals["losing"]}
+
+
+def timed(label: str, match, trades: list) -> dict:
+    t0 = time.perf_counter()
+    result = match(trades)
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<10} trades={len(trades):<8} {elapsed:8.3f}s {elapsed / len(trades) * 1e6:8.2f} us/trade")
+    return result
+
+
+def main(sizes: list):
+    for n in sizes:
+        trades = make_history(n)
+        legacy = timed("list.pop", legacy_match, trades)
+        lots = timed("LotMatcher", lot_match, trades)
+        assert legacy == lots, f"{legacy} != {lots}"
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [50_000, 200_000, 800_000])
@@ -0,0 +1,116 @@
+"""
+Benchmark: per-row market history import vs set-based dedupe + bulk insert
+
+Imports the same synthetic Steam Market history into a fresh SQLite
+database both ways, with a share of the rows already present, checks that
+imported/skipped counts and the stored trades match, and reports rows/sec.
+
+Run from the backend directory:
+    python -m benchmarks.bench_market_import [rows ...]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Trade, User
+from app.services.market_import import market_trade_id, store_market_transactions
+
+ALREADY_IMPORTED = 0.3  # share of rows stored by a previous import
+
+
+def make_history(n: int) -> list:
+    rng = random.Random(n)
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "row_id": f"history_row_{i}",
+            "item_name": f"Item {rng.randrange(2000)}",
+            "price": round(rng.uniform(0.03, 500), 2),
+            "trade_type": rng.choice(("BUY", "SELL")),
+            "timestamp": start + timedelta(minutes=i),
+            "source": "steam_market"
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_import(db, user_id: int, transactions: list):
+    """The original loop: one SELECT per row, ORM objects added one by one"""
+    imported = 0
+    skipped = 0
+
+    for tx in transactions:
+        trade_id = market_trade_id(user_id, tx)
+        if db.query(Trade).filter(Trade.trade_id == trade_id).first():
+            skipped += 1
+            continue
+
+        price = tx.get("price", 0)
+        fee = price * 0.05
+        net_amount = -(price + fee) if tx["trade_type"] == "BUY" else price - fee
+        db.add(Trade(
+            user_id=user_id,
+            trade_id=trade_id,
+            trade_type=tx["trade_type"],
+            item_name=tx["item_name"],
+            price=price,
+            fee=fee,
+            net_amount=net_amount,
+            source="steam_market",
+            timestamp=tx["timestamp"]
+        ))
+        imported += 1
+
+    return imported, skipped
+
+
+def run(label: str, importer, transactions: list):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    try:
+        user = User(unique_id="benchbenchbench1", steam_id="76561190000000000")
+        db.add(user)
+        db.commit()
+
+        previous = transactions[:int(len(transactions) * ALREADY_IMPORTED)]
+        store_market_transactions(db, user.id, previous)
+        db.commit()
+
+        t0 = time.perf_counter()
+        counts = importer(db, user.id, transactions)
+        db.commit()
+        elapsed = time.perf_counter() - t0
+
+        stored = sorted(
+            db.query(Trade.trade_id, Trade.trade_type, Trade.price, Trade.fee, Trade.net_amount, Trade.timestamp)
+        )
+        print(f"{label:<10} rows={len(transactions):<7} imported={counts[0]:<7} skipped={counts[1]:<7} "
+              f"{elapsed:8.3f}s {len(transactions) / elapsed:10.0f} rows/sec")
+        return counts, stored
+    finally:
+        db.close()
+        engine.dispose()
+        os.remove(path)
+
+
+def main(sizes: list):
+    for n in sizes:
+        transactions = make_history(n)
+        legacy = run("per-row", legacy_import, transactions)
+        bulk = run("set-based", store_market_transactions, transactions)
+        assert legacy == bulk, "imported/skipped counts or stored trades differ"
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
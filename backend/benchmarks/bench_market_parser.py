@@ -0,0 +1,184 @@
+"""
+Benchmark: BeautifulSoup/html.parser market history parser vs the lxml engine
+
+Parses the saved results_html fixture pages with both parsers, asserts the
+output is identical and reports rows/sec. Then measures the longest event
+loop stall while a batch of pages is parsed inline vs on the parser pool.
+
+Run from the backend directory:
+    python -m benchmarks.bench_market_parser [repeats]
+"""
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from app.services.market_parser import parse_market_html, parse_market_html_async
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "market_history")
+
+
+def legacy_parse_price(price_text: str) -> float:
+    try:
+        cleaned = price_text.replace('$', '').replace('€', '').replace('£', '')
+        cleaned = cleaned.replace('Rp', '').replace(',', '').strip()
+        return float(cleaned)
+    except:
+        return 0.0
+
+
+def legacy_parse_date(date_text: str) -> datetime:
+    try:
+        from dateutil import parser
+        return parser.parse(date_text, fuzzy=True)
+    except:
+        return datetime.utcnow()
+
+
+def legacy_parse_market_html(html: str) -> list:
+    """The original SteamMarketService._parse_market_html"""
+    from bs4 import BeautifulSoup
+
+    transactions = []
+    soup = BeautifulSoup(html, 'html.parser')
+
+    for row in soup.find_all('div', class_='market_listing_row'):
+        row_id = row.get('id')
+
+        name_elem = row.find('span', class_='market_listing_item_name')
+        item_name = name_elem.text.strip() if name_elem else "Unknown"
+
+        price_elem = row.find('span', class_='market_listing_price')
+        price_text = price_elem.text.strip() if price_elem else "$0.00"
+        price = legacy_parse_price(price_text)
+
+        date_elem = row.find('div', class_='market_listing_listed_date')
+        date_text = date_elem.text.strip() if date_elem else ""
+        timestamp = legacy_parse_date(date_text)
+
+        gain_elem = row.find('div', class_='market_listing_gainorloss')
+        is_purchase = True
+        if gain_elem:
+            is_purchase = not gain_elem.text.strip().startswith('-')
+
+        transactions.append({
+            "row_id": row_id or f"{item_name}|{timestamp.isoformat()}|{price}",
+            "item_name": item_name,
+            "price": price,
+            "trade_type": "BUY" if is_purchase else "SELL",
+            "timestamp": timestamp,
+            "source": "steam_market"
+        })
+
+    return transactions
+
+
+def missing_date_page() -> str:
+    """Rows whose listed-date cell is absent, empty or unparseable"""
+    rows = [
+        ("history_row_1_1", '<div class="market_listing_listed_date">13 Feb</div>'),
+        ("history_row_2_1", ""),
+        ("history_row_3_1", '<div class="market_listing_listed_date">  </div>'),
+        ("history_row_4_1", '<div class="market_listing_listed_date">Listed</div>')
+    ]
+    return "".join(
+        f'<div class="market_listing_row market_recent_listing_row" id="{row_id}">'
+        f'<div class="market_listing_gainorloss">-</div>{date}'
+        f'<span class="market_listing_price">$1.23</span>'
+        f'<span class="market_listing_item_name">AK-47 | Redline (Field-Tested)</span></div>'
+        for row_id, date in rows
+    )
+
+
+def check_missing_dates():
+    """Rows without a usable date get the current time, like the original"""
+    page = missing_date_page()
+    before = datetime.utcnow()
+    fast, legacy = parse_market_html(page), legacy_parse_market_html(page)
+    after = datetime.utcnow()
+
+    assert [{**row, "timestamp": None} for row in fast] == [{**row, "timestamp": None} for row in legacy]
+    assert fast[0]["timestamp"] == legacy[0]["timestamp"], "dated row differs"
+    for row in fast[1:] + legacy[1:]:
+        assert before <= row["timestamp"] <= after, f"{row['row_id']}: {row['timestamp']} is not the current time"
+
+    # Reprocessing an archived page: the time it was fetched instead
+    fetched_at = datetime(2025, 3, 4, 15, 30)
+    assert all(row["timestamp"] == fetched_at for row in parse_market_html(page, fetched_at)[1:])
+    print("rows without a listed date: current time, as the original")
+
+
+def load_pages() -> list:
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            pages.append(json.load(f)["results_html"])
+    return pages
+
+
+def time_parser(label: str, parse, pages: list, repeats: int) -> float:
+    rows = 0
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        for page in pages:
+            rows += len(parse(page))
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<14} rows={rows:<7} {elapsed:8.3f}s {rows / elapsed:10.0f} rows/sec")
+    return elapsed
+
+
+async def max_loop_stall(parse_batch) -> float:
+    """Longest gap between 1 ms ticks of a coroutine while parse_batch runs"""
+    stall = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stall = max(stall, now - last)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    await parse_batch()
+    done = True
+    await task
+    return stall
+
+
+async def measure_stalls(pages: list):
+    async def inline():
+        for page in pages:
+            parse_market_html(page)
+
+    async def pooled():
+        for page in pages:
+            await parse_market_html_async(page)
+
+    print(f"event loop max stall: inline={await max_loop_stall(inline) * 1000:.1f}ms "
+          f"pooled={await max_loop_stall(pooled) * 1000:.1f}ms")
+
+
+def main(repeats: int):
+    pages = load_pages()
+
+    for page in pages:
+        assert parse_market_html(page) == legacy_parse_market_html(page), "parser output differs"
+    print(f"{len(pages)} fixture pages: output identical")
+    check_missing_dates()
+
+    legacy = time_parser("bs4+dateutil", legacy_parse_market_html, pages, repeats)
+    fast = time_parser("lxml", parse_market_html, pages, repeats)
+    print(f"speedup: {legacy / fast:.1f}x")
+
+    asyncio.run(measure_stalls(pages * repeats))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
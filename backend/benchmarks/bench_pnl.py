@@ -0,0 +1,202 @@
+"""
+Benchmark: ORM-loading /pnl computation vs the materialized P&L summary
+
+First checks parity on a set of small randomized trade histories (mixed
+users, items bought or sold only, zero/None fees, equal buy/sell prices),
+then times both implementations on one heavy trader and reports the peak
+Python memory of each. The one-off summary rebuild (the backfill cost) is
+timed separately; reads after that only touch one row per item.
+
+Run from the backend directory:
+    python -m benchmarks.bench_pnl [trades ...]
+"""
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Trade, User
+from app.services.pnl import compute_pnl
+from app.services.pnl_summary import rebuild_user
+from app.utils.db_helpers import bulk_insert_ignore
+
+PARITY_SETS = 50
+
+
+def legacy_pnl(db, user_id: int) -> dict:
+    """
+    The original get_pnl body, with FIFO matching by timestamp
+
+    The matching is the plain list version of lot_matching: each sell is
+    matched with the oldest buy of the item made before it.
+    """
+    transactions = db.query(Trade).filter(Trade.user_id == user_id).all()
+    transactions.sort(key=lambda trade: (trade.timestamp, trade.id))
+
+    if not transactions:
+        return {
+            "total_bought": 0, "total_sold": 0, "total_profit": 0, "total_fees": 0,
+            "net_profit": 0, "transaction_count": 0, "profitable_trades": 0, "losing_trades": 0
+        }
+
+    total_bought = 0
+    total_sold = 0
+    total_fees = 0
+
+    for trade in transactions:
+        total_fees += trade.fee or 0
+        if trade.trade_type == "BUY":
+            total_bought += trade.price
+        else:
+            total_sold += trade.price
+
+    open_buys = {}
+    profitable = 0
+    losing = 0
+    for trade in transactions:
+        buys = open_buys.setdefault(trade.item_name, [])
+        if trade.trade_type == "BUY":
+            buys.append(trade.price)
+        elif buys:
+            buy_price = buys.pop(0)
+            if trade.price > buy_price:
+                profitable += 1
+            elif trade.price < buy_price:
+                losing += 1
+
+    total_profit = total_sold - total_bought
+    return {
+        "total_bought": total_bought,
+        "total_sold": total_sold,
+        "total_profit": total_profit,
+        "total_fees": total_fees,
+        "net_profit": total_profit - total_fees,
+        "transaction_count": len(transactions),
+        "profitable_trades": profitable,
+        "losing_trades": losing
+    }
+
+
+def make_trades(rng: random.Random, user_id: int, n: int, items: int) -> list:
+    start = datetime(2024, 1, 1)
+    prices = [1.0, 2.5, 10.0]  # repeated prices make equal buy/sell pairs likely
+    rows = []
+    for i in range(n):
+        price = rng.choice(prices) if rng.random() < 0.2 else round(rng.uniform(0.03, 500), 2)
+        rows.append({
+            "user_id": user_id,
+            "trade_id": f"{user_id}_{i}",
+            "trade_type": rng.choice(("BUY", "BUY", "SELL")),
+            "item_name": f"Item {rng.randrange(items)}",
+            "price": price,
+            "fee": rng.choice((None, 0.0, round(price * 0.05, 4))),
+            "net_amount": 0.0,
+            "source": "manual",
+            "timestamp": start + timedelta(minutes=rng.randrange(n * 10)),
+            "created_at": start
+        })
+    rng.shuffle(rows)
+    return rows
+
+
+def same(legacy: dict, fast: dict) -> bool:
+    # SQL SUM may add in a different order; allow for float rounding only
+    return all(
+        math.isclose(legacy[key], fast[key], rel_tol=1e-9, abs_tol=1e-6)
+        if isinstance(legacy[key], float) or isinstance(fast[key], float)
+        else legacy[key] == fast[key]
+        for key in legacy
+    )
+
+
+class BenchDatabase:
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.engine = create_engine(f"sqlite:///{self.path}")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine, autoflush=False)()
+
+    def add_user(self, number: int) -> int:
+        user = User(unique_id=f"bench{number:011d}", steam_id=f"7656119{number:010d}")
+        self.db.add(user)
+        self.db.commit()
+        return user.id
+
+    def close(self):
+        self.db.close()
+        self.engine.dispose()
+        os.remove(self.path)
+
+
+def check_parity():
+    bench = BenchDatabase()
+    try:
+        rng = random.Random(0)
+        users = [bench.add_user(i) for i in range(PARITY_SETS + 1)]
+        for user_id in users[1:]:
+            rows = make_trades(rng, user_id, rng.randrange(1, 400), rng.randrange(1, 30))
+            bulk_insert_ignore(bench.db, Trade, rows)
+        bench.db.commit()
+
+        for user_id in users:  # users[0] has no trades
+            legacy, fast = legacy_pnl(bench.db, user_id), compute_pnl(bench.db, user_id)
+            assert same(legacy, fast), f"user {user_id}: {legacy} != {fast}"
+            bench.db.expunge_all()
+        print(f"{len(users)} randomized trade sets: results identical")
+    finally:
+        bench.close()
+
+
+def measure(label: str, fn, db, user_id: int, n: int) -> dict:
+    db.expunge_all()
+    t0 = time.perf_counter()
+    result = fn(db, user_id)
+    elapsed = time.perf_counter() - t0
+
+    db.expunge_all()
+    tracemalloc.start()
+    fn(db, user_id)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.expunge_all()
+
+    print(f"{label:<6} trades={n:<8} {elapsed:8.3f}s  peak={peak / 2**20:8.1f} MiB")
+    return result
+
+
+def main(sizes: list):
+    check_parity()
+
+    for n in sizes:
+        bench = BenchDatabase()
+        try:
+            other = bench.add_user(1)
+            user_id = bench.add_user(2)
+            rng = random.Random(n)
+            bulk_insert_ignore(bench.db, Trade, make_trades(rng, other, n // 10, 500))
+            bulk_insert_ignore(bench.db, Trade, make_trades(rng, user_id, n, 2000))
+            bench.db.commit()
+
+            t0 = time.perf_counter()
+            items = rebuild_user(bench.db, user_id)
+            bench.db.commit()
+            print(f"rebuild trades={n:<8} {time.perf_counter() - t0:8.3f}s  ({items} items)")
+
+            legacy = measure("ORM", legacy_pnl, bench.db, user_id, n)
+            fast = measure("table", compute_pnl, bench.db, user_id, n)
+            assert same(legacy, fast), f"{legacy} != {fast}"
+        finally:
+            bench.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,149 @@
+"""
+Benchmark: time-bucketed P&L series
+
+Checks every interval of the SQL + streaming FIFO series against a naive
+version that loads all of a user's trades and buckets them in Python, on
+randomized trade sets and ranges. Then times, for one heavy trader, the
+naive version, a cold build, a cached read and the If-None-Match check
+(the version lookup alone) as served by GET /api/transactions/pnl/series.
+
+Run from the backend directory:
+    python -m benchmarks.bench_pnl_series [trades ...]
+"""
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from app.models import Trade
+from app.services.pnl_series import INTERVALS, bucket_start, next_bucket, pnl_series
+from app.utils.db_helpers import bulk_insert_ignore
+from benchmarks.bench_pnl import BenchDatabase, make_trades, same
+
+PARITY_SETS = 30
+REPEATS = 20
+
+
+def naive_series(db, user_id: int, interval: str, start: date, end: date) -> dict:
+    """Every trade through the ORM, list-based FIFO, bucketed in Python"""
+    trades = db.query(Trade).filter(Trade.user_id == user_id).all()
+    trades.sort(key=lambda trade: (trade.timestamp, trade.id))
+    range_start = datetime.combine(start, datetime.min.time())
+    range_end = datetime.combine(end + timedelta(days=1), datetime.min.time())
+
+    buckets = {}
+    period = bucket_start(start, interval)
+    while period <= end:
+        buckets[period.isoformat()] = defaultdict(float)
+        period = next_bucket(period, interval)
+
+    open_lots = defaultdict(list)
+    for trade in trades:
+        if trade.timestamp >= range_end:
+            break
+        in_range = trade.timestamp >= range_start
+        bucket = buckets[bucket_start(trade.timestamp.date(), interval).isoformat()] if in_range else None
+
+        if trade.trade_type == "BUY":
+            open_lots[trade.item_name].append(trade)
+            if in_range:
+                bucket["buy_volume"] += trade.price
+                bucket["buy_count"] += 1
+        else:
+            lots = open_lots[trade.item_name]
+            buy = lots.pop(0) if lots else None
+            if in_range:
+                bucket["sell_volume"] += trade.price
+                bucket["sell_count"] += 1
+                if buy is not None:
+                    pnl = trade.price - buy.price
+                    bucket["realized_pnl"] += pnl
+                    bucket["realized_net_pnl"] += pnl - (trade.fee or 0) - (buy.fee or 0)
+                    bucket["matched_count"] += 1
+        if in_range:
+            bucket["fees"] += trade.fee or 0
+
+    return buckets
+
+
+def check(db, user_id: int, interval: str, start: date, end: date):
+    expected = naive_series(db, user_id, interval, start, end)
+    series = pnl_series.build(db, user_id, interval, start, end)
+    assert [bucket["period"] for bucket in series["buckets"]] == list(expected), "bucket periods differ"
+
+    for bucket in series["buckets"]:
+        reference = expected[bucket["period"]]
+        reference["net_cash_flow"] = reference["sell_volume"] - reference["buy_volume"] - reference["fees"]
+        fields = {key: reference[key] for key in bucket if key != "period"}
+        assert same(fields, {key: bucket[key] for key in fields}), \
+            f"user {user_id} {interval} {bucket['period']}: {dict(reference)} != {bucket}"
+    db.expunge_all()
+
+
+def check_parity():
+    bench = BenchDatabase()
+    try:
+        rng = random.Random(0)
+        users = [bench.add_user(i) for i in range(PARITY_SETS + 1)]
+        for user_id in users[1:]:
+            rows = make_trades(rng, user_id, rng.randrange(1, 400), rng.randrange(1, 30))
+            bulk_insert_ignore(bench.db, Trade, rows)
+        bench.db.commit()
+
+        for user_id in users:  # users[0] has no trades
+            # make_trades spreads n trades over n * 10 minutes from 2024-01-01
+            start = date(2024, 1, 1) + timedelta(days=rng.randrange(3))
+            end = start + timedelta(days=rng.randrange(0, 90))
+            for interval in INTERVALS:
+                check(bench.db, user_id, interval, start, end)
+        print(f"{len(users)} randomized trade sets x {len(INTERVALS)} intervals: results identical")
+    finally:
+        bench.close()
+
+
+def timed(fn, repeats: int = 1) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - t0) / repeats * 1000
+
+
+def main(sizes: list):
+    check_parity()
+
+    for n in sizes:
+        bench = BenchDatabase()
+        try:
+            db = bench.db
+            other = bench.add_user(1)
+            user_id = bench.add_user(2)
+            rng = random.Random(n)
+            bulk_insert_ignore(db, Trade, make_trades(rng, other, n // 10, 500))
+            bulk_insert_ignore(db, Trade, make_trades(rng, user_id, n, 2000))
+            db.commit()
+
+            # Last year of the history, like the endpoint's default range
+            end = date(2024, 1, 1) + timedelta(minutes=n * 10)
+            start = end - timedelta(days=365)
+            pnl_series.etag(db, user_id, "day", start, end)  # backfills the summary once
+            db.commit()
+
+            print(f"trades={n}  range {start}..{end}")
+            for interval in INTERVALS:
+                naive = timed(lambda: (naive_series(db, user_id, interval, start, end), db.expunge_all()))
+                cold = timed(lambda: pnl_series.build(db, user_id, interval, start, end))
+                etag = pnl_series.etag(db, user_id, interval, start, end)
+                pnl_series.get(db, user_id, interval, start, end, etag)
+                cached = timed(lambda: pnl_series.get(
+                    db, user_id, interval, start, end, pnl_series.etag(db, user_id, interval, start, end)
+                ), REPEATS)
+                not_modified = timed(lambda: pnl_series.etag(db, user_id, interval, start, end), REPEATS)
+                print(f"  {interval:<6} naive={naive:9.1f}ms  cold={cold:8.1f}ms  "
+                      f"cached={cached:6.2f}ms  304={not_modified:6.2f}ms")
+        finally:
+            bench.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,154 @@
+"""
+Benchmark: per-item Python portfolio valuation vs the vectorized engine
+
+Fills item_pnl_summary and price_cache for many users (some items without
+a price, some positions fully sold), then values every portfolio twice:
+the naive way (per user, per item price query, loop over the open lots)
+and with one value_portfolios pass. Checks both give the same totals and
+positions, and also times a single user as served by GET /api/portfolio/.
+
+Run from the backend directory:
+    python -m benchmarks.bench_portfolio [users ...]
+"""
+import json
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.models import ItemPnLSummary, PriceCache, PRICE_NOT_LISTED, PRICE_OK
+from app.services.portfolio import value_portfolios
+from app.utils.db_helpers import bulk_insert_ignore
+from benchmarks.bench_pnl import BenchDatabase, same
+
+ITEMS = 5000
+POSITIONS_PER_USER = 100
+NOW = datetime(2025, 6, 1)
+
+
+def naive_portfolio(db, user_id: int) -> dict:
+    """Loop over the user's items and open lots, one price lookup per item"""
+    market_value = cost_basis = priced_cost = 0.0
+    values = {}
+    for summary in db.query(ItemPnLSummary).filter(ItemPnLSummary.user_id == user_id):
+        lots = json.loads(summary.open_lots)
+        if not lots:
+            continue
+        cached = db.query(PriceCache).filter(
+            PriceCache.item_name == summary.item_name, PriceCache.status == PRICE_OK
+        ).first()
+        price = cached.price if cached else None
+
+        value = cost = 0.0
+        for lot_price, _fee, _timestamp in lots:
+            cost += lot_price
+            if price is not None:
+                value += price
+        cost_basis += cost
+        if price is not None:
+            market_value += value
+            priced_cost += cost
+            values[summary.item_name] = value
+        else:
+            values[summary.item_name] = None
+
+    return {
+        "market_value": market_value,
+        "cost_basis": cost_basis,
+        "unrealized_pnl": market_value - priced_cost,
+        "positions": values
+    }
+
+
+def fill(bench: BenchDatabase, rng: random.Random, users: int) -> list:
+    prices = []
+    for item in range(ITEMS):
+        listed = rng.random() < 0.9
+        prices.append({
+            "item_name": f"Item {item}",
+            "price": round(rng.uniform(0.03, 500), 2) if listed else None,
+            "status": PRICE_OK if listed else PRICE_NOT_LISTED,
+            "source": "csfloat",
+            "cached_at": NOW - timedelta(seconds=rng.randrange(3600))
+        })
+    bulk_insert_ignore(bench.db, PriceCache, prices)
+
+    user_ids = []
+    rows = []
+    for number in range(users):
+        user_id = bench.add_user(number)
+        user_ids.append(user_id)
+        for item in rng.sample(range(ITEMS + 50), POSITIONS_PER_USER):  # a few never priced at all
+            lots = [
+                [round(rng.uniform(0.03, 500), 2), 0.0, (NOW - timedelta(days=rng.randrange(365))).isoformat()]
+                for _ in range(rng.choice((0, 1, 1, 2, 5, 20)))
+            ]
+            rows.append({
+                "user_id": user_id,
+                "item_name": f"Item {item}",
+                "open_count": len(lots),
+                "open_cost": sum(lot[0] for lot in lots),
+                "open_lots": json.dumps(lots),
+                "updated_at": NOW
+            })
+    bulk_insert_ignore(bench.db, ItemPnLSummary, rows)
+    bench.db.commit()
+    return user_ids
+
+
+def check(expected: dict, valued: dict):
+    assert same(
+        {key: expected[key] for key in ("market_value", "cost_basis", "unrealized_pnl")},
+        {key: valued[key] for key in ("market_value", "cost_basis", "unrealized_pnl")}
+    ), f"user {valued['user_id']}: {expected} != {valued}"
+
+    positions = {position["item_name"]: position["market_value"] for position in valued["positions"]}
+    assert positions.keys() == expected["positions"].keys(), f"user {valued['user_id']}: positions differ"
+    for item_name, value in expected["positions"].items():
+        assert (value is None) == (positions[item_name] is None), f"{item_name}: priced differently"
+        assert value is None or math.isclose(value, positions[item_name], rel_tol=1e-9, abs_tol=1e-6)
+
+    weights = sum(position["weight"] for position in valued["positions"])
+    assert not valued["market_value"] or math.isclose(weights, 1.0), f"weights sum to {weights}"
+
+
+def main(sizes: list):
+    for users in sizes:
+        bench = BenchDatabase()
+        try:
+            db = bench.db
+            user_ids = fill(bench, random.Random(users), users)
+
+            t0 = time.perf_counter()
+            expected = {user_id: naive_portfolio(db, user_id) for user_id in user_ids}
+            naive = time.perf_counter() - t0
+            db.expunge_all()
+
+            t0 = time.perf_counter()
+            valuation = value_portfolios(db, now=NOW)
+            totals = valuation.totals()
+            vectorized = time.perf_counter() - t0
+
+            assert [row["user_id"] for row in totals] == user_ids
+            for user_id in user_ids:
+                check(expected[user_id], valuation.user(user_id))
+
+            single_user = user_ids[len(user_ids) // 2]
+            t0 = time.perf_counter()
+            naive_portfolio(db, single_user)
+            naive_single = (time.perf_counter() - t0) * 1000
+            db.expunge_all()
+            t0 = time.perf_counter()
+            value_portfolios(db, [single_user], now=NOW).user(single_user)
+            vectorized_single = (time.perf_counter() - t0) * 1000
+
+            print(f"users={users:<6} positions={len(valuation.quantity):<8} all users: "
+                  f"naive={naive:8.3f}s  vectorized={vectorized:7.3f}s   one user: "
+                  f"naive={naive_single:7.1f}ms  vectorized={vectorized_single:6.1f}ms  (results identical)")
+        finally:
+            bench.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000])
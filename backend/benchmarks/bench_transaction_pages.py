@@ -0,0 +1,129 @@
+"""
+Benchmark: OFFSET vs keyset (cursor) pagination of the transaction listing
+
+Builds a database with one heavy trader among many users, then times
+fetching a 100-row page at increasing depth both ways, with and without
+the trade_type filter, using the same queries as GET /api/transactions/.
+Checks both methods return the same rows.
+
+Run from the backend directory:
+    python -m benchmarks.bench_transaction_pages [trades]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, desc, tuple_
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Trade, User
+from app.utils.db_helpers import bulk_insert_ignore
+from app.utils.pagination import decode_cursor, encode_cursor
+
+PAGE = 100
+OTHER_USERS = 20
+REPEATS = 20
+
+
+def listing(db, user_id: int, trade_type=None):
+    query = db.query(Trade).filter(Trade.user_id == user_id)
+    if trade_type:
+        query = query.filter(Trade.trade_type == trade_type)
+    return query
+
+
+def offset_page(db, user_id: int, offset: int, trade_type=None) -> list:
+    return listing(db, user_id, trade_type).order_by(
+        desc(Trade.timestamp), desc(Trade.id)
+    ).offset(offset).limit(PAGE).all()
+
+
+def cursor_page(db, user_id: int, cursor, trade_type=None) -> list:
+    query = listing(db, user_id, trade_type)
+    if cursor:
+        after_timestamp, after_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Trade.timestamp, Trade.id) < (after_timestamp, after_id))
+    return query.order_by(desc(Trade.timestamp), desc(Trade.id)).limit(PAGE).all()
+
+
+def make_trades(rng: random.Random, user_id: int, n: int) -> list:
+    start = datetime(2020, 1, 1)
+    return [
+        {
+            "user_id": user_id,
+            "trade_id": f"{user_id}_{i}",
+            "trade_type": rng.choice(("BUY", "SELL")),
+            "item_name": f"Item {rng.randrange(2000)}",
+            "price": round(rng.uniform(0.03, 500), 2),
+            "fee": 0.0,
+            "net_amount": 0.0,
+            "source": "manual",
+            # Whole minutes: plenty of equal timestamps for the id tie-break
+            "timestamp": start + timedelta(minutes=rng.randrange(n)),
+            "created_at": start
+        }
+        for i in range(n)
+    ]
+
+
+def timed(fn) -> float:
+    t0 = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - t0) / REPEATS * 1000
+
+
+def main(n: int):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    try:
+        rng = random.Random(n)
+        users = []
+        for number in range(OTHER_USERS + 1):
+            user = User(unique_id=f"bench{number:011d}", steam_id=f"7656119{number:010d}")
+            db.add(user)
+            db.commit()
+            users.append(user.id)
+            bulk_insert_ignore(db, Trade, make_trades(rng, user.id, n if number == 0 else n // OTHER_USERS))
+        db.commit()
+        heavy = users[0]
+
+        for trade_type in (None, "SELL"):
+            total = listing(db, heavy, trade_type).count()
+            depths = [depth // PAGE * PAGE for depth in (0, total // 10, total // 2, total - PAGE)]
+            print(f"trade_type={trade_type or 'any'}  ({total} matching trades)")
+
+            # Walk the cursor chain once to get the cursor at each depth
+            cursors = {}
+            cursor = None
+            for offset in range(0, depths[-1] + 1, PAGE):
+                if offset in depths:
+                    cursors[offset] = cursor
+                rows = cursor_page(db, heavy, cursor, trade_type)
+                if offset in depths:
+                    assert [row.id for row in rows] == [
+                        row.id for row in offset_page(db, heavy, offset, trade_type)
+                    ], f"pages differ at offset {offset}"
+                cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+                db.expunge_all()
+
+            for depth in depths:
+                by_offset = timed(lambda: (offset_page(db, heavy, depth, trade_type), db.expunge_all()))
+                by_cursor = timed(lambda: (cursor_page(db, heavy, cursors[depth], trade_type), db.expunge_all()))
+                print(f"  row {depth:<8} offset={by_offset:8.2f}ms  cursor={by_cursor:8.2f}ms")
+    finally:
+        db.close()
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
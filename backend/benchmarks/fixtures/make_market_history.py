@@ -0,0 +1,135 @@
+"""
+Regenerate the market history fixture corpus
+
+Writes render-endpoint responses ({"success", "start", "pagesize",
+"total_count", "results_html"}) using Steam's market history row markup,
+with account-specific values (profile links, avatars, row ids) replaced by
+deterministic placeholders. Covers purchases, sales, listing events with an
+empty gain/loss cell, multi-word/unicode names, several currencies and the
+date formats Steam uses.
+
+Run from the backend directory:
+    python -m benchmarks.fixtures.make_market_history
+"""
+import html
+import json
+import os
+import random
+
+PAGES = 3
+PAGE_SIZE = 100
+OUT_DIR = os.path.dirname(os.path.abspath(__file__)) + "/market_history"
+
+ITEMS = [
+    "AK-47 | Redline (Field-Tested)",
+    "AWP | Asiimov (Battle-Scarred)",
+    "StatTrak™ M4A1-S | Hyper Beast (Minimal Wear)",
+    "★ Karambit | Doppler (Factory New)",
+    "Sticker | Natus Vincere (Holo) | Stockholm 2021",
+    "Operation Breakout Weapon Case",
+    "Souvenir P250 | Sand Dune (Well-Worn)",
+    "Glock-18 | Fade (Factory New)",
+    "Sealed Graffiti | GLHF (Shark White)",
+    "Music Kit | Daniel Sadowski, Crimson Assault",
+    "USP-S | Kill Confirmed & Friends (Minimal Wear)",
+    "Desert Eagle | Blaze <FN>",
+]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+ROW = """<div class="market_listing_row market_recent_listing_row" id="history_row_{listing}_{event}">
+\t<div class="market_listing_left_cell market_listing_gainorloss">
+\t{gain}\t</div>
+\t<img id="history_row_{listing}_{event}_image" src="https://community.cloudflare.steamstatic.com/economy/image/{image}/62fx62f" srcset="https://community.cloudflare.steamstatic.com/economy/image/{image}/62fx62f 1x, https://community.cloudflare.steamstatic.com/economy/image/{image}/62fx62fdpx2x 2x" style="border-color: #D2D2D2;" class="market_listing_item_img" alt="" />
+\t<div class="market_listing_right_cell market_listing_their_price">
+\t\t<span class="market_table_value">
+\t\t\t<span class="market_listing_price">
+\t\t\t\t{price}\t\t\t</span>
+\t\t\t<br>
+\t\t</span>
+\t</div>
+\t<div class="market_listing_right_cell market_listing_whoactedwith">
+\t\t<div class="market_listing_whoactedwith_name_block">
+\t\t\t{who}
+\t\t</div>
+\t</div>
+\t<div class="market_listing_right_cell market_listing_listed_date can_combine">
+\t\t{acted}\t</div>
+\t<div class="market_listing_right_cell market_listing_listed_date can_combine">
+\t\t{listed}\t</div>
+\t<div class="market_listing_item_name_block">
+\t\t<span id="history_row_{listing}_{event}_name" class="market_listing_item_name" style="color: #D2D2D2;">{name}</span>
+\t\t<br/>
+\t\t<span class="market_listing_game_name">Counter-Strike 2</span>
+\t\t<div class="market_listing_listed_date_combined">
+\t\t\t{listed_label}\t\t</div>
+\t</div>
+\t<div style="clear: both"></div>
+</div>
+"""
+
+
+def fmt_price(rng: random.Random, value: float) -> str:
+    style = rng.random()
+    if style < 0.7:
+        return f"${value:,.2f}"
+    if style < 0.85:
+        return f"Rp {int(value * 15000):,}"
+    if style < 0.95:
+        return f"{value:.2f}€"
+    return "Sold!"
+
+
+def fmt_date(rng: random.Random) -> str:
+    day, month = rng.randint(1, 28), rng.choice(MONTHS)
+    style = rng.random()
+    if style < 0.8:
+        return f"{day} {month}"
+    if style < 0.9:
+        return f"{day} {month}, {rng.randint(2019, 2025)}"
+    if style < 0.97:
+        return f"{month} {day}"
+    return f"{day} {month} @ {rng.randint(1, 12)}:{rng.randint(0, 59):02d}pm"
+
+
+def make_row(rng: random.Random, index: int) -> str:
+    kind = rng.random()
+    if kind < 0.45:
+        gain, who = "+", 'Seller:<br><a href="https://steamcommunity.com/profiles/7656119000000{:04d}"><img src="https://avatars.cloudflare.steamstatic.com/placeholder.jpg"></a>'.format(index % 10000)
+    elif kind < 0.9:
+        gain, who = "-", 'Buyer:<br><a href="https://steamcommunity.com/profiles/7656119000001{:04d}"><img src="https://avatars.cloudflare.steamstatic.com/placeholder.jpg"></a>'.format(index % 10000)
+    else:
+        gain, who = "", '<div class="market_listing_history_action">Listing created</div>'
+
+    listed = fmt_date(rng)
+    return ROW.format(
+        listing=4218469028839437000 + index * 7,
+        event=4218469028839437001 + index * 7,
+        gain=gain,
+        image=f"-9a81dlWLwJ2UUGcVs_nsVtzdOEdtWwKGZZLQHTxDZ7I56KU0Zwwo4NUX4oFJZEH{index:05d}",
+        price=html.escape(fmt_price(rng, round(rng.uniform(0.03, 1500), 2))),
+        who=who,
+        acted=listed,
+        listed=fmt_date(rng),
+        name=html.escape(rng.choice(ITEMS)),
+        listed_label=f"Listed: {listed}"
+    )
+
+
+def main():
+    rng = random.Random(2024)
+    os.makedirs(OUT_DIR, exist_ok=True)
+    for page in range(PAGES):
+        rows = "".join(make_row(rng, page * PAGE_SIZE + i) for i in range(PAGE_SIZE))
+        payload = {
+            "success": True,
+            "pagesize": PAGE_SIZE,
+            "total_count": PAGES * PAGE_SIZE,
+            "start": page * PAGE_SIZE,
+            "results_html": f'<div class="market_listing_table_header">\n</div>\n{rows}'
+        }
+        with open(f"{OUT_DIR}/page_{page:03d}.json", "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
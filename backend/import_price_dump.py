@@ -0,0 +1,53 @@
+"""
+Load an offline full-market price dump into price_cache
+
+Streams the file in chunks, so dumps much larger than memory are fine:
+
+    python import_price_dump.py prices.json
+    python import_price_dump.py prices.csv --source dump:2024-01-01 --price-unit cents
+"""
+import argparse
+import logging
+
+from app.database import engine, Base, SessionLocal
+from app.services.price_dump import DumpFormatError, load_dump_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load a price dump into price_cache")
+    parser.add_argument("path", help="JSON, NDJSON or CSV dump file")
+    parser.add_argument("--format", choices=["json", "ndjson", "csv"], help="default: from the file extension")
+    parser.add_argument("--source", help="provenance stored in price_cache.source (default: dump:<file name>)")
+    parser.add_argument("--price-unit", choices=["dollars", "cents"], default="dollars")
+    parser.add_argument("--chunk-size", type=int, help="rows per transaction")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        print(f"💾 Loading {args.path}...")
+        report = load_dump_file(
+            db,
+            args.path,
+            fmt=args.format,
+            source=args.source,
+            chunk_size=args.chunk_size,
+            price_unit=args.price_unit
+        )
+    except DumpFormatError as e:
+        print(f"❌ Invalid dump: {e}")
+        raise SystemExit(1)
+    finally:
+        db.close()
+
+    print(f"✅ Loaded {report['loaded']} prices in {report['seconds']}s "
+          f"({report['rows_per_second']} rows/sec, {report['chunks']} chunks)")
+    if report["skipped"]:
+        print(f"⚠️ Skipped {report['skipped']} entries without a usable price")
+    print(f"  Source: {report['source']}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
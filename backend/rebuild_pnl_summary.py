@@ -0,0 +1,75 @@
+"""
+Rebuild or check the materialized per-item P&L summary
+
+Backfills item_pnl_summary from the trades table, or verifies that the
+incrementally maintained rows still match a full recomputation:
+
+    python rebuild_pnl_summary.py --all
+    python rebuild_pnl_summary.py <user_id> [<user_id> ...]
+    python rebuild_pnl_summary.py --all --check
+"""
+import argparse
+import logging
+import time
+
+from fastapi import HTTPException
+
+from app.database import engine, Base, SessionLocal
+from app.models import Trade
+from app.services.pnl_summary import check_user, rebuild_user
+from app.utils.user_helpers import get_user_int_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild or check the per-item P&L summary")
+    parser.add_argument("user_ids", nargs="*", help="User unique IDs (or integer IDs)")
+    parser.add_argument("--all", action="store_true", help="every user with trades")
+    parser.add_argument("--check", action="store_true", help="only report mismatches, change nothing")
+    args = parser.parse_args()
+
+    if not args.user_ids and not args.all:
+        parser.error("give user IDs or --all")
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    inconsistent = 0
+    try:
+        if args.all:
+            user_ids = [user_id for (user_id,) in db.query(Trade.user_id).distinct().order_by(Trade.user_id)]
+        else:
+            try:
+                user_ids = [get_user_int_id(user_id, db) for user_id in args.user_ids]
+            except HTTPException as e:
+                print(f"❌ {e.detail}")
+                raise SystemExit(1)
+
+        for user_id in user_ids:
+            t0 = time.perf_counter()
+
+            if args.check:
+                problems = check_user(db, user_id)
+                if problems:
+                    inconsistent += 1
+                    print(f"❌ User {user_id}: {len(problems)} mismatches")
+                    for problem in problems[:20]:
+                        print(f"  {problem}")
+                else:
+                    print(f"✅ User {user_id}: consistent ({time.perf_counter() - t0:.2f}s)")
+                db.rollback()
+                continue
+
+            items = rebuild_user(db, user_id)
+            db.commit()
+            print(f"✅ User {user_id}: {items} items rebuilt in {time.perf_counter() - t0:.2f}s")
+    finally:
+        db.close()
+
+    if inconsistent:
+        print(f"⚠️ {inconsistent} of {len(user_ids)} users inconsistent; run without --check to rebuild them")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
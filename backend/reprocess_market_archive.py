@@ -0,0 +1,57 @@
+"""
+Rebuild a user's Steam Market trades from archived history pages
+
+Reparses the raw results_html pages kept by imports with archiving on,
+entirely offline (no Steam requests):
+
+    python reprocess_market_archive.py <user_id>
+    python reprocess_market_archive.py <user_id> --dry-run
+"""
+import argparse
+import logging
+
+from fastapi import HTTPException
+
+from app.database import engine, Base, SessionLocal
+from app.services.market_archive import market_archive
+from app.utils.user_helpers import get_user_int_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild Steam Market trades from the page archive")
+    parser.add_argument("user_id", help="User unique ID (or integer ID)")
+    parser.add_argument("--dry-run", action="store_true", help="report the counts without changing anything")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        try:
+            int_user_id = get_user_int_id(args.user_id, db)
+        except HTTPException as e:
+            print(f"❌ {e.detail}")
+            raise SystemExit(1)
+
+        archive = market_archive.stats(db, int_user_id)
+        if not archive["pages"]:
+            print("⚠️ No archived pages for this user (import with archive enabled first)")
+            raise SystemExit(1)
+
+        print(f"📦 {archive['pages']} archived pages "
+              f"({archive['raw_bytes'] / 1024:.0f} KB raw, {archive['stored_bytes'] / 1024:.0f} KB stored)")
+
+        report = market_archive.reprocess_user(db, int_user_id, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    prefix = "🔍 Dry run: would have" if report["dry_run"] else "✅"
+    print(f"{prefix} deleted {report['deleted']} and imported {report['imported']} trades "
+          f"({report['skipped']} duplicate rows skipped)")
+    print(f"  Parsed {report['rows_parsed']} rows from {report['pages']} pages in {report['seconds']}s "
+          f"({report['rows_per_second']} rows/sec)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
@@ -0,0 +1,38 @@
+"""
+Standalone background price refresher
+
+Runs the same leader-elected refresh loop as the API lifespan, for
+deployments that keep it out of the uvicorn workers:
+
+    python run_price_refresher.py
+"""
+import asyncio
+import logging
+import signal
+
+from app.database import engine, Base
+from app.services.http_client import http_clients
+from app.services.price_refresher import price_refresher
+
+
+async def main():
+    Base.metadata.create_all(bind=engine)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, lambda: asyncio.create_task(price_refresher.stop()))
+        except NotImplementedError:
+            # Windows: rely on KeyboardInterrupt instead
+            pass
+
+    price_refresher.start()
+    try:
+        await price_refresher.wait()
+    finally:
+        await http_clients.aclose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
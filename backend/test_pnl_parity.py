@@ -0,0 +1,152 @@
+"""
+P&L parity check against the original /pnl computation
+
+Compares compute_pnl (read from the materialized item_pnl_summary) with the
+original ORM-loading endpoint body on randomized trade histories, including
+trades stored without an item name (NULL item_name, e.g. from old market
+imports). Those are matched FIFO among themselves as one item, as the
+original code did. Also checks the incremental write paths and the
+realized P&L of the series endpoint on the same data.
+
+Run from the backend directory (uses a throwaway SQLite database):
+    python test_pnl_parity.py
+"""
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+from app.models import Trade
+from app.services.pnl import compute_pnl, items_summary
+from app.services.pnl_series import pnl_series
+from app.services.pnl_summary import check_user, rebuild_items, record_trades
+from app.utils.db_helpers import bulk_insert_ignore
+from benchmarks.bench_pnl import BenchDatabase, legacy_pnl, make_trades, same
+
+SETS = 30
+
+
+def with_null_items(rng: random.Random, rows: list, share: float) -> list:
+    for row in rows:
+        if rng.random() < share:
+            row["item_name"] = None
+    return rows
+
+
+def test_randomized_with_null_items(bench: BenchDatabase) -> bool:
+    """Read path: summary built on first read vs the original endpoint"""
+    print("\n🔍 Randomized histories with NULL item names")
+    rng = random.Random(19)
+    failures = 0
+
+    for number in range(SETS):
+        user_id = bench.add_user(100 + number)
+        rows = make_trades(rng, user_id, rng.randrange(1, 300), rng.randrange(1, 20))
+        bulk_insert_ignore(bench.db, Trade, with_null_items(rng, rows, rng.choice((0.0, 0.1, 0.5, 1.0))))
+        bench.db.commit()
+
+        legacy, fast = legacy_pnl(bench.db, user_id), compute_pnl(bench.db, user_id)
+        bench.db.commit()
+        if not same(legacy, fast):
+            failures += 1
+            print(f"   ❌ user {user_id}: {legacy} != {fast}")
+        bench.db.expunge_all()
+
+    if not failures:
+        print(f"   ✅ {SETS} trade sets identical")
+    return not failures
+
+
+def test_null_item_writes(bench: BenchDatabase) -> bool:
+    """Write paths: incremental record_trades and rebuild on delete"""
+    print("\n🔍 Creating and deleting trades without an item name")
+    user_id = bench.add_user(1)
+    start = datetime(2025, 1, 1)
+    ok = True
+
+    # Read first, so the summary exists and later writes are incremental
+    compute_pnl(bench.db, user_id)
+    bench.db.commit()
+
+    trades = []
+    for i, (item_name, trade_type, price) in enumerate([
+        (None, "BUY", 10.0), ("AK", "BUY", 5.0), (None, "SELL", 12.0), (None, "BUY", 8.0), (None, "SELL", 7.0)
+    ]):
+        trade = Trade(
+            user_id=user_id, trade_id=f"null_{i}", trade_type=trade_type, item_name=item_name,
+            price=price, fee=0.0, net_amount=0.0, source="manual", timestamp=start + timedelta(days=i)
+        )
+        bench.db.add(trade)
+        bench.db.flush()
+        record_trades(bench.db, user_id, [{
+            "item_name": trade.item_name, "trade_type": trade.trade_type,
+            "price": trade.price, "fee": trade.fee, "timestamp": trade.timestamp
+        }])
+        bench.db.commit()
+        trades.append(trade)
+
+    for label in ("after creates", "after delete"):
+        legacy, fast = legacy_pnl(bench.db, user_id), compute_pnl(bench.db, user_id)
+        mismatches = check_user(bench.db, user_id)
+        if same(legacy, fast) and not mismatches:
+            print(f"   ✅ {label}: {fast['profitable_trades']} profitable, {fast['losing_trades']} losing")
+        else:
+            ok = False
+            print(f"   ❌ {label}: {legacy} != {fast} {mismatches}")
+
+        if label == "after creates":
+            bench.db.delete(trades[0])
+            bench.db.flush()
+            rebuild_items(bench.db, user_id, [trades[0].item_name])
+            bench.db.commit()
+
+    return ok
+
+
+def test_series_realized(bench: BenchDatabase) -> bool:
+    """Series: realized P&L over all time equals the per-item summary"""
+    print("\n🔍 Realized series vs item summary")
+    rng = random.Random(23)
+    failures = 0
+
+    for number in range(10):
+        user_id = bench.add_user(200 + number)
+        rows = make_trades(rng, user_id, rng.randrange(10, 200), rng.randrange(1, 10))
+        bulk_insert_ignore(bench.db, Trade, with_null_items(rng, rows, 0.3))
+        bench.db.commit()
+
+        summary = items_summary(bench.db, user_id)
+        series = pnl_series.build(bench.db, user_id, "month", date(2024, 1, 1), date(2030, 12, 31))["totals"]
+        expected = {
+            "realized_pnl": sum(item["realized_pnl"] for item in summary),
+            "matched_count": sum(item["matched_count"] for item in summary)
+        }
+        actual = {key: series[key] for key in expected}
+        if not same(expected, actual):
+            failures += 1
+            print(f"   ❌ user {user_id}: {expected} != {actual}")
+
+    if not failures:
+        print("   ✅ 10 trade sets identical")
+    return not failures
+
+
+def main():
+    print("P&L parity")
+    print("=" * 60)
+
+    bench = BenchDatabase()
+    try:
+        results = [
+            test_randomized_with_null_items(bench),
+            test_null_item_writes(bench),
+            test_series_realized(bench)
+        ]
+    finally:
+        bench.close()
+
+    print("\n" + ("✅ All parity checks passed" if all(results) else "❌ Parity checks failed"))
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
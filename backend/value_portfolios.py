@@ -0,0 +1,69 @@
+"""
+Value every user's portfolio in one vectorized pass
+
+Builds missing P&L summaries, values all open positions at the latest
+cached prices and prints each user's totals, or writes them as JSON:
+
+    python value_portfolios.py
+    python value_portfolios.py --json portfolios.json
+    python value_portfolios.py --no-backfill
+"""
+import argparse
+import json
+import logging
+import time
+
+from app.database import engine, Base, SessionLocal
+from app.models import ItemPnLSummary, Trade
+from app.services.pnl_summary import rebuild_user
+from app.services.portfolio import value_portfolios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Value every user's open positions")
+    parser.add_argument("--json", metavar="PATH", help="write all users' totals to this file")
+    parser.add_argument("--no-backfill", action="store_true", help="skip users without a P&L summary")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        if not args.no_backfill:
+            summarized = db.query(ItemPnLSummary.user_id).distinct()
+            missing = [
+                user_id for (user_id,) in
+                db.query(Trade.user_id).filter(Trade.user_id.notin_(summarized)).distinct()
+            ]
+            for user_id in missing:
+                items = rebuild_user(db, user_id)
+                db.commit()
+                print(f"✅ User {user_id}: built P&L summary ({items} items)")
+
+        t0 = time.perf_counter()
+        valuation = value_portfolios(db)
+        portfolios = valuation.totals()
+        elapsed = time.perf_counter() - t0
+    finally:
+        db.close()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(portfolios, f, indent=2)
+        print(f"💾 Wrote {len(portfolios)} portfolios to {args.json}")
+    else:
+        for portfolio in portfolios:
+            print(
+                f"User {portfolio['user_id']:>6}: value {portfolio['market_value']:>12.2f}  "
+                f"cost {portfolio['cost_basis']:>12.2f}  unrealized {portfolio['unrealized_pnl']:>+12.2f} "
+                f"({portfolio['unrealized_pnl_pct']:+.1f}%)  {portfolio['open_lots']} lots, "
+                f"{portfolio['unpriced_items']}/{portfolio['items']} items unpriced"
+            )
+
+    total = sum(portfolio["market_value"] for portfolio in portfolios)
+    print(f"📊 {len(portfolios)} users valued in {elapsed:.3f}s, total market value {total:.2f}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
@@ -30,24 +30,19 @@ document.getElementById('importBtn').addEventListener('click', async () => {
 
         statusDiv.textContent = '📡 Sending to CS2 Tracker...';
 
-        // Send to our API
-        const response = await fetch(`http://localhost:8000/api/import/steam-market?user_id=${userId}`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                cookies: cookies,
-                count: 500
-            })
+        // Start the import job on our API (or resume the last unfinished one)
+        const job = await startImportJob(userId, cookies);
+
+        // Follow progress until the job finishes
+        const result = await followImportJob(job, (progress) => {
+            const total = progress.total_count ? ` / ${progress.total_count}` : '';
+            statusDiv.textContent = `📥 Page ${progress.pages_fetched} (${progress.rows_parsed}${total} rows)\nImported: ${progress.imported}`;
         });
 
-        if (!response.ok) {
-            const error = await response.json();
-            throw new Error(error.detail || 'Import failed');
+        if (result.status !== 'completed') {
+            throw new Error(`${result.error || 'Import ' + result.status}\nClick Import again to resume.`);
         }
-
-        const result = await response.json();
+        chrome.storage.local.remove('importJobId');
 
         // Show success
         statusDiv.textContent = `✅ Imported ${result.imported} transactions!`;
@@ -55,7 +50,7 @@ document.getElementById('importBtn').addEventListener('click', async () => {
 
         // Show detailed results
         setTimeout(() => {
-            statusDiv.textContent = `✅ Success!\nImported: ${result.imported}\nSkipped: ${result.skipped}\nTotal: ${result.total}`;
+            statusDiv.textContent = `✅ Success!\nImported: ${result.imported}\nSkipped: ${result.skipped}\nPages: ${result.pages_fetched}`;
         }, 1000);
 
     } catch (error) {
@@ -67,6 +62,73 @@ document.getElementById('importBtn').addEventListener('click', async () => {
     }
 });
 
+const API_BASE = 'http://localhost:8000';
+
+// Start an import job, resuming the last one if it failed or was interrupted
+async function startImportJob(userId, cookies) {
+    const { importJobId } = await chrome.storage.local.get(['importJobId']);
+
+    if (importJobId) {
+        const response = await fetch(`${API_BASE}/api/import/jobs/${importJobId}/resume?user_id=${encodeURIComponent(userId)}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ cookies: cookies })
+        });
+        if (response.ok) {
+            return await response.json();
+        }
+        // Finished, still running elsewhere or unknown: start fresh
+        chrome.storage.local.remove('importJobId');
+    }
+
+    const response = await fetch(`${API_BASE}/api/import/steam-market?user_id=${userId}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            cookies: cookies
+        })
+    });
+
+    if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.detail || 'Import failed');
+    }
+
+    const job = await response.json();
+    chrome.storage.local.set({ importJobId: job.job_id });
+    return job;
+}
+
+// Resolve with the job's final state, streaming progress via Server-Sent Events
+function followImportJob(job, onProgress) {
+    return new Promise((resolve) => {
+        // status_url and events_url already carry the job owner's user_id
+        const source = new EventSource(`${API_BASE}${job.events_url}`);
+
+        source.addEventListener('progress', (event) => onProgress(JSON.parse(event.data)));
+        source.addEventListener('done', (event) => {
+            source.close();
+            resolve(JSON.parse(event.data));
+        });
+        source.onerror = async () => {
+            // Stream dropped: fall back to polling
+            source.close();
+            while (true) {
+                const response = await fetch(`${API_BASE}${job.status_url}`);
+                const state = await response.json();
+                onProgress(state);
+                if (!['pending', 'running'].includes(state.status)) {
+                    resolve(state);
+                    return;
+                }
+                await new Promise((r) => setTimeout(r, 2000));
+            }
+        };
+    });
+}
+
 // Load saved user ID
 chrome.storage.local.get(['userId'], (result) => {
     if (result.userId) {